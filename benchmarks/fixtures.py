@@ -0,0 +1,143 @@
+"""Synthetic inputs for the benchmarks; no checkpoints or body models needed."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+
+# Chains hanging off the pelvis, as (name, share of dofs). With 29 dofs this
+# gives 6 per leg, 3 waist, 7 per arm, like unitree_g1.
+CHAINS = [("left_leg", 6), ("right_leg", 6), ("waist", 3), ("left_arm", 7), ("right_arm", 7)]
+
+
+def make_robot_xml(out_dir: Path, num_dof: int = 29, mesh_subdivisions: int = 2) -> Path:
+    """Write an MJCF humanoid-like tree with num_dof hinges and one mesh per body."""
+    import trimesh
+
+    out_dir = Path(out_dir)
+    (out_dir / "meshes").mkdir(parents=True, exist_ok=True)
+    trimesh.creation.icosphere(subdivisions=mesh_subdivisions, radius=0.04).export(out_dir / "meshes" / "link.stl")
+
+    total = sum(n for _, n in CHAINS)
+    counts = [max(1, round(n * num_dof / total)) for _, n in CHAINS]
+    counts[-1] += num_dof - sum(counts)
+
+    axes = ["1 0 0", "0 1 0", "0 0 1"]
+    lines = []
+    for (chain, _), n in zip(CHAINS, counts):
+        close = []
+        for j in range(n):
+            indent = "  " * (j + 3)
+            lines.append(f'{indent}<body name="{chain}_{j}" pos="0 0.02 -0.08" quat="0.998 0.05 0 0">')
+            lines.append(f'{indent}  <joint name="{chain}_{j}_joint" axis="{axes[j % 3]}" range="-1.5 1.5"/>')
+            lines.append(f'{indent}  <geom type="mesh" mesh="link" rgba="0.6 0.6 0.7 1"/>')
+            close.append(f"{indent}</body>")
+        lines += close[::-1]
+
+    xml = "\n".join([
+        '<mujoco model="bench_robot">',
+        '  <compiler angle="radian" meshdir="meshes"/>',
+        '  <asset><mesh name="link" file="link.stl"/></asset>',
+        "  <worldbody>",
+        '    <body name="pelvis" pos="0 0 0.8">',
+        "      <freejoint/>",
+        '      <geom type="mesh" mesh="link"/>',
+        *lines,
+        "    </body>",
+        "  </worldbody>",
+        "</mujoco>",
+    ])
+    path = out_dir / f"bench_robot_{num_dof}dof.xml"
+    path.write_text(xml)
+    return path
+
+
+def make_robot_motion(frames: int, num_dof: int, clips: int = 1, seed: int = 0):
+    """Smooth random (clips, frames, ...) root_pos, root_rot (xyzw) and dof_pos."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, frames)
+    phase = rng.uniform(0, 2 * np.pi, size=(clips, 1, num_dof))
+    dof = 0.8 * np.sin(t[None, :, None] + phase)
+    root_pos = np.stack(np.broadcast_arrays(0.5 * t, 0 * t, 0.8 + 0.02 * np.sin(4 * t)), -1)
+    root_pos = np.broadcast_to(root_pos, (clips, frames, 3)).copy()
+    yaw = 0.5 * t
+    root_rot = np.stack([0 * yaw, 0 * yaw, np.sin(yaw / 2), np.cos(yaw / 2)], -1)
+    root_rot = np.broadcast_to(root_rot, (clips, frames, 4)).copy()
+    return root_pos, root_rot, dof
+
+
+def make_hym_npz(path: Path, frames: int, seed: int = 0) -> Path:
+    """A HY-Motion style output clip, as consumed by convert_to_smplx."""
+    rng = np.random.default_rng(seed)
+    np.savez(
+        path,
+        poses=rng.normal(scale=0.1, size=(frames, 156)).astype(np.float32),
+        trans=np.cumsum(rng.normal(scale=0.01, size=(frames, 3)), axis=0).astype(np.float32),
+        betas=np.zeros((1, 10), dtype=np.float32),
+        gender=np.array(["neutral"]),
+    )
+    return Path(path)
+
+
+class _Handle:
+    """Accepts any attribute assignment, like a viser scene handle."""
+
+
+class _Scene:
+    def add_frame(self, *args, **kwargs):
+        return _Handle()
+
+    def add_mesh_simple(self, *args, **kwargs):
+        return _Handle()
+
+    def add_mesh_trimesh(self, *args, **kwargs):
+        return _Handle()
+
+
+class StubServer:
+    """Drop-in for viser.ViserServer that discards scene updates."""
+
+    def __init__(self):
+        self.scene = _Scene()
+
+    def atomic(self):
+        return nullcontext()
+
+
+def make_stub_body_model(num_verts: int = 10475, num_joints: int = 55):
+    """A torch module with the smplx call signature: linear blend of random joint transforms.
+
+    Cost scales with vertex count like real LBS, which is what get_frame pays for.
+    """
+    import torch
+    from types import SimpleNamespace
+
+    class StubBodyModel(torch.nn.Module):
+        num_expression_coeffs = 10
+        num_betas = 10
+
+        def __init__(self):
+            super().__init__()
+            g = torch.Generator().manual_seed(0)
+            self.register_buffer("v_template", torch.randn(num_verts, 3, generator=g) * 0.3)
+            w = torch.rand(num_verts, num_joints, generator=g)
+            self.register_buffer("weights", w / w.sum(-1, keepdim=True))
+            self.faces = np.random.default_rng(0).integers(0, num_verts, size=(2 * num_verts, 3))
+            self.gender = "neutral"
+
+        def get_num_verts(self):
+            return num_verts
+
+        def forward(self, betas=None, global_orient=None, body_pose=None, transl=None, **kwargs):
+            B = body_pose.shape[0]
+            pose = torch.cat([global_orient, body_pose], -1)
+            # (B, J, 3) per-joint offsets standing in for rigid transforms
+            offs = pose.repeat(1, num_joints * 3 // pose.shape[1] + 1)[:, :num_joints * 3].view(B, num_joints, 3)
+            verts = self.v_template[None] + torch.einsum("vj,bjk->bvk", self.weights, offs) * 0.01
+            if transl is not None:
+                verts = verts + transl[:, None]
+            return SimpleNamespace(vertices=verts, joints=verts[:, :num_joints])
+
+    return StubBodyModel()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the hot paths on synthetic data.
+
+    python benchmarks/run.py                              # run and print
+    python benchmarks/run.py --save benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.2
+
+--compare exits with status 1 when any component is slower than the
+baseline by more than --threshold (a fraction).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fixtures import (
+    StubServer,
+    make_hym_npz,
+    make_robot_motion,
+    make_robot_xml,
+    make_stub_body_model,
+)
+
+
+def bench_fk(args, tmp):
+    from g2h.kinematics import KinematicsModelLite
+
+    kin = KinematicsModelLite(make_robot_xml(tmp, args.dof))
+    root_pos, root_rot, dof = make_robot_motion(args.frames, kin.num_dof, clips=args.clips)
+    return lambda: kin.forward(root_pos, root_rot, dof), args.clips * args.frames, "frames"
+
+
+def bench_convert(args, tmp):
+    from g2h.convert_smpl import convert_to_smplx
+
+    src = make_hym_npz(tmp / "hym.npz", args.frames)
+
+    return lambda: convert_to_smplx(src, tmp / "cvt.npz", verbose=False), args.frames, "frames"
+
+
+def bench_convert_in_memory(args, tmp):
+    from g2h.convert_smpl import hym_to_smplx_batch, load_hym_npz
+
+    clip = load_hym_npz(make_hym_npz(tmp / "hym.npz", args.frames))
+    clips = [clip] * args.clips
+    return lambda: hym_to_smplx_batch(clips), args.clips * args.frames, "frames"
+
+
+def bench_geoms(args, tmp):
+    from g2h.geometry import load_robot_visual_geoms
+
+    xml = make_robot_xml(tmp, args.dof, mesh_subdivisions=3)
+    return lambda: load_robot_visual_geoms(xml), 1, "loads"
+
+
+def bench_geoms_cached(args, tmp):
+    from g2h.geometry import load_visual_geoms_cached
+
+    xml = make_robot_xml(tmp, args.dof, mesh_subdivisions=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_visual_geoms_cached(xml, tmp / "geoms")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_visual_geoms_cached(xml, tmp / "geoms")
+
+    return run, 1, "loads"
+
+
+def _smplx_player(args, tmp, precompute):
+    from g2h.convert_smpl import convert_to_smplx
+    from g2h.visualise.smplx_viser import SMPLXViserPlayer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_to_smplx(make_hym_npz(tmp / "hym.npz", args.frames), tmp / "smplx.npz")
+        player = SMPLXViserPlayer(tmp / "smplx", server=StubServer(), model=make_stub_body_model())
+        player.load_anim(tmp / "smplx.npz", precompute=precompute)
+    return player
+
+
+def bench_smplx_frame(args, tmp):
+    player = _smplx_player(args, tmp, precompute=False)
+    n = min(args.frames, 300)
+
+    def run():
+        for i in range(n):
+            player.get_frame(i)
+
+    return run, n, "frames"
+
+
+def bench_smplx_frame_precomputed(args, tmp):
+    player = _smplx_player(args, tmp, precompute=True)
+
+    def run():
+        for i in range(player.T):
+            player.get_frame(i)
+
+    return run, player.T, "frames"
+
+
+def bench_robot_frame(args, tmp):
+    import pickle
+    from g2h.visualise.robot_viser import MJCFViserPlayer
+
+    xml = make_robot_xml(tmp, args.dof)
+    root_pos, root_rot, dof = make_robot_motion(args.frames, args.dof)
+    motion = {"fps": 30, "root_pos": root_pos[0], "root_rot": root_rot[0], "dof_pos": dof[0]}
+    with open(tmp / "motion.pkl", "wb") as f:
+        pickle.dump(motion, f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        player = MJCFViserPlayer(xml, server=StubServer())
+    player.load_anim(tmp / "motion.pkl")
+
+    def run():
+        for i in range(player.T):
+            player.get_frame(i)
+
+    return run, player.T, "frames"
+
+
+def _robot_clips(args, tmp):
+    import pickle
+
+    root_pos, root_rot, dof = make_robot_motion(args.frames, args.dof, clips=args.clips)
+    paths = []
+    for i in range(args.clips):
+        motion = {"fps": 30, "root_pos": root_pos[i], "root_rot": root_rot[i], "dof_pos": dof[i]}
+        paths.append(tmp / f"clip_{i}.pkl")
+        with open(paths[-1], "wb") as f:
+            pickle.dump(motion, f)
+    return paths
+
+
+def _read_all(motion):
+    # what consumers pay: every array decoded and every byte touched
+    return sum(float(motion[k].sum()) for k in ("root_pos", "root_rot", "dof_pos"))
+
+
+def _robot_g2hm(args, tmp):
+    from g2h.motion_store import load_robot_motion, robot_motion_to_clip, write_store
+
+    paths = []
+    for p in _robot_clips(args, tmp):
+        clip = robot_motion_to_clip(load_robot_motion(p), p.stem, "q16")
+        paths.append(write_store(p.with_suffix(".g2hm"), [clip]))
+    return paths
+
+
+def bench_robot_load_pkl(args, tmp):
+    from g2h.motion_store import load_robot_motion
+
+    paths = _robot_clips(args, tmp)
+    return lambda: [load_robot_motion(p) for p in paths], args.clips * args.frames, "frames"
+
+
+def bench_robot_load_g2hm(args, tmp):
+    from g2h.motion_store import load_robot_motion
+
+    paths = _robot_g2hm(args, tmp)
+    return lambda: [load_robot_motion(p) for p in paths], args.clips * args.frames, "frames"
+
+
+def bench_robot_read_pkl(args, tmp):
+    from g2h.motion_store import load_robot_motion
+
+    paths = _robot_clips(args, tmp)
+    return lambda: [_read_all(load_robot_motion(p)) for p in paths], args.clips * args.frames, "frames"
+
+
+def bench_robot_read_g2hm(args, tmp):
+    from g2h.motion_store import load_robot_motion
+
+    paths = _robot_g2hm(args, tmp)
+    return lambda: [_read_all(load_robot_motion(p)) for p in paths], args.clips * args.frames, "frames"
+
+
+def bench_skin_bulk(args, tmp):
+    from g2h.convert_smpl import convert_to_smplx
+    from g2h.skinning import BulkSkinner
+
+    convert_to_smplx(make_hym_npz(tmp / "hym.npz", args.frames), tmp / "smplx.npz", verbose=False)
+    skinner = BulkSkinner(model=make_stub_body_model())
+    motion = skinner.load(tmp / "smplx.npz")
+    return lambda: skinner.skin(motion), args.frames, "frames"
+
+
+BENCHMARKS = {
+    "fk": bench_fk,
+    "convert": bench_convert,
+    "convert_in_memory": bench_convert_in_memory,
+    "geoms": bench_geoms,
+    "geoms_cached": bench_geoms_cached,
+    "robot_get_frame": bench_robot_frame,
+    "robot_load_pkl": bench_robot_load_pkl,
+    "robot_load_g2hm": bench_robot_load_g2hm,
+    "robot_read_pkl": bench_robot_read_pkl,
+    "robot_read_g2hm": bench_robot_read_g2hm,
+    "smplx_get_frame": bench_smplx_frame,
+    "smplx_get_frame_precomputed": bench_smplx_frame_precomputed,
+    "skin_bulk": bench_skin_bulk,
+}
+
+
+def measure(fn, repeat):
+    fn()  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def run_all(args):
+    results = {}
+    for name in args.only or BENCHMARKS:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                fn, units, unit = BENCHMARKS[name](args, Path(tmp))
+            except ImportError as e:
+                print(f"{name:<30} skipped ({e})")
+                continue
+            seconds, peak_mb = measure(fn, args.repeat)
+        results[name] = {
+            "throughput": units / seconds,
+            "unit": f"{unit}/s",
+            "seconds": seconds,
+            "peak_mb": peak_mb,
+        }
+        print(f"{name:<30}{units / seconds:>14.1f} {unit}/s{peak_mb:>10.1f} MB peak")
+    return results
+
+
+def compare(results, baseline, threshold):
+    slow = []
+    print(f"\n{'component':<30}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        change = cur["throughput"] / base["throughput"] - 1.0
+        flag = ""
+        if change < -threshold:
+            flag = "  SLOWER"
+            slow.append(name)
+        print(f"{name:<30}{base['throughput']:>14.1f}{cur['throughput']:>14.1f}{change * 100:>9.1f}%{flag}")
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gen2Humanoid Benchmarks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--frames", type=int, default=3000, help="frames per synthetic clip.")
+    parser.add_argument("--clips", type=int, default=4, help="clips per FK batch.")
+    parser.add_argument("--dof", type=int, default=29, help="dofs of the synthetic robot.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions, the best is kept.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run a subset of the benchmarks.")
+    parser.add_argument("--save", default=None, help="write results as a baseline json.")
+    parser.add_argument("--compare", default=None, help="baseline json to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed throughput drop before flagging.")
+
+    args = parser.parse_args()
+    results = run_all(args)
+
+    if args.save:
+        meta = {
+            "frames": args.frames, "clips": args.clips, "dof": args.dof,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            slow = compare(results, json.load(f), args.threshold)
+        if slow:
+            print(f"\n[Regression] {', '.join(slow)} slower than baseline by more than {args.threshold * 100:.0f}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
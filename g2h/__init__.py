@@ -1 +1 @@
-from .utils import run_subprocess
+from .utils import run_subprocess, run_subprocesses
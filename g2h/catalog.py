@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import csv
+import sqlite3
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .config import PROMPT_FOLDER, ROBOT_XML_DICT
+from .manifest import Manifest, hash_file
+from .motion_store import SUFFIX, MotionStore, robot_motion_info
+from .prompts import load_prompts
+from .qa import METRICS
+
+# SQLite index of pipeline outputs.
+#
+# One row per clip file (or per clip of a .g2hm shard, as "shard.g2hm#clip"):
+# the stage it came from (kind: t2m / smplx / robot), its name relative to
+# the stage folder, prompt, model, robot, frames, fps, duration, size and a
+# checksum. Retarget QA reports are kept in a qa table keyed by path. Files
+# are only reopened when their size or mtime changed since the last update.
+
+GENERATE_MANIFEST = "generate_manifest.jsonl"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS clips ("
+    " path TEXT PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, root TEXT NOT NULL,"
+    " prompt_id TEXT, prompt TEXT, model TEXT, robot TEXT,"
+    " frames INTEGER, fps REAL, duration REAL,"
+    " size INTEGER, mtime_ns INTEGER, checksum TEXT, indexed REAL)",
+    "CREATE INDEX IF NOT EXISTS clips_kind_robot ON clips (kind, robot, duration)",
+    "CREATE INDEX IF NOT EXISTS clips_name ON clips (name)",
+    "CREATE INDEX IF NOT EXISTS clips_prompt_id ON clips (prompt_id)",
+    "CREATE TABLE IF NOT EXISTS qa (path TEXT PRIMARY KEY, "
+    + ", ".join(f"{m} REAL" for m in METRICS) + ")",
+    "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, mtime_ns INTEGER)",
+)
+
+
+def _npz_shape(path: Path, key: str):
+    """Shape of one array in an npz, read from its npy header without loading the data."""
+    with zipfile.ZipFile(path) as z, z.open(f"{key}.npy") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape
+
+
+def _npz_info(path: Path) -> dict:
+    frames = _npz_shape(path, "poses")[0]
+    fps = None
+    with np.load(path, allow_pickle=True) as data:
+        if "mocap_frame_rate" in data.files:
+            fps = float(np.asarray(data["mocap_frame_rate"]).reshape(-1)[0])
+    return {"frames": int(frames), "fps": fps}
+
+
+def _clip_name(rel: Path, robot_dirs: bool) -> tuple[str, Optional[str]]:
+    """(name shared by all stages, robot from a multi-robot <robot>/ folder)."""
+    parts = rel.with_suffix("").parts
+    if robot_dirs and len(parts) > 1 and parts[0] in ROBOT_XML_DICT:
+        return "/".join(parts[1:]), parts[0]
+    return "/".join(parts), None
+
+
+class Catalog:
+    """Index of generated, converted and retargeted clips with a query API."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        with self.db:
+            for stmt in _SCHEMA:
+                self.db.execute(stmt)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- building -------------------------------------------------------
+
+    def _scan(self, root: Path, kind: str, robot: Optional[str], checksums: bool):
+        """Index new or modified files under root and drop rows of files that are gone."""
+        root = Path(root)
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in self.db.execute("SELECT path, size, mtime_ns FROM clips WHERE root = ?", (str(root),))
+        }
+        # shard rows share their file's stat, so compare by file
+        known_files = {}
+        for p, v in known.items():
+            known_files.setdefault(p.partition("#")[0], (v, []))[1].append(p)
+        pattern = "*.npz" if kind != "robot" else "*.pkl"
+        files = sorted(root.rglob(pattern)) + sorted(root.rglob(f"*{SUFFIX}"))
+        files = [f for f in files if not any(p.startswith(".") for p in f.relative_to(root).parts)]
+
+        seen, rows, errors = set(), [], {}
+        now = time.time()
+        for f in files:
+            st = f.stat()
+            stat, paths = known_files.get(str(f), (None, []))
+            if stat == (st.st_size, st.st_mtime_ns):
+                seen.update(paths)
+                continue
+            try:
+                entries = self._describe(root, f, kind, robot)
+            except Exception as e:
+                errors[f] = f"{type(e).__name__}: {e}"
+                continue
+            checksum = hash_file(f) if checksums else None
+            for path, name, info in entries:
+                seen.add(path)
+                rows.append((path, kind, name, str(root), info.get("robot"), info["frames"], info["fps"],
+                             info["frames"] / info["fps"] if info["fps"] else None,
+                             st.st_size, st.st_mtime_ns, checksum, now))
+
+        gone = [p for p in known if p not in seen]
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO clips (path, kind, name, root, robot, frames, fps, duration, size, mtime_ns, checksum, indexed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET kind = excluded.kind, name = excluded.name, root = excluded.root,"
+                " robot = excluded.robot, frames = excluded.frames, fps = excluded.fps, duration = excluded.duration,"
+                " size = excluded.size, mtime_ns = excluded.mtime_ns, checksum = excluded.checksum, indexed = excluded.indexed",
+                rows,
+            )
+            self.db.executemany("DELETE FROM clips WHERE path = ?", [(p,) for p in gone])
+            self.db.executemany("DELETE FROM qa WHERE path = ?", [(p,) for p in gone])
+        return len(rows), len(gone), errors
+
+    def _describe(self, root: Path, f: Path, kind: str, robot: Optional[str]):
+        """[(path, name, info)] of one file; a .g2hm shard gives one entry per clip."""
+        name, dir_robot = _clip_name(f.relative_to(root), kind == "robot")
+        if f.suffix == SUFFIX:
+            store = MotionStore(f)
+            names = store.names()
+            out = []
+            for clip in names:
+                entry = store.info(clip)
+                attrs = entry["attrs"]
+                info = {
+                    "frames": entry["frames"],
+                    "fps": attrs.get("fps", attrs.get("mocap_frame_rate")),
+                    "robot": attrs.get("robot_type") or dir_robot or robot if kind == "robot" else None,
+                }
+                out.append((str(f) if len(names) == 1 else f"{f}#{clip}", name if len(names) == 1 else clip, info))
+            return out
+        if kind == "robot":
+            info = robot_motion_info(f)
+            info["robot"] = info.get("robot_type") or dir_robot or robot
+            return [(str(f), name, info)]
+        return [(str(f), name, _npz_info(f))]
+
+    def _update_prompts(self, t2m_dir: Path, input_text_dir: Optional[Path] = None):
+        """Attach prompt id / text / model to every stage's row of a generated clip."""
+        by_id = {}
+        if input_text_dir is not None and Path(input_text_dir).exists():
+            by_id = {p["id"]: {"text": p["text"], "model": None} for p in load_prompts(input_text_dir)}
+        manifest = Manifest(Path(t2m_dir) / GENERATE_MANIFEST)
+        names = {}
+        for key, entry in manifest.entries.items():
+            if entry["status"] != "ok" or not key.startswith("prompt:"):
+                continue
+            pid = key[len("prompt:"):]
+            by_id.setdefault(pid, {"text": None, "model": None})
+            by_id[pid]["text"] = entry.get("text") or by_id[pid]["text"]
+            by_id[pid]["model"] = entry.get("model")
+            for f in entry.get("files", []):
+                names[Path(f).stem] = pid
+
+        rows = []
+        for name, in self.db.execute("SELECT DISTINCT name FROM clips"):
+            stem = name.rsplit("/", 1)[-1]
+            # outputs are named <prompt id>_<sample>
+            pid = names.get(stem) or (stem.rsplit("_", 1)[0] if stem.rsplit("_", 1)[0] in by_id else None)
+            if pid is not None:
+                rows.append((pid, by_id[pid]["text"], by_id[pid]["model"], name))
+        with self.db:
+            self.db.executemany("UPDATE clips SET prompt_id = ?, prompt = ?, model = ? WHERE name = ?", rows)
+
+    def _update_qa(self, gmr_dir: Path):
+        """Load qa_<robot>.csv reports that changed since the last update."""
+        loaded = 0
+        for report in sorted(Path(gmr_dir).glob("qa_*.csv")):
+            mtime = report.stat().st_mtime_ns
+            row = self.db.execute("SELECT mtime_ns FROM sources WHERE path = ?", (str(report),)).fetchone()
+            if row is not None and row[0] == mtime:
+                continue
+            with open(report, "r", encoding="utf-8") as f:
+                rows = [(r["clip"], *(float(r[m]) for m in METRICS)) for r in csv.DictReader(f)]
+            with self.db:
+                self.db.executemany(
+                    f"INSERT OR REPLACE INTO qa (path, {', '.join(METRICS)}) VALUES ({', '.join('?' * (len(METRICS) + 1))})",
+                    rows,
+                )
+                self.db.execute("INSERT OR REPLACE INTO sources (path, mtime_ns) VALUES (?, ?)", (str(report), mtime))
+            loaded += len(rows)
+        return loaded
+
+    def update(self, output_dir: Optional[Path] = None, cvt_dir: Optional[Path] = None, gmr_dir: Optional[Path] = None,
+               input_text_dir: Optional[Path] = None, robot: Optional[str] = None, checksums: bool = True):
+        """Bring the index up to date with the pipeline folders that are given.
+
+        output_dir is the text to motion output folder (clips in
+        output_dir/prompts_subset); robot names the robot of a single-robot
+        gmr_dir whose files do not record it.
+        """
+        t0 = time.time()
+        stages = []
+        t2m_dir = Path(output_dir) / PROMPT_FOLDER if output_dir is not None else None
+        if t2m_dir is not None and t2m_dir.is_dir():
+            stages.append((t2m_dir, "t2m"))
+        if cvt_dir is not None and Path(cvt_dir).is_dir():
+            stages.append((Path(cvt_dir), "smplx"))
+        if gmr_dir is not None and Path(gmr_dir).is_dir():
+            stages.append((Path(gmr_dir), "robot"))
+
+        added = removed = 0
+        errors = {}
+        for root, kind in stages:
+            a, r, e = self._scan(root, kind, robot, checksums)
+            added, removed = added + a, removed + r
+            errors.update(e)
+        if t2m_dir is not None:
+            self._update_prompts(t2m_dir, input_text_dir)
+        qa = self._update_qa(gmr_dir) if gmr_dir is not None and Path(gmr_dir).is_dir() else 0
+        print(f"[Catalog] {added} clips indexed, {removed} removed, {qa} qa rows in {time.time() - t0:.2f}s -> {self.path}")
+        for f, error in errors.items():
+            print(f"[Error] catalog {f}: {error}")
+        return errors
+
+    # -- queries --------------------------------------------------------
+
+    def query(self, kind: Optional[str] = None, robot: Optional[str] = None, prompt: Optional[str] = None,
+              model: Optional[str] = None, min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+              where: Optional[str] = None, params=(), order_by: str = "c.name", limit: Optional[int] = None) -> list[dict]:
+        """Clips matching every given filter, with their QA metrics when known.
+
+        prompt matches a case-insensitive substring; where is an extra SQL
+        condition on the clips (c) / qa (q) columns, e.g.
+        "q.foot_slip_p95 < ?" with params=(0.1,).
+        """
+        conds, args = [], []
+        for column, value in (("c.kind", kind), ("c.robot", robot), ("c.model", model)):
+            if value is not None:
+                conds.append(f"{column} = ?")
+                args.append(value)
+        if prompt is not None:
+            conds.append("c.prompt LIKE ? ESCAPE '\\'")
+            args.append("%" + prompt.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if min_duration is not None:
+            conds.append("c.duration >= ?")
+            args.append(min_duration)
+        if max_duration is not None:
+            conds.append("c.duration <= ?")
+            args.append(max_duration)
+        if where:
+            conds.append(f"({where})")
+            args.extend(params)
+
+        sql = "SELECT c.*, " + ", ".join(f"q.{m} AS qa_{m}" for m in METRICS) + " FROM clips c LEFT JOIN qa q ON q.path = c.path"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        cur = self.db.execute(sql, args)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur.fetchall()]
+
+    def counts(self) -> dict:
+        """{(kind, robot): (clips, total seconds)}."""
+        rows = self.db.execute("SELECT kind, robot, COUNT(*), SUM(duration) FROM clips GROUP BY kind, robot")
+        return {(r[0], r[1]): (r[2], r[3] or 0.0) for r in rows}
+
+    def paths(self, **filters) -> list[str]:
+        return [r["path"] for r in self.query(**filters)]
+
+
+def update_catalog(db_path: Path, **folders):
+    with Catalog(db_path) as catalog:
+        return catalog.update(**folders)
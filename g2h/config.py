@@ -14,6 +14,7 @@ THIRD_PARTY_DIR = PROJECT_ROOT / "third_party"
 DATA_DIR = PROJECT_ROOT / "data"
 CONFIGS_DIR = PROJECT_ROOT / "configs"
 PROMPT_FOLDER = "prompts_subset"
+CACHE_DIR = PROJECT_ROOT / ".cache"
 
 # Third-party paths
 HYM_DIR = THIRD_PARTY_DIR / "HY-Motion-1.0"
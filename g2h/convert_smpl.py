@@ -1,42 +1,77 @@
 import numpy as np
 
-def convert_to_smplx(hym_npz_path, output_path, frame_rate=30.0):
-    
-    data = np.load(hym_npz_path, allow_pickle=True)
-    
-    T = data['poses'].shape[0]
-    hymotion_poses = data['poses']
-    
-    amass_poses = np.zeros((T, 165))
-    
-    amass_poses[:, :3] = hymotion_poses[:, :3]
-    # amass_poses[:, :3] = data['Rh'] 
-    
-    amass_poses[:, 3:66] = hymotion_poses[:, 3:66]
-    
-    amass_poses[:, 66:156] = hymotion_poses[:, 66:156]
-    
-    # amass_poses[:, 156:165] = 0 
-    
-    amass_data = {}
-    
-    amass_data['poses'] = amass_poses.astype(np.float64)
-    amass_data['trans'] = data['trans'].astype(np.float64)  
-    amass_data['betas'] = data['betas'].squeeze().astype(np.float64) 
-    
-    amass_data['root_orient'] = amass_poses[:, :3].astype(np.float64) 
-
-    amass_data['pose_body'] = amass_poses[:, 3:66].astype(np.float64)  
-    amass_data['pose_hand'] = amass_poses[:, 66:156].astype(np.float64) 
-    amass_data['pose_jaw'] = np.zeros((T, 3), dtype=np.float64) 
-    amass_data['pose_eye'] = np.zeros((T, 6), dtype=np.float64)  
-    
-    amass_data['gender'] = data['gender'].item() if data['gender'].shape == (1,) else data['gender']
-    amass_data['mocap_frame_rate'] = np.array([frame_rate], dtype=np.float64)
-    amass_data['mocap_time_length'] = np.array([T / frame_rate], dtype=np.float64)
-    amass_data['mocap_time_length'] = len(amass_data['betas'])
+# bump when the output of convert_to_smplx changes, so incremental runs redo converted clips
+CONVERTER_VERSION = 1
+
+HYM_KEYS = ("poses", "trans", "betas", "gender")
+
+
+def load_hym_npz(hym_npz_path) -> dict:
+    """Read the arrays hym_to_smplx needs from a HY-Motion output file."""
+    with np.load(hym_npz_path, allow_pickle=True) as data:
+        return {k: data[k] for k in HYM_KEYS}
+
+
+def _gender(gender):
+    gender = np.asarray(gender)
+    return gender.item() if gender.shape == (1,) else gender
+
+
+def _fill(poses_out, data, frame_rate, dtype):
+    """AMASS style dict around a filled (T, 165) poses buffer; every pose field is a view of it."""
+    T = poses_out.shape[0]
+    # root, body and hands are copied as is; 156:165 stay zero
+    poses_out[:, :156] = data["poses"][:, :156]
+    poses_out[:, 156:] = 0
+
+    betas = np.asarray(data["betas"], dtype=dtype).squeeze()
+    return {
+        "poses": poses_out,
+        "trans": np.asarray(data["trans"], dtype=dtype),
+        "betas": betas,
+        "root_orient": poses_out[:, :3],
+        "pose_body": poses_out[:, 3:66],
+        "pose_hand": poses_out[:, 66:156],
+        "pose_jaw": poses_out[:, 156:159],
+        "pose_eye": poses_out[:, 159:165],
+        "gender": _gender(data["gender"]),
+        "mocap_frame_rate": np.array([frame_rate], dtype=dtype),
+        # kept as written by the original converter (the betas count, not the clip length)
+        "mocap_time_length": len(betas),
+    }
+
+
+def hym_to_smplx(data, frame_rate=30.0, dtype=np.float64) -> dict:
+    """Convert one HY-Motion clip (a dict or npz with poses/trans/betas/gender) in memory.
+
+    Allocates only the (T, 165) poses buffer; the per-part pose fields are
+    views into it, and trans / betas are not copied when already `dtype`.
+    """
+    poses_out = np.empty((data["poses"].shape[0], 165), dtype=dtype)
+    return _fill(poses_out, data, frame_rate, dtype)
+
+
+def hym_to_smplx_batch(clips, frame_rate=30.0, dtype=np.float64) -> list[dict]:
+    """Convert several clips with one poses allocation shared by all of them."""
+    lengths = [c["poses"].shape[0] for c in clips]
+    buf = np.empty((sum(lengths), 165), dtype=dtype)
+    out, start = [], 0
+    for c, T in zip(clips, lengths):
+        out.append(_fill(buf[start:start + T], c, frame_rate, dtype))
+        start += T
+    return out
+
+
+def save_smplx(output_path, amass_data: dict):
     np.savez(output_path, **amass_data)
-    print(f"转换完成！已保存到: {output_path}")
-    print(f"数据形状: poses={amass_poses.shape}, trans={amass_data['trans'].shape}")
-    
-    return amass_data
\ No newline at end of file
+
+
+def convert_to_smplx(hym_npz_path, output_path, frame_rate=30.0, dtype=np.float64, verbose=True):
+    """File to file wrapper around hym_to_smplx."""
+    amass_data = hym_to_smplx(load_hym_npz(hym_npz_path), frame_rate, dtype)
+    save_smplx(output_path, amass_data)
+    if verbose:
+        print(f"转换完成！已保存到: {output_path}")
+        print(f"数据形状: poses={amass_data['poses'].shape}, trans={amass_data['trans'].shape}")
+
+    return amass_data
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import trimesh
+import xml.etree.ElementTree as ET
+from scipy.spatial.transform import Rotation as R
+
+from .kinematics import parse_floats, quat_wxyz_to_xyzw
+
+CACHE_VERSION = 1
+
+
+def load_mesh_assets(xml_path: Path):
+    """Parse the MJCF and return (root element, {mesh name: (file, scale)})."""
+    xml_path = Path(xml_path)
+    tree = ET.parse(str(xml_path))
+    root = tree.getroot()
+
+    compiler = root.find("compiler")
+    meshdir = compiler.attrib.get("meshdir", "") if compiler is not None else ""
+    mesh_base = (xml_path.parent / meshdir).resolve()
+
+    asset_mesh = {}
+    asset = root.find("asset")
+    for m in asset.findall("mesh"):
+        name = m.attrib["name"]
+        file = m.attrib["file"]
+        scale = parse_floats(m.attrib.get("scale"), 3, (1,1,1))
+        asset_mesh[name] = (mesh_base / file, scale)
+    return root, asset_mesh
+
+
+def load_robot_visual_geoms(xml_path: Path):
+    root, asset_mesh = load_mesh_assets(xml_path)
+
+    body_geoms = {}
+
+    def visit(body):
+        name = body.attrib.get("name", "")
+        geoms = []
+
+        for g in body.findall("geom"):
+            if g.attrib.get("type") != "mesh":
+                continue
+
+            mesh_name = g.attrib["mesh"]
+            path, scale = asset_mesh[mesh_name]
+            mesh = trimesh.load(path, force="mesh")
+            mesh.vertices *= scale
+            mesh.fix_normals()
+
+            pos = parse_floats(g.attrib.get("pos"), 3, (0,0,0))
+            quat = quat_wxyz_to_xyzw(
+                parse_floats(g.attrib.get("quat"), 4, (1,0,0,0))
+            )
+
+            T = np.eye(4)
+            T[:3,:3] = R.from_quat(quat).as_matrix()
+            T[:3, 3] = pos
+            mesh.apply_transform(T)
+
+            rgba = parse_floats(g.attrib.get("rgba"), 4, (0.7,0.7,0.7,1))
+            color = tuple((rgba[:3] * 255).astype(int))
+            mesh.visual = trimesh.visual.ColorVisuals(mesh, face_colors=[*color,255])
+
+            geoms.append(mesh)
+
+        if geoms:
+            body_geoms[name] = geoms
+
+        for c in body.findall("body"):
+            visit(c)
+
+    worldbody = root.find("worldbody")
+    visit(worldbody.find("body"))
+    return body_geoms
+
+
+def merge_body_geoms(geoms, target_faces: Optional[int] = None, errors: Optional[list] = None):
+    """Merge a body's meshes into (vertices float32, faces int32, face colors uint8 rgba).
+
+    A decimation failure (e.g. its optional backend is missing) is appended
+    to errors, and no further decimation is tried while errors is non-empty.
+    """
+    errors = [] if errors is None else errors
+    verts, faces, colors = [], [], []
+    offset = 0
+    for m in geoms:
+        if target_faces is not None and not errors:
+            # budget split by each mesh's share of the body's faces
+            share = int(target_faces * len(m.faces) / sum(len(g.faces) for g in geoms))
+            if 4 <= share < len(m.faces):
+                try:
+                    m = m.simplify_quadric_decimation(face_count=share)
+                except Exception as e:
+                    errors.append(e)
+        verts.append(np.asarray(m.vertices, dtype=np.float32))
+        faces.append(np.asarray(m.faces, dtype=np.int32) + offset)
+        colors.append(np.asarray(m.visual.face_colors, dtype=np.uint8).reshape(-1, 4)[:len(m.faces)])
+        offset += len(m.vertices)
+    return np.concatenate(verts), np.concatenate(faces), np.concatenate(colors)
+
+
+def geom_cache_key(xml_path: Path, target_faces: Optional[int] = None) -> str:
+    """Hash of the MJCF, the content and scale of every mesh it references, and the settings."""
+    xml_path = Path(xml_path)
+    _, asset_mesh = load_mesh_assets(xml_path)
+    h = hashlib.sha1()
+    h.update(f"v{CACHE_VERSION}|{xml_path.resolve()}|{target_faces}".encode())
+    h.update(xml_path.read_bytes())
+    for name in sorted(asset_mesh):
+        path, scale = asset_mesh[name]
+        h.update(name.encode())
+        h.update(np.asarray(scale, dtype=np.float32).tobytes())
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def load_visual_geoms_cached(xml_path: Path, cache_dir: Optional[Path] = None, target_faces: Optional[int] = None):
+    """Like load_robot_visual_geoms, but one merged mesh per body, served from cache_dir.
+
+    Returns {body name: [trimesh.Trimesh]}. The first call per robot builds
+    a <key>.npz of raw vertex, face and color arrays; later calls only read it.
+    target_faces optionally decimates each body to about that many faces.
+    """
+    t0 = time.time()
+    path = None
+    if cache_dir is not None:
+        path = Path(cache_dir) / f"{geom_cache_key(xml_path, target_faces)}.npz"
+
+    if path is not None and path.exists():
+        data = np.load(path)
+        names = [str(n) for n in data["names"]]
+        merged = {n: (data[f"{i}_v"], data[f"{i}_f"], data[f"{i}_c"]) for i, n in enumerate(names)}
+        source = "cache"
+    else:
+        geoms = load_robot_visual_geoms(Path(xml_path))
+        errors = []
+        merged = {n: merge_body_geoms(g, target_faces, errors) for n, g in geoms.items()}
+        if errors:
+            # not cached: the key promises target_faces, and a later run may be able to decimate
+            print(f"[Geom] decimation skipped: {errors[0]}")
+        elif path is not None:
+            arrays = {"names": np.array(list(merged))}
+            for i, (v, f, c) in enumerate(merged.values()):
+                arrays.update({f"{i}_v": v, f"{i}_f": f, f"{i}_c": c})
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.stem + ".tmp.npz")
+            np.savez(tmp, **arrays)
+            tmp.replace(path)
+        source = "parsed"
+
+    body_geoms = {
+        n: [trimesh.Trimesh(vertices=v, faces=f, face_colors=c, process=False)]
+        for n, (v, f, c) in merged.items()
+    }
+    num_faces = sum(len(f) for _, f, _ in merged.values())
+    print(f"[Geom] {source} {len(body_geoms)} bodies, {num_faces} faces in {(time.time() - t0) * 1000:.0f}ms")
+    return body_geoms
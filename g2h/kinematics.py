@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# Quaternions are stored xyzw (scipy convention) unless noted otherwise.
+
+def quat_wxyz_to_xyzw(q):
+    return np.array([q[1], q[2], q[3], q[0]], dtype=np.float32)
+
+def parse_floats(s, n, default):
+    if s is None:
+        return np.asarray(default, dtype=np.float32)
+    arr = np.fromstring(s, sep=" ", dtype=np.float32)
+    assert arr.size == n
+    return arr
+
+def quat_normalize(q):
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def quat_mul(a, b):
+    """Hamilton product a * b, broadcasting over leading dims."""
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+def quat_apply(q, v):
+    """Rotate vectors v by unit quaternions q, broadcasting over leading dims."""
+    qv = q[..., :3]
+    t = 2.0 * np.cross(qv, v)
+    return v + q[..., 3:] * t + np.cross(qv, t)
+
+def quat_from_axis_angle(axis, angle):
+    """axis: (..., 3) unit vectors, angle: (...) radians."""
+    half = 0.5 * angle
+    return np.concatenate([axis * np.sin(half)[..., None], np.cos(half)[..., None]], axis=-1)
+
+
+class KinematicsModelLite:
+    def __init__(self, xml_path):
+        self.body_names = []
+        self.parents = []
+        self.local_pos = []
+        self.local_quat = []
+        self.joint_axes = []
+        self.joint_dofs = []
+        self.joint_ranges = []
+
+        self._parse(xml_path)
+        self.num_dof = sum(self.joint_dofs)
+        self._build_tree()
+
+    def _parse(self, xml_path):
+        tree = ET.parse(str(xml_path))
+        root = tree.getroot()
+        world = root.find("worldbody")
+        body0 = world.find("body")
+
+        # MJCF ranges are in degrees unless the compiler says otherwise
+        compiler = root.find("compiler")
+        angle = compiler.attrib.get("angle", "degree") if compiler is not None else "degree"
+        range_scale = np.pi / 180.0 if angle == "degree" else 1.0
+
+        def dfs(body, parent):
+            idx = len(self.body_names)
+            self.body_names.append(body.attrib.get("name", f"body_{idx}"))
+            self.parents.append(parent)
+
+            self.local_pos.append(parse_floats(body.attrib.get("pos"), 3, (0,0,0)))
+            self.local_quat.append(
+                quat_wxyz_to_xyzw(
+                    parse_floats(body.attrib.get("quat"), 4, (1,0,0,0))
+                )
+            )
+
+            joints = body.findall("joint")
+            if len(joints) == 1:
+                axis = parse_floats(joints[0].attrib.get("axis"), 3, (0,0,1))
+                self.joint_axes.append(axis)
+                self.joint_dofs.append(1)
+                rng = joints[0].attrib.get("range")
+                if rng is not None and joints[0].attrib.get("limited", "auto") != "false":
+                    self.joint_ranges.append(parse_floats(rng, 2, None) * range_scale)
+                else:
+                    self.joint_ranges.append(None)
+            else:
+                self.joint_axes.append(None)
+                self.joint_dofs.append(0)
+                self.joint_ranges.append(None)
+
+            for c in body.findall("body"):
+                dfs(c, idx)
+
+        dfs(body0, -1)
+
+    def _build_tree(self):
+        """Precompute array views of the tree used by forward()."""
+        B = len(self.body_names)
+        self.parent_idx = np.asarray(self.parents, dtype=np.int64)
+        self.offsets = np.asarray(self.local_pos, dtype=np.float64).reshape(B, 3)
+        self.offset_quats = quat_normalize(np.asarray(self.local_quat, dtype=np.float64).reshape(B, 4))
+
+        # Bodies with a hinge, their dof column and unit axis. The root body is
+        # driven by root_pos/root_rot, so its dof (if any) is never consumed.
+        joint_body = [i for i in range(1, B) if self.joint_dofs[i] == 1]
+        self.joint_body_idx = np.asarray(joint_body, dtype=np.int64)
+        self.joint_dof_idx = np.arange(len(joint_body), dtype=np.int64)
+        axes = np.asarray([self.joint_axes[i] for i in joint_body], dtype=np.float64).reshape(-1, 3)
+        # from_rotvec(axis * angle) rotates by |axis| * angle about the unit axis.
+        self.axis_scale = np.linalg.norm(axes, axis=-1)
+        self.joint_axis = axes / np.where(self.axis_scale > 0, self.axis_scale, 1.0)[:, None]
+
+        # per-dof limits in radians, +-inf where the joint has no range
+        self.dof_lower = np.full(len(joint_body), -np.inf)
+        self.dof_upper = np.full(len(joint_body), np.inf)
+        for k, i in enumerate(joint_body):
+            if self.joint_ranges[i] is not None:
+                self.dof_lower[k], self.dof_upper[k] = self.joint_ranges[i]
+        self.dof_names = [self.body_names[i] for i in joint_body]
+
+        depth = np.zeros(B, dtype=np.int64)
+        for i in range(1, B):
+            depth[i] = depth[self.parents[i]] + 1
+        self.depth = depth
+        self.levels = [np.flatnonzero(depth == d) for d in range(1, int(depth.max(initial=0)) + 1)]
+
+    def forward(self, root_pos, root_rot, dof):
+        """Batched FK.
+
+        root_pos: (..., 3), root_rot: (..., 4) xyzw, dof: (..., num_dof).
+        Leading dims are arbitrary, e.g. (frames,) or (clips, frames).
+        Returns pos (..., B, 3) and rot (..., B, 4) in world frame.
+        """
+        root_pos = np.asarray(root_pos, dtype=np.float64)
+        root_rot = np.asarray(root_rot, dtype=np.float64)
+        dof = np.asarray(dof, dtype=np.float64)
+        lead = root_pos.shape[:-1]
+        B = len(self.body_names)
+
+        # Local rotation of every body: offset quat composed with its joint rotation.
+        local_rot = np.broadcast_to(self.offset_quats, lead + (B, 4)).copy()
+        if len(self.joint_body_idx):
+            ang = dof[..., self.joint_dof_idx] * self.axis_scale
+            dq = quat_from_axis_angle(self.joint_axis, ang)
+            local_rot[..., self.joint_body_idx, :] = quat_mul(
+                self.offset_quats[self.joint_body_idx], dq
+            )
+
+        pos = np.zeros(lead + (B, 3))
+        rot = np.zeros(lead + (B, 4))
+        pos[..., 0, :] = root_pos
+        rot[..., 0, :] = root_rot
+
+        # Propagate with the normalized root so children match scipy's from_quat.
+        world_rot = rot.copy()
+        world_rot[..., 0, :] = quat_normalize(root_rot)
+
+        for idx in self.levels:
+            par = self.parent_idx[idx]
+            prot = world_rot[..., par, :]
+            world_rot[..., idx, :] = quat_mul(prot, local_rot[..., idx, :])
+            pos[..., idx, :] = pos[..., par, :] + quat_apply(prot, self.offsets[idx])
+
+        rot[..., 1:, :] = world_rot[..., 1:, :]
+        return pos, rot
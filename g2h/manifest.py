@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+
+def fingerprint(**parts) -> str:
+    """Stable hash of the parameters an output was built from."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _cached_digest(path: str, size: int, mtime_ns: int) -> str:
+    return hash_file(path)
+
+
+def file_digest(path: Path) -> str:
+    """hash_file for small files read again and again (robot XMLs); a rewritten file is hashed again."""
+    st = os.stat(path)
+    return _cached_digest(str(path), st.st_size, st.st_mtime_ns)
+
+
+class Manifest:
+    """Append-only record of finished stage outputs.
+
+    Each line is a JSON entry keyed by input path; the last entry for a key
+    wins. An input counts as done when its size and mtime still match the
+    recorded ones, the recorded output exists and, when given, the
+    fingerprint of the build parameters is unchanged, so re-runs only redo
+    new, modified, reconfigured or previously failed inputs.
+
+    Keys that are not files (e.g. "prompt:<id>") skip the size/mtime check.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a crash can leave a truncated last line
+                        continue
+                    self.entries[entry["input"]] = entry
+
+    @staticmethod
+    def stat_key(path: Path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def is_done(self, input_path: Path, fingerprint: str = None) -> bool:
+        entry = self.entries.get(str(input_path))
+        if entry is None or entry["status"] != "ok":
+            return False
+        if fingerprint is not None and entry.get("fingerprint") != fingerprint:
+            return False
+        if entry["size"] is not None:
+            if not os.path.exists(input_path):
+                return False
+            size, mtime = self.stat_key(input_path)
+            if entry["size"] != size or entry["mtime"] != mtime:
+                return False
+        return Path(entry["output"]).exists()
+
+    def _append(self, entry: dict):
+        self.entries[entry["input"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def mark_done(self, input_path: Path, output_path: Path, **extra):
+        size, mtime = self.stat_key(input_path) if os.path.isfile(input_path) else (None, None)
+        self._append({
+            "input": str(input_path),
+            "output": str(output_path),
+            "size": size,
+            "mtime": mtime,
+            "status": "ok",
+            "time": time.time(),
+            **extra,
+        })
+
+    def mark_failed(self, input_path: Path, error: str):
+        self._append({
+            "input": str(input_path),
+            "output": None,
+            "size": None,
+            "mtime": None,
+            "status": "failed",
+            "error": error,
+            "time": time.time(),
+        })
+
+    def failed(self):
+        return {k: v for k, v in self.entries.items() if v["status"] == "failed"}
+
+    def merge(self, other: "Manifest", moves):
+        """Take over other's entries for files moved per (old root, new root) in moves; newer entries win."""
+        moves = [(Path(old), Path(new)) for old, new in moves]
+
+        def move(value):
+            if isinstance(value, list):
+                return [move(v) for v in value]
+            if isinstance(value, str):
+                for old, new in moves:
+                    try:
+                        return str(new / Path(value).relative_to(old))
+                    except ValueError:
+                        pass
+            return value
+
+        for entry in other.entries.values():
+            entry = {k: move(v) if k in ("input", "output", "files") else v for k, v in entry.items()}
+            current = self.entries.get(entry["input"])
+            if current is None or current["time"] <= entry["time"]:
+                self.entries[entry["input"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compact()
+
+    def compact(self):
+        """Rewrite the file with only the latest entry per input."""
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Flat, memory-mappable motion container (.g2hm).
+#
+#   magic "G2HM" | uint32 version | uint64 header size | json header | data
+#
+# The json header lists the clips in the file; each clip records its frame
+# count, attributes and, per field, dtype, shape and absolute byte offset.
+# Field data is 64-byte aligned, so np.memmap views can be sliced per frame
+# without reading the rest of the file. A file holds one clip or a shard of
+# many clips.
+
+MAGIC = b"G2HM"
+VERSION = 1
+SUFFIX = ".g2hm"
+_ALIGN = 64
+_PREFIX = struct.Struct("<4sIQ")
+
+# SMPL-X fields that are column slices of "poses" and are not stored again.
+SMPLX_VIEWS = {
+    "root_orient": (0, 3),
+    "pose_body": (3, 66),
+    "pose_hand": (66, 156),
+    "pose_jaw": (156, 159),
+    "pose_eye": (159, 165),
+}
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_store(path: Path, clips: list[dict]):
+    """Write clips to one container.
+
+    Each clip is {"name": str, "fields": {name: array}, "attrs": {...}}.
+    The frame count is taken from the first field unless "frames" is given.
+    """
+    header = {"version": VERSION, "clips": []}
+    arrays = []
+    for clip in clips:
+        fields = {k: np.ascontiguousarray(v) for k, v in clip["fields"].items()}
+        first = next(iter(fields.values()), None)
+        frames = clip.get("frames", first.shape[0] if first is not None and first.ndim else 0)
+        header["clips"].append({
+            "name": clip["name"],
+            "frames": int(frames),
+            "attrs": clip.get("attrs", {}),
+            "fields": {k: {"dtype": v.dtype.str, "shape": list(v.shape)} for k, v in fields.items()},
+        })
+        arrays.append(fields)
+
+    # offsets depend on the header size and vice versa; grow until they agree
+    data_start = 0
+    while True:
+        offset = data_start
+        for entry, fields in zip(header["clips"], arrays):
+            for k, v in fields.items():
+                entry["fields"][k]["offset"] = offset
+                offset = _align(offset + v.nbytes)
+        blob = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        required = _align(_PREFIX.size + len(blob))
+        if required <= data_start:
+            break
+        data_start = required
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(blob)))
+        f.write(blob)
+        for entry, fields in zip(header["clips"], arrays):
+            for k, v in fields.items():
+                f.seek(entry["fields"][k]["offset"])
+                f.write(v.tobytes())
+        f.truncate(max(f.tell(), data_start))
+    tmp.replace(path)
+    return path
+
+
+class MotionClip:
+    """Read-only mapping of field name to a memory-mapped array."""
+
+    def __init__(self, buf: np.memmap, entry: dict):
+        self._buf = buf
+        self.name = entry["name"]
+        self.frames = entry["frames"]
+        self.attrs = entry["attrs"]
+        self._fields = entry["fields"]
+
+    def _field(self, key):
+        spec = self._fields[key]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arr = np.frombuffer(self._buf, dtype=dtype, count=count, offset=spec["offset"])
+        return arr.reshape(spec["shape"])
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._field(key)
+        if key in SMPLX_VIEWS and "poses" in self._fields:
+            a, b = SMPLX_VIEWS[key]
+            return self._field("poses")[:, a:b]
+        if key in self.attrs:
+            return np.asarray(self.attrs[key])
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def keys(self):
+        keys = list(self._fields) + list(self.attrs)
+        if "poses" in self._fields:
+            keys += list(SMPLX_VIEWS)
+        return keys
+
+
+class MotionStore:
+    """Container reader; clips are looked up by name or index."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, size = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a motion store: {self.path}")
+            if version > VERSION:
+                raise ValueError(f"Unsupported motion store version {version}: {self.path}")
+            self.header = json.loads(f.read(size).decode("utf-8"))
+        self._buf = None
+        self._index = {c["name"]: i for i, c in enumerate(self.header["clips"])}
+
+    def __len__(self):
+        return len(self.header["clips"])
+
+    def names(self):
+        return [c["name"] for c in self.header["clips"]]
+
+    def info(self, key):
+        """Header entry of a clip (frames, attrs, fields) without touching its data."""
+        i = self._index[key] if isinstance(key, str) else key
+        return self.header["clips"][i]
+
+    def clip(self, key) -> MotionClip:
+        # mapped on first data access, so header-only use never maps the file
+        if self._buf is None:
+            self._buf = np.memmap(self.path, dtype=np.uint8, mode="r")
+        return MotionClip(self._buf, self.info(key))
+
+    def byte_range(self, key) -> tuple[int, int]:
+        """(start, end) file offsets spanning a clip's data."""
+        specs = self.info(key)["fields"].values()
+        start = min((f["offset"] for f in specs), default=0)
+        end = max((f["offset"] + np.dtype(f["dtype"]).itemsize * int(np.prod(f["shape"], dtype=np.int64))
+                   for f in specs), default=0)
+        return start, end
+
+    def read_clip(self, key) -> MotionClip:
+        """Like clip(), but reads the clip's bytes into memory with one read instead of mapping them."""
+        entry = self.info(key)
+        start, end = self.byte_range(key)
+        buf = np.empty(end - start, dtype=np.uint8)
+        with open(self.path, "rb", buffering=0) as f:
+            f.seek(start)
+            if f.readinto(buf) != len(buf):
+                raise ValueError(f"Truncated motion store: {self.path}")
+        shifted = {**entry, "fields": {k: {**v, "offset": v["offset"] - start} for k, v in entry["fields"].items()}}
+        return MotionClip(buf, shifted)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.clip(i)
+
+
+def split_clip_spec(spec) -> tuple[Path, Optional[str]]:
+    """'dataset.g2hm#clip' -> (Path('dataset.g2hm'), 'clip')."""
+    path, sep, name = str(spec).partition("#")
+    return Path(path), (name if sep else None)
+
+
+def motion_digest(spec) -> str:
+    """SHA1 of a motion's content: the whole file, or only one clip's header entry and bytes in a container."""
+    path, name = split_clip_spec(spec)
+    h = hashlib.sha1()
+    if path.suffix != SUFFIX:
+        start, end, entry = 0, None, None
+    else:
+        store = MotionStore(path)
+        key = name if name is not None else 0
+        start, end = store.byte_range(key)
+        # offsets left out: the same clip written into another container hashes the same
+        entry = store.info(key)
+        entry = {**entry, "fields": {k: {**v, "offset": None} for k, v in entry["fields"].items()}}
+        h.update(json.dumps(entry, sort_keys=True).encode("utf-8"))
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def smplx_npz_to_clip(npz_path: Path, name: Optional[str] = None, dtype=np.float32) -> dict:
+    """Read a converted SMPL-X npz as a container clip, dropping the duplicated pose slices."""
+    data = np.load(npz_path, allow_pickle=True)
+    poses = np.asarray(data["poses"], dtype=dtype)
+    fields = {
+        "poses": poses,
+        "trans": np.asarray(data["trans"], dtype=dtype),
+        "betas": np.asarray(data["betas"], dtype=np.float32).reshape(-1),
+    }
+    attrs = {
+        "gender": str(data["gender"]),
+        "mocap_frame_rate": float(np.asarray(data["mocap_frame_rate"]).reshape(-1)[0]),
+    }
+    return {"name": name or Path(npz_path).stem, "fields": fields, "attrs": attrs}
+
+
+# dof_pos storage encodings of robot clips; "q16" maps each dof's range in
+# the clip linearly onto int16, with per-dof offset / scale fields to decode.
+DOF_ENCODINGS = ("float32", "float16", "q16")
+
+
+def robot_motion_to_clip(motion: dict, name: str, dof_encoding: str = "float32") -> dict:
+    """A retargeted robot motion (GMR pkl layout) as a container clip.
+
+    fps and robot type go into the header, so clips can be listed with
+    MotionStore.info() without reading their data.
+    """
+    dof = np.asarray(motion["dof_pos"], dtype=np.float64)
+    fields = {
+        "root_pos": np.asarray(motion["root_pos"], dtype=np.float32),
+        "root_rot": np.asarray(motion["root_rot"], dtype=np.float32),
+    }
+    if dof_encoding == "q16":
+        lo = dof.min(axis=0) if len(dof) else np.zeros(dof.shape[1])
+        hi = dof.max(axis=0) if len(dof) else np.zeros(dof.shape[1])
+        scale = np.where(hi > lo, (hi - lo) / 65535.0, 1.0)
+        fields["dof_pos"] = np.round((dof - lo) / scale - 32768.0).astype(np.int16)
+        fields["dof_offset"] = lo.astype(np.float64)
+        fields["dof_scale"] = scale.astype(np.float64)
+    elif dof_encoding in DOF_ENCODINGS:
+        fields["dof_pos"] = dof.astype(dof_encoding)
+    else:
+        raise ValueError(f"Unknown dof encoding {dof_encoding}, choose from {DOF_ENCODINGS}")
+    attrs = {
+        "fps": float(motion["fps"]),
+        "robot_type": motion.get("robot_type"),
+        "dof_encoding": dof_encoding,
+    }
+    return {"name": name, "fields": fields, "attrs": attrs, "frames": dof.shape[0]}
+
+
+def decode_dof(clip) -> np.ndarray:
+    """(T, D) float32 dof positions of a robot clip, whatever its encoding.
+
+    float32 dofs come back as a view of the clip's data, without a copy.
+    """
+    dof = clip["dof_pos"]
+    if clip.attrs.get("dof_encoding") == "q16":
+        # (q + 32768) * scale + offset, with the constant part folded into one bias per dof
+        scale = clip["dof_scale"]
+        bias = (clip["dof_offset"] + 32768.0 * scale).astype(np.float32)
+        out = dof.astype(np.float32)
+        out *= scale.astype(np.float32)
+        out += bias
+        return out
+    return dof if dof.dtype == np.float32 else dof.astype(np.float32)
+
+
+class RobotMotion(Mapping):
+    """GMR style robot motion backed by a container clip.
+
+    root_pos and root_rot are views of the clip's buffer, and dof_pos is
+    decoded on first access (float32 dofs are a view as well).
+    """
+
+    _KEYS = ("fps", "robot_type", "num_frames", "root_pos", "root_rot", "dof_pos")
+
+    def __init__(self, clip: MotionClip):
+        self._clip = clip
+        self._dof = None
+
+    def __getitem__(self, key):
+        clip = self._clip
+        if key == "fps":
+            return clip.attrs["fps"]
+        if key == "robot_type":
+            return clip.attrs.get("robot_type")
+        if key == "num_frames":
+            return clip.frames
+        if key in ("root_pos", "root_rot"):
+            return clip[key]
+        if key == "dof_pos":
+            if self._dof is None:
+                self._dof = decode_dof(clip)
+            return self._dof
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+
+def load_robot_motion(spec) -> Mapping:
+    """Read a robot motion as a GMR style dict (fps, robot_type, root_pos, root_rot xyzw, dof_pos).
+
+    Accepts a GMR .pkl, a single clip container, or 'shard.g2hm#clip'.
+    Container clips come back as a RobotMotion of float32 arrays.
+    """
+    path, name = split_clip_spec(spec)
+    if path.suffix != SUFFIX:
+        import pickle
+
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    store, key = _robot_store(path, name)
+    return RobotMotion(store.read_clip(key))
+
+
+def _robot_store(path: Path, name: Optional[str]):
+    store = MotionStore(path)
+    if name is None and len(store) != 1:
+        raise ValueError(f"{path} holds {len(store)} clips, use {path}#<clip>")
+    return store, (0 if name is None else name)
+
+
+def robot_motion_info(spec) -> dict:
+    """fps, frame count and robot type of a robot motion; containers only read the header."""
+    path, name = split_clip_spec(spec)
+    if path.suffix != SUFFIX:
+        motion = load_robot_motion(path)
+        return {"fps": float(motion["fps"]), "frames": len(motion["dof_pos"]), "robot_type": motion.get("robot_type")}
+    store, key = _robot_store(path, name)
+    entry = store.info(key)
+    return {"fps": entry["attrs"]["fps"], "frames": entry["frames"], "robot_type": entry["attrs"].get("robot_type")}
+
+
+def list_motions(folder: Path, pattern: str = "*.pkl") -> list:
+    """Clips under folder: files matching pattern, plus every clip of each container as path#clip."""
+    folder = Path(folder)
+    out = sorted(folder.rglob(pattern))
+    for f in sorted(folder.rglob(f"*{SUFFIX}")):
+        names = MotionStore(f).names()
+        out += [f] if len(names) == 1 else [f"{f}#{n}" for n in names]
+    return out
+
+
+def open_motion(spec):
+    """Open a SMPL-X motion as a mapping of arrays.
+
+    Accepts a converted .npz, a single clip container, or 'shard.g2hm#clip'.
+    """
+    path, name = split_clip_spec(spec)
+    if path.suffix != SUFFIX:
+        return np.load(path, allow_pickle=True)
+    store = MotionStore(path)
+    if name is None:
+        if len(store) != 1:
+            raise ValueError(f"{path} holds {len(store)} clips, use {path}#<clip>")
+        return store.clip(0)
+    return store.clip(name)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+import numpy as np
+
+
+def _maxrss_mb(ru) -> float:
+    if ru is None:
+        return 0.0
+    # ru_maxrss is KB on linux, bytes on macOS
+    scale = 1.0 if sys.platform == "darwin" else 1024.0
+    return ru.ru_maxrss * scale / 1024 ** 2
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    if resource is None:
+        return 0.0
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return _maxrss_mb(resource.getrusage(who))
+
+
+def count_frames(files, key: str = "poses") -> int:
+    """Total frame count of npz motion files (reads only the `key` array)."""
+    total = 0
+    for f in files:
+        try:
+            with np.load(f, allow_pickle=True) as data:
+                total += data[key].shape[0]
+        except Exception:
+            pass
+    return total
+
+
+class Profiler:
+    """Collects per-stage and per-clip timings for one pipeline run.
+
+    A stage records wall time, CPU time of this process and of reaped child
+    processes (pool workers, run_subprocess children), peak RSS and frames/s.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.clips = []
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name: str):
+        rec = {"stage": name, "clips": 0, "frames": 0, "child_peak_rss_mb": 0.0}
+        w0 = time.perf_counter()
+        t0 = os.times()
+        try:
+            yield rec
+        finally:
+            t1 = os.times()
+            wall = time.perf_counter() - w0
+            rec["wall_s"] = wall
+            rec["cpu_s"] = (t1.user - t0.user) + (t1.system - t0.system)
+            rec["child_cpu_s"] = (t1.children_user - t0.children_user) + (t1.children_system - t0.children_system)
+            rec["peak_rss_mb"] = peak_rss_mb()
+            if not rec["child_peak_rss_mb"]:
+                # largest child reaped so far; exact per-call values come from add_subprocess
+                rec["child_peak_rss_mb"] = peak_rss_mb(children=True)
+            rec["fps"] = rec["frames"] / wall if wall > 0 else 0.0
+            self.stages.append(rec)
+
+    def add_subprocess(self, rec: dict, result):
+        """Fold a run_subprocess result (or a list of run_subprocesses results) into a stage record."""
+        if result is None:
+            return
+        for r in result if isinstance(result, list) else [result]:
+            rec["child_peak_rss_mb"] = max(rec["child_peak_rss_mb"], _maxrss_mb(getattr(r, "rusage", None)))
+
+    def add_clip(self, stage: str, clip, wall_s: float, cpu_s: float, frames: int, peak_rss_mb: float = 0.0, error=None):
+        self.clips.append({
+            "stage": stage,
+            "clip": str(clip),
+            "wall_s": wall_s,
+            "cpu_s": cpu_s,
+            "frames": frames,
+            "fps": frames / wall_s if wall_s > 0 else 0.0,
+            "peak_rss_mb": peak_rss_mb,
+            "error": error,
+        })
+
+    def write(self, out_dir: Path, prefix: str = "profile"):
+        """Write <prefix>_<time>.json (stages + clips) and matching stage/clip csv files."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started))
+        base = out_dir / f"{prefix}_{stamp}"
+
+        with open(base.with_suffix(".json"), "w", encoding="utf-8") as f:
+            json.dump({"started": self.started, "stages": self.stages, "clips": self.clips}, f, indent=2)
+        for name, rows in (("stages", self.stages), ("clips", self.clips)):
+            if not rows:
+                continue
+            with open(f"{base}_{name}.csv", "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        return base.with_suffix(".json")
+
+    def summary(self):
+        header = f"{'stage':<12}{'wall s':>10}{'cpu s':>10}{'child cpu s':>13}{'clips':>8}{'frames':>10}{'fps':>10}{'rss MB':>10}{'child MB':>10}"
+        print("\n" + header)
+        print("-" * len(header))
+        for r in self.stages:
+            print(f"{r['stage']:<12}{r['wall_s']:>10.1f}{r['cpu_s']:>10.1f}{r['child_cpu_s']:>13.1f}"
+                  f"{r['clips']:>8}{r['frames']:>10}{r['fps']:>10.1f}{r['peak_rss_mb']:>10.0f}{r['child_peak_rss_mb']:>10.0f}")
+        if self.stages:
+            slowest = max(self.stages, key=lambda r: r["wall_s"])
+            print(f"bottleneck: {slowest['stage']}")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+
+def _entry(key, value):
+    if isinstance(value, str):
+        return {"id": str(key), "text": value}
+    entry = dict(value)
+    text = entry.pop("text", None) or entry.pop("prompt", None) or entry.pop("caption", "")
+    pid = entry.pop("id", None) or entry.pop("name", None) or key
+    return {"id": str(pid), "text": text, **entry}
+
+
+def load_prompts(json_path: Path) -> list[dict]:
+    """Load a prompt json as a list of {"id", "text", ...} dicts.
+
+    Accepts a list of strings, a list of dicts with "text"/"prompt", or a
+    mapping from id to either. Extra keys (e.g. "duration") are kept.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        return [_entry(k, v) for k, v in data.items()]
+    return [_entry(f"{i + 1:08d}", v) for i, v in enumerate(data)]
+
+
+def save_prompts(prompts: list[dict], json_path: Path):
+    """Write prompts back as a list of dicts, readable by load_prompts."""
+    Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(prompts, f, ensure_ascii=False, indent=2)
+
+
+def subset_prompt_file(json_path: Path, ids, out_path: Path):
+    """Write the prompts whose id is in `ids`, in the order of ids, to out_path.
+
+    The subset is an {id: entry} json: entries are copied unchanged from the
+    source, and list layouts gain explicit keys, so every prompt keeps its id
+    when out_path is loaded back. Returns the ids written.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        entries = {_entry(k, v)["id"]: (k, v) for k, v in data.items()}
+    else:
+        entries = {}
+        for i, v in enumerate(data):
+            pid = _entry(f"{i + 1:08d}", v)["id"]
+            entries[pid] = (pid, v)
+
+    subset = {}
+    for pid in ids:
+        if pid in entries:
+            key, value = entries[pid]
+            subset[key] = value
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(subset, f, ensure_ascii=False, indent=2)
+    return [pid for pid in ids if pid in entries]
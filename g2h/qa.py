@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import csv
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .kinematics import KinematicsModelLite
+from .motion_store import load_robot_motion
+
+FOOT_PATTERN = re.compile(r"ankle|foot|toe", re.IGNORECASE)
+
+# column order of the report; the first one is the clip path
+METRICS = (
+    "frames", "fps",
+    "foot_slip_mean", "foot_slip_p95", "foot_slip_max",
+    "min_foot_height",
+    "dof_vel_p50", "dof_vel_p95", "dof_vel_p99",
+    "dof_jerk_p50", "dof_jerk_p95", "dof_jerk_p99",
+    "limit_frames", "limit_dofs", "limit_max",
+)
+
+
+def find_feet(kin: KinematicsModelLite, names=None) -> list[int]:
+    """Body indices treated as feet.
+
+    Without names: the deepest body per side whose name mentions ankle /
+    foot / toe, else the two lowest leaf bodies in the zero pose.
+    """
+    if names:
+        return [kin.body_names.index(n) for n in names]
+
+    feet = []
+    for side in ("left", "right"):
+        cands = [i for i, n in enumerate(kin.body_names)
+                 if FOOT_PATTERN.search(n) and re.match(rf"({side}|{side[0]})[_\W]", n, re.IGNORECASE)]
+        if cands:
+            feet.append(max(cands, key=lambda i: kin.depth[i]))
+    if len(feet) == 2:
+        return feet
+
+    leaves = [i for i in range(len(kin.body_names)) if i not in set(kin.parents)]
+    pos, _ = kin.forward(np.zeros(3), np.array([0.0, 0.0, 0.0, 1.0]), np.zeros(kin.num_dof))
+    return sorted(leaves, key=lambda i: pos[i, 2])[:2]
+
+
+def _percentiles(x: np.ndarray, qs=(50, 95, 99)):
+    if x.size == 0:
+        return [0.0] * len(qs)
+    return [float(v) for v in np.percentile(x, qs)]
+
+
+def clip_metrics(kin: KinematicsModelLite, foot_pos: np.ndarray, dof: np.ndarray, fps: float,
+                 contact_height: float = 0.03) -> dict:
+    """Metrics of one clip from its (T, F, 3) foot positions and (T, D) dofs."""
+    T = dof.shape[0]
+    height = foot_pos[..., 2]
+
+    # a foot is in contact when within contact_height of its lowest point in the clip;
+    # slip is its horizontal speed over frame pairs where it stays in contact
+    contact = height <= height.min(axis=0, keepdims=True) + contact_height
+    planted = contact[1:] & contact[:-1]
+    speed = np.linalg.norm(np.diff(foot_pos[..., :2], axis=0), axis=-1) * fps
+    slip = speed[planted]
+
+    vel = np.abs(np.diff(dof, axis=0)) * fps
+    jerk = np.abs(np.diff(dof, n=3, axis=0)) * fps ** 3
+
+    excess = np.maximum(kin.dof_lower - dof, 0.0) + np.maximum(dof - kin.dof_upper, 0.0)
+    over = excess > 0
+
+    return dict(
+        zip(METRICS, [
+            T, fps,
+            float(slip.mean()) if slip.size else 0.0, *_percentiles(slip, (95, 100)),
+            float(height.min()),
+            *_percentiles(vel),
+            *_percentiles(jerk),
+            int(over.any(axis=1).sum()), int(over.any(axis=0).sum()), float(excess.max(initial=0.0)),
+        ])
+    )
+
+
+def analyse_clips(kin: KinematicsModelLite, motions: list[dict], feet=None, contact_height: float = 0.03) -> list[dict]:
+    """Metrics of several clips with a single FK pass over all their frames."""
+    feet = find_feet(kin) if feet is None else feet
+    root_pos = np.concatenate([m["root_pos"] for m in motions])
+    root_rot = np.concatenate([m["root_rot"] for m in motions])
+    dof = np.concatenate([m["dof_pos"] for m in motions]).astype(np.float64)
+    pos, _ = kin.forward(root_pos, root_rot, dof)
+    foot_pos = pos[:, feet]
+
+    out, start = [], 0
+    for m in motions:
+        end = start + len(m["dof_pos"])
+        out.append(clip_metrics(kin, foot_pos[start:end], dof[start:end], float(m["fps"]), contact_height))
+        start = end
+    return out
+
+
+_KIN = None
+_FEET = None
+
+
+def _init_worker(xml_path, foot_bodies):
+    global _KIN, _FEET
+    _KIN = KinematicsModelLite(xml_path)
+    _FEET = find_feet(_KIN, foot_bodies)
+
+
+def _qa_job(paths, contact_height):
+    """Metrics of a chunk of clips; clips that fail to load are reported on their own."""
+    rows, errors, motions, ok = [], {}, [], []
+    for p in paths:
+        try:
+            motions.append(load_robot_motion(p))
+            ok.append(p)
+        except Exception as e:
+            errors[p] = f"{type(e).__name__}: {e}"
+    if motions:
+        for p, metrics in zip(ok, analyse_clips(_KIN, motions, _FEET, contact_height)):
+            rows.append({"clip": str(p), **metrics})
+    return rows, errors
+
+
+def qa_clips(xml_path: Path, paths, num_workers: int = 1, chunk_size: int = 32,
+             contact_height: float = 0.03, foot_bodies: Optional[list[str]] = None):
+    """Metrics for every clip in paths over a process pool.
+
+    Each job runs FK once over the concatenated frames of chunk_size clips;
+    the model is parsed once per worker.
+    """
+    paths = list(paths)
+    chunk_size = max(1, chunk_size)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    rows, errors = [], {}
+    with ProcessPoolExecutor(max_workers=max(1, num_workers), initializer=_init_worker,
+                             initargs=(xml_path, foot_bodies)) as pool:
+        futures = {pool.submit(_qa_job, c, contact_height): c for c in chunks}
+        for future in as_completed(futures):
+            try:
+                r, e = future.result()
+            except Exception as exc:
+                r, e = [], {p: f"{type(exc).__name__}: {exc}" for p in futures[future]}
+            rows.extend(r)
+            errors.update(e)
+    return rows, errors
+
+
+def write_report(rows: list[dict], out_path: Path, sort_by: str = "foot_slip_p95", descending: bool = True):
+    """CSV with one row per clip, worst first by sort_by."""
+    rows = sorted(rows, key=lambda r: r[sort_by], reverse=descending)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["clip", *METRICS])
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({k: f"{v:.6g}" if isinstance(v, float) else v for k, v in r.items()})
+    return rows
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .geometry import load_visual_geoms_cached
+from .kinematics import KinematicsModelLite, quat_apply
+from .motion_store import load_robot_motion
+
+# Headless CPU rendering of robot / SMPL-X motions to videos and contact sheets.
+#
+# Meshes are flat shaded and rasterized with a vectorized z-buffer: faces are
+# bucketed by screen-space bounding box size and every bucket tests all of its
+# candidate pixels in one broadcast, so no Python loop runs per triangle.
+
+BACKGROUND = np.array([245, 245, 245], dtype=np.uint8)
+GROUND = np.array([200, 200, 205], dtype=np.float32)
+# in camera space: from the upper left, towards the scene
+LIGHT = np.array([-0.3, 0.8, 0.5])
+
+
+def write_png(path: Path, img: np.ndarray):
+    """Minimal RGB PNG writer, so contact sheets need no imaging library."""
+    h, w, _ = img.shape
+    raw = b"".join(b"\x00" + img[y].tobytes() for y in range(h))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def look_rotation(azimuth: float, elevation: float, up_axis: str = "z") -> np.ndarray:
+    """World -> camera rotation (rows: screen right, screen up, towards viewer)."""
+    a, e = np.radians(azimuth), np.radians(elevation)
+    # camera basis in a z-up frame
+    back = np.array([np.cos(e) * np.cos(a), np.cos(e) * np.sin(a), np.sin(e)])
+    right = np.array([-np.sin(a), np.cos(a), 0.0])
+    up = np.cross(back, right)
+    rot = np.stack([right, up, back])
+    if up_axis == "y":
+        # y-up world: map (x, y, z) to the z-up frame (x, -z, y)
+        rot = rot @ np.array([[1, 0, 0], [0, 0, -1], [0, 1, 0]], dtype=np.float64)
+    return rot
+
+
+def rasterize(xy: np.ndarray, z: np.ndarray, faces: np.ndarray, colors: np.ndarray, width: int, height: int):
+    """Z-buffer triangles given pixel coords xy (V, 2), depth z (V,) (larger = nearer) and per-face RGB."""
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = BACKGROUND
+
+    tri = xy[faces]                                   # (F, 3, 2)
+    lo = np.floor(tri.min(1)).astype(np.int64)
+    hi = np.ceil(tri.max(1)).astype(np.int64)
+    visible = (hi[:, 0] >= 0) & (lo[:, 0] < width) & (hi[:, 1] >= 0) & (lo[:, 1] < height)
+    # only scan the on-screen part of each bounding box
+    lo = np.maximum(lo, 0)
+    hi = np.minimum(hi, [width - 1, height - 1])
+    area = (tri[:, 1, 0] - tri[:, 0, 0]) * (tri[:, 2, 1] - tri[:, 0, 1]) - \
+           (tri[:, 2, 0] - tri[:, 0, 0]) * (tri[:, 1, 1] - tri[:, 0, 1])
+    visible &= np.abs(area) > 1e-9
+
+    extent = (hi - lo).max(1)
+    pix_all, depth_all, face_all = [], [], []
+    size = 1
+    done = np.zeros(len(faces), dtype=bool)
+    while not done[visible].all():
+        sel = np.flatnonzero(visible & ~done & (extent <= size))
+        done[sel] = True
+        if len(sel):
+            g = np.arange(size + 1)
+            px = lo[sel, 0, None, None] + g[None, None, :]          # (n, 1, S)
+            py = lo[sel, 1, None, None] + g[None, :, None]          # (n, S, 1)
+            px, py = np.broadcast_arrays(px, py)
+            cx, cy = px + 0.5, py + 0.5
+            t = tri[sel]
+            a = area[sel][:, None, None]
+            w0 = ((t[:, 1, 0, None, None] - cx) * (t[:, 2, 1, None, None] - cy) -
+                  (t[:, 2, 0, None, None] - cx) * (t[:, 1, 1, None, None] - cy)) / a
+            w1 = ((t[:, 2, 0, None, None] - cx) * (t[:, 0, 1, None, None] - cy) -
+                  (t[:, 0, 0, None, None] - cx) * (t[:, 2, 1, None, None] - cy)) / a
+            w2 = 1.0 - w0 - w1
+            inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            n, s1, s2 = np.nonzero(inside)
+            zf = z[faces[sel]]
+            depth = w0[n, s1, s2] * zf[n, 0] + w1[n, s1, s2] * zf[n, 1] + w2[n, s1, s2] * zf[n, 2]
+            pix_all.append(py[n, s1, s2] * width + px[n, s1, s2])
+            depth_all.append(depth)
+            face_all.append(sel[n])
+        size *= 2
+
+    if pix_all:
+        pix = np.concatenate(pix_all)
+        depth = np.concatenate(depth_all)
+        face = np.concatenate(face_all)
+        # nearest fragment per pixel
+        order = np.lexsort((-depth, pix))
+        pix, face = pix[order], face[order]
+        first = np.ones(len(pix), dtype=bool)
+        first[1:] = pix[1:] != pix[:-1]
+        img.reshape(-1, 3)[pix[first]] = colors[face[first]]
+    return img
+
+
+class Camera:
+    """Orthographic camera that follows a target point."""
+
+    def __init__(self, width=320, height=240, azimuth=-60.0, elevation=15.0, view_height=2.2, up_axis="z"):
+        self.width = width
+        self.height = height
+        self.rot = look_rotation(azimuth, elevation, up_axis)
+        self.scale = height / view_height
+        self.up_axis = up_axis
+
+    def project(self, points: np.ndarray, target: np.ndarray):
+        cam = (points - target) @ self.rot.T
+        x = self.width / 2 + cam[:, 0] * self.scale
+        y = self.height / 2 - cam[:, 1] * self.scale
+        return np.stack([x, y], -1), cam[:, 2]
+
+    def shade(self, tris: np.ndarray, base: np.ndarray) -> np.ndarray:
+        n = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+        n /= np.linalg.norm(n, axis=-1, keepdims=True) + 1e-12
+        light = self.rot.T @ (LIGHT / np.linalg.norm(LIGHT))
+        lam = np.abs(n @ light)
+        return np.clip(base * (0.35 + 0.65 * lam[:, None]), 0, 255).astype(np.uint8)
+
+
+def _ground(target: np.ndarray, up_axis: str, half: float = 2.0, cells: int = 8):
+    """Checkered ground quad under the target as (vertices, faces, colors)."""
+    g = np.linspace(-half, half, cells + 1)
+    u, v = np.meshgrid(g, g, indexing="ij")
+    zeros = np.zeros_like(u)
+    if up_axis == "z":
+        pts = np.stack([u + target[0], v + target[1], zeros], -1)
+    else:
+        pts = np.stack([u + target[0], zeros, v + target[2]], -1)
+    verts = pts.reshape(-1, 3)
+    faces, colors = [], []
+    for i in range(cells):
+        for j in range(cells):
+            a = i * (cells + 1) + j
+            b, c, d = a + 1, a + cells + 1, a + cells + 2
+            shade = GROUND * (1.0 if (i + j) % 2 else 0.92)
+            faces += [[a, c, b], [b, c, d]]
+            colors += [shade, shade]
+    return verts, np.asarray(faces), np.asarray(colors)
+
+
+def render_meshes(camera: Camera, meshes, target: np.ndarray, ground: bool = True) -> np.ndarray:
+    """meshes: list of (world vertices (V, 3), faces (F, 3), base RGB (F, 3))."""
+    if ground:
+        meshes = [_ground(target, camera.up_axis)] + list(meshes)
+    xy, z, faces, colors = [], [], [], []
+    offset = 0
+    for verts, f, base in meshes:
+        p, d = camera.project(verts, target)
+        xy.append(p)
+        z.append(d)
+        faces.append(f + offset)
+        colors.append(camera.shade(verts[f], np.asarray(base, dtype=np.float32)))
+        offset += len(verts)
+    return rasterize(np.concatenate(xy), np.concatenate(z), np.concatenate(faces),
+                     np.concatenate(colors), camera.width, camera.height)
+
+
+class RobotRenderer:
+    """Same FK and body geometry as MJCFViserPlayer, drawn without a viser session."""
+
+    def __init__(self, xml_path: Path, geom_cache_dir: Optional[Path] = None, target_faces: Optional[int] = 200):
+        self.kin = KinematicsModelLite(xml_path)
+        geoms = load_visual_geoms_cached(xml_path, geom_cache_dir, target_faces)
+        index = {n: i for i, n in enumerate(self.kin.body_names)}
+        self.bodies = []
+        for name, meshes in geoms.items():
+            if name not in index:
+                continue
+            for m in meshes:
+                colors = np.asarray(m.visual.face_colors, dtype=np.float32)[:, :3]
+                self.bodies.append((index[name], np.asarray(m.vertices, dtype=np.float64),
+                                    np.asarray(m.faces), colors))
+
+    def load_anim(self, motion_pkl: Path):
+        motion = load_robot_motion(motion_pkl)
+        self.fps = float(motion["fps"])
+        self.pos, self.rot = self.kin.forward(motion["root_pos"], motion["root_rot"], motion["dof_pos"])
+        self.T = self.pos.shape[0]
+        # fixed height per clip, halfway up the bodies' extent, so the view does not bob
+        z = self.pos[..., 2]
+        self.height = 0.5 * (float(z.min()) + float(z.max()))
+
+    def frame_meshes(self, frame: int):
+        pos, rot = self.pos[frame], self.rot[frame]
+        return [
+            (pos[b] + quat_apply(rot[b], v), f, c)
+            for b, v, f, c in self.bodies
+        ]
+
+    def target(self, frame: int):
+        t = self.pos[frame, 0].copy()
+        t[2] = self.height
+        return t
+
+
+class SMPLXRenderer:
+    """Draws SMPLXViserPlayer's precomputed vertices; needs torch and smplx."""
+
+    def __init__(self, smplx_model_path: Path, cache_dir: Optional[Path] = None):
+        from .visualise.smplx_viser import SMPLXViserPlayer
+
+        self.player = SMPLXViserPlayer(Path(smplx_model_path), server=_NullServer())
+        self.cache_dir = cache_dir
+        self.faces = np.asarray(self.player.model.faces, dtype=np.int64)
+        self.colors = np.broadcast_to(np.array([180, 200, 255], dtype=np.float32), (len(self.faces), 3))
+
+    def load_anim(self, motion):
+        """motion is a converted .npz, a .g2hm container or 'shard.g2hm#clip'."""
+        self.player.load_anim(motion, precompute=True, cache_dir=self.cache_dir)
+        self.fps = float(self.player.fps)
+        self.T = self.player.T
+
+    def frame_meshes(self, frame: int):
+        return [(np.asarray(self.player.vertices[frame], dtype=np.float64), self.faces, self.colors)]
+
+    def target(self, frame: int):
+        v = np.asarray(self.player.vertices[frame], dtype=np.float64)
+        return 0.5 * (v.min(0) + v.max(0))
+
+
+class _NullHandle:
+    pass
+
+
+class _NullScene:
+    def add_frame(self, *args, **kwargs):
+        return _NullHandle()
+
+    def add_mesh_simple(self, *args, **kwargs):
+        return _NullHandle()
+
+
+class _NullServer:
+    scene = _NullScene()
+
+
+def render_clip(renderer, motion: Path, out_path: Path, camera: Camera, stride: int = 1,
+                sheet_cols: int = 0, sheet_frames: int = 16):
+    """Render one clip to a video (.mp4/.gif, needs imageio) or, with sheet_cols, a PNG contact sheet."""
+    t0 = time.time()
+    renderer.load_anim(motion)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if sheet_cols:
+        idx = np.linspace(0, renderer.T - 1, min(sheet_frames, renderer.T)).astype(int)
+        tiles = [render_meshes(camera, renderer.frame_meshes(i), renderer.target(i)) for i in idx]
+        rows = -(-len(tiles) // sheet_cols)
+        sheet = np.empty((rows * camera.height, sheet_cols * camera.width, 3), dtype=np.uint8)
+        sheet[:] = BACKGROUND
+        for k, tile in enumerate(tiles):
+            r, c = divmod(k, sheet_cols)
+            sheet[r * camera.height:(r + 1) * camera.height, c * camera.width:(c + 1) * camera.width] = tile
+        write_png(out_path, sheet)
+        frames = len(tiles)
+    else:
+        import imageio.v2 as imageio
+
+        frames = 0
+        with imageio.get_writer(out_path, fps=renderer.fps / stride) as writer:
+            for i in range(0, renderer.T, stride):
+                writer.append_data(render_meshes(camera, renderer.frame_meshes(i), renderer.target(i)))
+                frames += 1
+
+    elapsed = time.time() - t0
+    return {"clip": str(motion), "output": str(out_path), "frames": frames, "seconds": elapsed,
+            "speedup": (renderer.T / renderer.fps) / elapsed if elapsed > 0 else 0.0}
+
+
+_RENDERER = None
+
+
+def _init_worker(kind, model_path, cache_dir, target_faces):
+    global _RENDERER
+    if kind == "robot":
+        _RENDERER = RobotRenderer(model_path, cache_dir, target_faces)
+    else:
+        _RENDERER = SMPLXRenderer(model_path, cache_dir)
+
+
+def _render_job(motion, out_path, camera, stride, sheet_cols, sheet_frames):
+    try:
+        return render_clip(_RENDERER, motion, out_path, camera, stride, sheet_cols, sheet_frames), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def render_batch(kind: str, model_path: Path, jobs, camera: Camera, num_workers: int = 1, stride: int = 1,
+                 sheet_cols: int = 0, sheet_frames: int = 16, cache_dir: Optional[Path] = None,
+                 target_faces: Optional[int] = 200):
+    """Render (motion, output) pairs over a process pool; geometry / body model load once per worker."""
+    results, errors = [], {}
+    with ProcessPoolExecutor(max_workers=max(1, num_workers), initializer=_init_worker,
+                             initargs=(kind, model_path, cache_dir, target_faces)) as pool:
+        futures = {
+            pool.submit(_render_job, m, o, camera, stride, sheet_cols, sheet_frames): m
+            for m, o in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                result, error = future.result()
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            if error is None:
+                results.append(result)
+            else:
+                errors[futures[future]] = error
+    return results, errors
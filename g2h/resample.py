@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .motion_store import (
+    SMPLX_VIEWS,
+    SUFFIX,
+    MotionStore,
+    decode_dof,
+    robot_motion_to_clip,
+    write_store,
+)
+
+# Whole-clip resampling of SMPL-X (.npz) and robot (.pkl / .g2hm) motions.
+#
+# Output frame k sits at source time k * src_fps / tgt_fps; rotations are
+# slerped between the two neighbouring source frames and everything else
+# (translations, hinge angles) is interpolated linearly, all in one
+# broadcast over the clip. Quaternions are xyzw like the rest of g2h.
+
+
+def sample_points(frames: int, src_fps: float, tgt_fps: float):
+    """(i0, i1, w): neighbouring source frames and blend weight of every output frame."""
+    if frames <= 1:
+        zero = np.zeros(max(frames, 0), dtype=np.int64)
+        return zero, zero, np.zeros(len(zero))
+    duration = (frames - 1) / src_fps
+    n = int(np.floor(duration * tgt_fps + 1e-9)) + 1
+    t = np.arange(n) * (src_fps / tgt_fps)
+    i0 = np.minimum(np.floor(t).astype(np.int64), frames - 1)
+    i1 = np.minimum(i0 + 1, frames - 1)
+    return i0, i1, t - i0
+
+
+def lerp(x: np.ndarray, i0, i1, w) -> np.ndarray:
+    w = w.reshape((-1,) + (1,) * (x.ndim - 1))
+    return x[i0] + (x[i1] - x[i0]) * w
+
+
+def quat_slerp(q0: np.ndarray, q1: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Shortest-path slerp of (..., 4) unit quaternions; w broadcasts against q0[..., 0]."""
+    w = np.asarray(w)[..., None]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.abs(dot)
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin = np.sin(theta)
+    # nearly parallel: fall back to a normalized lerp
+    near = sin < 1e-6
+    safe = np.where(near, 1.0, sin)
+    a = np.where(near, 1.0 - w, np.sin((1.0 - w) * theta) / safe)
+    b = np.where(near, w, np.sin(w * theta) / safe)
+    q = a * q0 + b * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def rotvec_to_quat(v: np.ndarray) -> np.ndarray:
+    angle = np.linalg.norm(v, axis=-1, keepdims=True)
+    half = 0.5 * angle
+    # sin(half) / angle -> 0.5 as angle -> 0
+    k = np.where(angle > 1e-8, np.sin(half) / np.where(angle > 1e-8, angle, 1.0), 0.5)
+    return np.concatenate([v * k, np.cos(half)], axis=-1)
+
+
+def quat_to_rotvec(q: np.ndarray) -> np.ndarray:
+    q = np.where(q[..., 3:] < 0, -q, q)
+    s = np.linalg.norm(q[..., :3], axis=-1, keepdims=True)
+    angle = 2.0 * np.arctan2(s, q[..., 3:])
+    k = np.where(s > 1e-8, angle / np.where(s > 1e-8, s, 1.0), 2.0)
+    return q[..., :3] * k
+
+
+def slerp_rotvec(v: np.ndarray, i0, i1, w) -> np.ndarray:
+    """Resample (T, J, 3) axis-angle rotations."""
+    q = rotvec_to_quat(v)
+    return quat_to_rotvec(quat_slerp(q[i0], q[i1], w[:, None]))
+
+
+def static_span(energy: np.ndarray, threshold: float, pad: int = 2) -> tuple[int, int]:
+    """[start, end) frames left after dropping leading / trailing frames whose energy stays below threshold.
+
+    energy has one value per frame transition (T - 1 values); pad keeps a
+    few still frames on either side of the motion.
+    """
+    T = len(energy) + 1
+    moving = np.flatnonzero(energy >= threshold)
+    if len(moving) == 0:
+        return 0, min(T, 1)
+    return max(0, moving[0] - pad), min(T, moving[-1] + 2 + pad)
+
+
+def smplx_energy(poses: np.ndarray, trans: np.ndarray, fps: float) -> np.ndarray:
+    """Per transition max joint speed (rad/s, approximated in axis-angle space) or root speed (m/s)."""
+    joint = np.abs(np.diff(poses, axis=0)).max(axis=1, initial=0.0) * fps
+    root = np.linalg.norm(np.diff(trans, axis=0), axis=-1) * fps
+    return np.maximum(joint, root)
+
+
+def robot_energy(root_pos: np.ndarray, dof: np.ndarray, fps: float) -> np.ndarray:
+    joint = np.abs(np.diff(dof, axis=0)).max(axis=1, initial=0.0) * fps
+    root = np.linalg.norm(np.diff(root_pos, axis=0), axis=-1) * fps
+    return np.maximum(joint, root)
+
+
+def resample_smplx(data, fps: Optional[float] = None, trim_threshold: Optional[float] = None) -> dict:
+    """Resample / trim a converted SMPL-X clip (dict or npz in convert_to_smplx layout)."""
+    out = {k: data[k] for k in data.keys()} if not isinstance(data, dict) else dict(data)
+    src_fps = float(np.asarray(out["mocap_frame_rate"]).reshape(-1)[0])
+    poses = np.asarray(out["poses"])
+    trans = np.asarray(out["trans"])
+
+    if trim_threshold is not None:
+        start, end = static_span(smplx_energy(poses, trans, src_fps), trim_threshold)
+        poses, trans = poses[start:end], trans[start:end]
+    if fps is not None and fps != src_fps:
+        i0, i1, w = sample_points(len(poses), src_fps, fps)
+        T, D = poses.shape
+        poses = slerp_rotvec(poses.reshape(T, D // 3, 3), i0, i1, w).reshape(-1, D).astype(poses.dtype)
+        trans = lerp(trans, i0, i1, w).astype(trans.dtype)
+        out["mocap_frame_rate"] = np.array([fps], dtype=np.asarray(out["mocap_frame_rate"]).dtype)
+
+    out["poses"] = poses
+    out["trans"] = trans
+    # the per-part fields are views of poses, as written by the converter
+    for key, (a, b) in SMPLX_VIEWS.items():
+        if key in out:
+            out[key] = poses[:, a:b]
+    return out
+
+
+def resample_robot(motion: dict, fps: Optional[float] = None, trim_threshold: Optional[float] = None) -> dict:
+    """Resample / trim a robot motion dict (GMR pkl layout, root_rot xyzw)."""
+    out = dict(motion)
+    src_fps = float(motion["fps"])
+    root_pos = np.asarray(motion["root_pos"])
+    root_rot = np.asarray(motion["root_rot"])
+    dof = np.asarray(motion["dof_pos"])
+
+    if trim_threshold is not None:
+        start, end = static_span(robot_energy(root_pos, dof, src_fps), trim_threshold)
+        root_pos, root_rot, dof = root_pos[start:end], root_rot[start:end], dof[start:end]
+    if fps is not None and fps != src_fps:
+        i0, i1, w = sample_points(len(dof), src_fps, fps)
+        root_pos = lerp(root_pos, i0, i1, w).astype(root_pos.dtype)
+        root_rot = quat_slerp(root_rot[i0], root_rot[i1], w).astype(root_rot.dtype)
+        dof = lerp(dof, i0, i1, w).astype(dof.dtype)
+        out["fps"] = fps
+
+    out.update(root_pos=root_pos, root_rot=root_rot, dof_pos=dof)
+    if "num_frames" in out:
+        out["num_frames"] = len(dof)
+    # per-body positions of the source frames no longer line up
+    if out.get("local_body_pos") is not None:
+        out["local_body_pos"] = None
+    return out
+
+
+def resample_file(src: Path, dst: Path, fps: Optional[float] = None, trim_threshold: Optional[float] = None) -> dict:
+    """Resample one .npz (SMPL-X), .pkl or .g2hm (robot) file into dst, keeping its format."""
+    t0 = time.time()
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.stem + ".tmp" + dst.suffix)
+    frames = [0, 0]
+
+    if src.suffix == ".npz":
+        with np.load(src, allow_pickle=True) as data:
+            frames[0] = data["poses"].shape[0]
+            out = resample_smplx(data, fps, trim_threshold)
+        frames[1] = out["poses"].shape[0]
+        np.savez(tmp, **out)
+    elif src.suffix == SUFFIX:
+        clips = []
+        for clip in MotionStore(src):
+            motion = {
+                "fps": clip.attrs["fps"], "robot_type": clip.attrs.get("robot_type"),
+                "root_pos": clip["root_pos"], "root_rot": clip["root_rot"], "dof_pos": decode_dof(clip),
+            }
+            out = resample_robot(motion, fps, trim_threshold)
+            frames[0] += clip.frames
+            frames[1] += len(out["dof_pos"])
+            clips.append(robot_motion_to_clip(out, clip.name, clip.attrs.get("dof_encoding", "float32")))
+        write_store(tmp, clips)
+    else:
+        with open(src, "rb") as f:
+            motion = pickle.load(f)
+        out = resample_robot(motion, fps, trim_threshold)
+        frames = [len(motion["dof_pos"]), len(out["dof_pos"])]
+        with open(tmp, "wb") as f:
+            pickle.dump(out, f)
+    tmp.replace(dst)
+    return {"clip": str(src), "frames_in": frames[0], "frames_out": frames[1], "seconds": time.time() - t0}
+
+
+def _resample_job(src, dst, fps, trim_threshold):
+    try:
+        return resample_file(src, dst, fps, trim_threshold), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def resample_batch(jobs, fps: Optional[float] = None, trim_threshold: Optional[float] = None, num_workers: int = 1):
+    """Resample (src, dst) pairs over a process pool."""
+    results, errors = [], {}
+    with ProcessPoolExecutor(max_workers=max(1, num_workers)) as pool:
+        futures = {pool.submit(_resample_job, s, d, fps, trim_threshold): s for s, d in jobs}
+        for future in as_completed(futures):
+            try:
+                result, error = future.result()
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            if error is None:
+                results.append(result)
+            else:
+                errors[futures[future]] = error
+    return results, errors
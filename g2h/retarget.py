@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from .config import GMR_DIR, ROBOT_XML_DICT
+from .utils import Job, run_subprocesses
+
+GMR_SCRIPT = GMR_DIR / "scripts" / "smplx_to_robot_dataset.py"
+
+
+def check_robots(robots):
+    unknown = [r for r in robots if r not in ROBOT_XML_DICT]
+    if unknown:
+        raise ValueError(f"Unknown robot type(s) {unknown}, choose from {list(ROBOT_XML_DICT)}")
+
+
+def gmr_command(robot_type: str, src_folder: Path, tgt_folder: Path) -> list[str]:
+    return [
+        "python",
+        str(GMR_SCRIPT),
+        "--src_folder",
+        str(src_folder),
+        "--robot",
+        str(robot_type),
+        "--tgt_folder",
+        str(tgt_folder)
+    ]
+
+
+def run_gmr(robots: list[str], input_dir: Path, output_dir: Path, num_procs: int = 1, timeout: float = None,
+            nested: bool = True, on_done=None):
+    """Retarget every clip under input_dir with GMR's dataset script, for each robot.
+
+    Clips are split round robin over up to num_procs folders of links and
+    each (robot, folder) pair is one GMR process; at most num_procs run at
+    once and each is killed after `timeout` seconds. Outputs go to
+    output_dir/<robot>/ when nested, else to output_dir. on_done(robot,
+    clips, ok) is called as each process exits, with the clips of
+    input_dir it was given.
+
+    The script loads and parses its clips itself, so with several robots
+    every clip is read once per robot: the processes overlap, but the
+    total work is that of one run per robot. Loading a clip once for all
+    robots would need GMR's in-process API, which is not pinned here.
+    """
+    check_robots(robots)
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    files = sorted(input_dir.rglob("*.npz"))
+    # GMR runs from its own folder, so every path it gets is absolute
+    targets = {r: (output_dir / r if nested else output_dir).resolve() for r in robots}
+
+    slices = max(1, min(num_procs, len(files)))
+    scratch = None
+    if slices == 1:
+        folders = [input_dir.resolve()]
+    else:
+        (output_dir / ".gmr_shards").mkdir(parents=True, exist_ok=True)
+        scratch = Path(tempfile.mkdtemp(dir=output_dir / ".gmr_shards")).resolve()
+        folders = []
+        for k in range(slices):
+            shard = scratch / f"{k:03d}"
+            for f in files[k::slices]:
+                link = shard / f.relative_to(input_dir)
+                link.parent.mkdir(parents=True, exist_ok=True)
+                link.symlink_to(f.resolve())
+            folders.append(shard)
+
+    try:
+        jobs, parts = [], {}
+        for robot in robots:
+            for k, folder in enumerate(folders):
+                job = Job(f"gmr_{robot}_{k:03d}", gmr_command(robot, folder, targets[robot]), GMR_DIR)
+                jobs.append(job)
+                parts[job.name] = (robot, files[k::slices])
+
+        def done(result):
+            if on_done is not None:
+                robot, clips = parts[result.name]
+                on_done(robot, clips, result.ok)
+
+        # a lone process echoes its output, as the script did when run in the foreground
+        return run_subprocesses(jobs, num_procs, log_dir=output_dir / "logs", timeout=timeout,
+                                echo=len(jobs) == 1, on_done=done)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+            try:
+                scratch.parent.rmdir()
+            except OSError:
+                pass
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+
+from .t2m_worker import DEFAULT_DURATION, FRAME_RATE
+
+# Duration-aware prompt scheduling for text to motion.
+#
+# The generator pads every batch to its longest clip, so prompts run in file
+# order waste compute whenever short and long prompts share a batch. Prompts
+# are sorted by (given or estimated) duration and cut into groups whose
+# padded size, group size * longest clip, stays under a frame budget; the
+# groups are then spread over the generator processes by padded frames.
+# Only the prompt order each process sees comes from here: the generator
+# still forms its own batches.
+
+MIN_DURATION = 2.0
+MAX_DURATION = 12.0
+_CLAUSE = re.compile(r"[,;.]|\b(?:then|and|while|before|after|followed by)\b", re.IGNORECASE)
+
+
+def estimate_duration(prompt: dict) -> float:
+    """Target length in seconds: the prompt's own "duration", else a guess from the text.
+
+    The guess only orders prompts for batching; it is never passed to the
+    generator.
+    """
+    if prompt.get("duration"):
+        return float(prompt["duration"])
+    text = prompt.get("text", "")
+    if not text.strip():
+        return DEFAULT_DURATION
+    # roughly 1.5 s per action, plus a little for long descriptions
+    actions = sum(1 for s in _CLAUSE.split(text) if s and s.strip())
+    words = len(text.split())
+    return min(MAX_DURATION, max(MIN_DURATION, 1.0 + 1.5 * actions + 0.05 * words))
+
+
+def prompt_frames(prompt: dict, fps: float = FRAME_RATE) -> int:
+    return max(1, int(round(estimate_duration(prompt) * fps)))
+
+
+def make_batches(prompts: list[dict], frame_budget: int, max_batch: int = 0, sort: bool = True) -> list[dict]:
+    """Group prompts into batches of {"ids", "frames", "padded"} under frame_budget padded frames.
+
+    With sort=False the prompts keep file order, which is what the generator
+    does without a scheduler; useful as a baseline.
+    """
+    items = [(prompt_frames(p), p["id"]) for p in prompts]
+    if sort:
+        items.sort()
+
+    batches, ids, longest, frames = [], [], 0, 0
+    for n, pid in items:
+        size = len(ids) + 1
+        if ids and (max(longest, n) * size > frame_budget or (max_batch and size > max_batch)):
+            batches.append({"ids": ids, "frames": frames, "padded": longest * len(ids)})
+            ids, longest, frames = [], 0, 0
+        ids.append(pid)
+        longest = max(longest, n)
+        frames += n
+    if ids:
+        batches.append({"ids": ids, "frames": frames, "padded": longest * len(ids)})
+    return batches
+
+
+def assign_lanes(batches: list[dict], num_lanes: int) -> list[list[dict]]:
+    """Spread batches over num_lanes processes, largest first onto the least loaded lane.
+
+    Each lane keeps its batches in duration order so neighbouring batches
+    are similar in length.
+    """
+    lanes = [[] for _ in range(max(1, num_lanes))]
+    load = [0] * len(lanes)
+    order = {id(b): i for i, b in enumerate(batches)}
+    for b in sorted(batches, key=lambda b: -b["padded"]):
+        i = load.index(min(load))
+        lanes[i].append(b)
+        load[i] += b["padded"]
+    return [sorted(lane, key=lambda b: order[id(b)]) for lane in lanes if lane]
+
+
+def padding(batches: list[dict]) -> float:
+    """Fraction of padded frames spent on padding, if the generator batched exactly these groups."""
+    padded = sum(b["padded"] for b in batches)
+    return 1.0 - sum(b["frames"] for b in batches) / padded if padded else 0.0
+
+
+def schedule_prompts(prompts: list[dict], num_lanes: int = 1, frame_budget: int = 2400, max_batch: int = 0):
+    """Duration-bucketed batches spread over num_lanes; returns (lanes, stats).
+
+    The padding figures in stats are estimates from guessed durations for
+    these groups, not for the batches the generator actually forms.
+    """
+    batches = make_batches(prompts, frame_budget, max_batch)
+    baseline = make_batches(prompts, frame_budget, max_batch, sort=False)
+    lanes = assign_lanes(batches, num_lanes)
+    stats = {
+        "prompts": len(prompts),
+        "batches": len(batches),
+        "padding": padding(batches),
+        "padding_file_order": padding(baseline),
+        "lane_frames": [sum(b["padded"] for b in lane) for lane in lanes],
+    }
+    return lanes, stats
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+def make_shards(prompts: list[dict], shard_size: int) -> dict:
+    """Split prompts, in file order, into {shard id: [prompt ids]}.
+
+    The split only depends on the prompt list and shard_size, so every node
+    computes the same shards.
+    """
+    shard_size = max(1, shard_size)
+    return {
+        f"shard_{i // shard_size:05d}": [p["id"] for p in prompts[i:i + shard_size]]
+        for i in range(0, len(prompts), shard_size)
+    }
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardQueue:
+    """Shard leases in a SQLite file on storage shared by all nodes.
+
+    A worker claims a pending shard, or one whose lease expired because its
+    worker died, and holds it for lease_s seconds, renewed by heartbeat().
+    A shard is parked as failed after max_attempts claims, whether its
+    worker reported the failure or died with it.
+    Claims run in an immediate transaction, so two workers never get the
+    same live shard. SQLite locking needs a file system with working POSIX
+    locks (local disk, NFSv4 with locking enabled).
+    """
+
+    def __init__(self, path: Path, lease_s: float = 1800.0, max_attempts: int = 3):
+        self.path = Path(path)
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                " id TEXT PRIMARY KEY, prompt_ids TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+                " worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL,"
+                " merged INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        return _Transaction(db)
+
+    def add(self, shards: dict):
+        """Register shards; ones already known (e.g. added by another node) are kept as they are."""
+        with self._connect() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO shards (id, prompt_ids, updated) VALUES (?, ?, ?)",
+                [(sid, json.dumps(ids), time.time()) for sid, ids in shards.items()],
+            )
+
+    def claim(self, worker: str):
+        """Lease the next shard as (shard id, prompt ids), or None when nothing is claimable."""
+        now = time.time()
+        with self._connect() as db:
+            # a worker that crashes on a shard never calls fail(), so expired leases count too
+            db.execute(
+                "UPDATE shards SET status = 'failed', lease_until = NULL,"
+                " error = COALESCE(error, 'lease expired') || ' (' || attempts || ' attempts)', updated = ?"
+                " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = db.execute(
+                "SELECT id, prompt_ids FROM shards"
+                " WHERE status = 'pending' OR (status = 'leased' AND lease_until < ? AND attempts < ?)"
+                " ORDER BY id LIMIT 1",
+                (now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ?"
+                " WHERE id = ?",
+                (worker, now + self.lease_s, now, row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def heartbeat(self, shard: str, worker: str) -> bool:
+        """Extend a lease; False when the shard was re-leased to another worker meanwhile."""
+        now = time.time()
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE shards SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_s, now, shard, worker),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, shard: str, worker: str):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE shards SET status = 'done', lease_until = NULL, error = NULL, updated = ? WHERE id = ? AND worker = ?",
+                (time.time(), shard, worker),
+            )
+
+    def fail(self, shard: str, worker: str, error: str):
+        """Give a shard back; after max_attempts it is parked as failed."""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " lease_until = NULL, error = ?, updated = ? WHERE id = ? AND worker = ?",
+                (self.max_attempts, error, time.time(), shard, worker),
+            )
+
+    def counts(self) -> dict:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall()
+        return {"pending": 0, "leased": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def failed(self) -> dict:
+        with self._connect() as db:
+            return dict(db.execute("SELECT id, error FROM shards WHERE status = 'failed'").fetchall())
+
+    def claim_merge(self) -> list[str]:
+        """Done shards not merged yet, handed to exactly one caller once no shard is pending or leased."""
+        with self._connect() as db:
+            busy = db.execute("SELECT COUNT(*) FROM shards WHERE status IN ('pending', 'leased')").fetchone()[0]
+            if busy:
+                return []
+            ids = [r[0] for r in db.execute("SELECT id FROM shards WHERE status = 'done' AND merged = 0 ORDER BY id")]
+            db.execute("UPDATE shards SET merged = 1 WHERE status = 'done' AND merged = 0")
+        return ids
+
+
+class _Transaction:
+    """Connection wrapper that holds an immediate (write) transaction for the with block."""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db.close()
+
+
+class LeaseKeeper:
+    """Background heartbeat for a claimed shard."""
+
+    def __init__(self, queue: ShardQueue, shard: str, worker: str):
+        self.queue = queue
+        self.shard = shard
+        self.worker = worker
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_s / 3):
+            if not self.queue.heartbeat(self.shard, self.worker):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import smplx
+import torch
+from smplx.lbs import batch_rigid_transform, batch_rodrigues, blend_shapes, vertices2joints
+
+from .motion_store import open_motion
+
+# SMPL-X skeleton joints; model outputs append face / foot landmarks after these
+NUM_BODY_JOINTS = 55
+
+# rough peak bytes per frame and vertex of a full lbs pass (per-vertex 4x4 transforms and posed copies)
+_LBS_BYTES_PER_VERTEX = 160
+
+
+def create_body_model(smplx_model_path: Path, device: torch.device = torch.device("cpu")):
+    """The same smplx.create setup as SMPLXViserPlayer."""
+    return smplx.create(
+        model_path=str(Path(smplx_model_path).parent),
+        model_type="smplx",
+        gender="neutral",
+        use_pca=False,
+        batch_size=1,
+    ).to(device)
+
+
+class BulkSkinner:
+    """Skin whole clips in chunked batches on CPU.
+
+    Chunks are sized so one lbs pass stays under max_mem_mb. joints()
+    only runs the kinematic chain on the shape-dependent rest joints and
+    never touches the ~10k mesh vertices, which is what joint extraction
+    (foot contacts, retarget QA) needs.
+    """
+
+    def __init__(self, smplx_model_path: Optional[Path] = None, model=None, device: torch.device = torch.device("cpu"),
+                 max_mem_mb: float = 512, max_chunk: int = 4096):
+        self.device = device
+        self.model = model.to(device) if model is not None else create_body_model(smplx_model_path, device)
+        self.max_mem_mb = max_mem_mb
+        self.max_chunk = max_chunk
+
+    def chunk_size(self, joints_only: bool) -> int:
+        if joints_only:
+            # (B, 55, 4, 4) transforms are a few KB per frame
+            return self.max_chunk
+        per_frame = self.model.get_num_verts() * _LBS_BYTES_PER_VERTEX
+        return int(max(1, min(self.max_chunk, self.max_mem_mb * 1024 ** 2 // per_frame)))
+
+    def load(self, motion) -> dict:
+        """Pose tensors of a converted clip (.npz or .g2hm#clip)."""
+        data = open_motion(motion)
+        tensors = {
+            k: torch.as_tensor(np.array(data[k]), dtype=torch.float32, device=self.device)
+            for k in ("root_orient", "pose_body", "pose_hand", "pose_jaw", "pose_eye", "trans")
+        }
+        betas = torch.zeros(self.model.num_betas, device=self.device)
+        src = torch.as_tensor(np.array(data["betas"]), dtype=torch.float32).flatten()[:self.model.num_betas]
+        betas[:len(src)] = src
+        tensors["betas"] = betas
+        tensors["fps"] = float(np.asarray(data["mocap_frame_rate"]).reshape(-1)[0])
+        return tensors
+
+    def _full_pose(self, m: dict, start: int, end: int) -> torch.Tensor:
+        # same joint order and hand mean handling as SMPLX.forward
+        pose = torch.cat([
+            m["root_orient"][start:end], m["pose_body"][start:end], m["pose_jaw"][start:end],
+            m["pose_eye"][start:end, :3], m["pose_eye"][start:end, 3:],
+            m["pose_hand"][start:end, :45], m["pose_hand"][start:end, 45:],
+        ], dim=1)
+        return pose + self.model.pose_mean
+
+    def joints(self, m: dict) -> np.ndarray:
+        """(T, 55, 3) posed skeleton joints, without skinning any vertex."""
+        T = m["trans"].shape[0]
+        out = np.empty((T, NUM_BODY_JOINTS, 3), dtype=np.float32)
+        with torch.no_grad():
+            v_shaped = self.model.v_template + blend_shapes(m["betas"][None], self.model.shapedirs)
+            rest = vertices2joints(self.model.J_regressor, v_shaped)  # (1, 55, 3)
+            step = self.chunk_size(joints_only=True)
+            for start in range(0, T, step):
+                end = min(start + step, T)
+                B = end - start
+                rot = batch_rodrigues(self._full_pose(m, start, end).reshape(-1, 3)).view(B, -1, 3, 3)
+                posed, _ = batch_rigid_transform(rot, rest.expand(B, -1, -1), self.model.parents)
+                out[start:end] = (posed + m["trans"][start:end, None]).cpu().numpy()
+        return out
+
+    def skin(self, m: dict):
+        """(T, V, 3) vertices and (T, 55, 3) joints through the full model forward."""
+        T = m["trans"].shape[0]
+        verts = np.empty((T, self.model.get_num_verts(), 3), dtype=np.float32)
+        joints = np.empty((T, NUM_BODY_JOINTS, 3), dtype=np.float32)
+        step = self.chunk_size(joints_only=False)
+        with torch.no_grad():
+            for start in range(0, T, step):
+                end = min(start + step, T)
+                B = end - start
+                out = self.model(
+                    betas=m["betas"][None].expand(B, -1),
+                    global_orient=m["root_orient"][start:end],
+                    body_pose=m["pose_body"][start:end],
+                    left_hand_pose=m["pose_hand"][start:end, :45],
+                    right_hand_pose=m["pose_hand"][start:end, 45:],
+                    jaw_pose=m["pose_jaw"][start:end],
+                    leye_pose=m["pose_eye"][start:end, :3],
+                    reye_pose=m["pose_eye"][start:end, 3:],
+                    expression=torch.zeros(B, self.model.num_expression_coeffs, device=self.device),
+                    transl=m["trans"][start:end],
+                )
+                verts[start:end] = out.vertices.cpu().numpy()
+                joints[start:end] = out.joints[:, :NUM_BODY_JOINTS].cpu().numpy()
+        return verts, joints
+
+    def process(self, motion, out_path: Path, joints_only: bool = True, dtype=np.float16) -> dict:
+        """Skin one clip and write <out_path> (.npz with joints, and vertices unless joints_only)."""
+        t0 = time.time()
+        m = self.load(motion)
+        arrays = {"fps": np.array(m["fps"], dtype=np.float32)}
+        if joints_only:
+            arrays["joints"] = self.joints(m)
+        else:
+            verts, joints = self.skin(m)
+            arrays["joints"] = joints
+            arrays["vertices"] = verts.astype(dtype)
+
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_name(out_path.stem + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(out_path)
+        return {"clip": str(motion), "frames": arrays["joints"].shape[0], "seconds": time.time() - t0,
+                "bytes": out_path.stat().st_size}
+
+
+_SKINNER = None
+
+
+def _init_worker(smplx_model_path, max_mem_mb):
+    global _SKINNER
+    # one process per core already; keep torch from oversubscribing
+    torch.set_num_threads(1)
+    _SKINNER = BulkSkinner(smplx_model_path, max_mem_mb=max_mem_mb)
+
+
+def _skin_job(skinner, motion, out_path, joints_only, dtype):
+    try:
+        return (skinner or _SKINNER).process(motion, out_path, joints_only, dtype), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def skin_clips(smplx_model_path: Path, jobs, joints_only: bool = True, num_workers: int = 1,
+               processes: bool = False, max_mem_mb: float = 512, dtype=np.float16, model=None):
+    """Skin (motion, output) pairs over a thread pool sharing one body model, or a process pool.
+
+    With processes, max_mem_mb applies per worker.
+    """
+    results, errors = [], {}
+    num_workers = max(1, num_workers)
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                   initargs=(smplx_model_path, max_mem_mb))
+        skinner = None
+    else:
+        pool = ThreadPoolExecutor(max_workers=num_workers)
+        skinner = BulkSkinner(smplx_model_path, model=model, max_mem_mb=max_mem_mb / num_workers)
+
+    with pool:
+        futures = {pool.submit(_skin_job, skinner, m, o, joints_only, dtype): m for m, o in jobs}
+        for future in as_completed(futures):
+            try:
+                result, error = future.result()
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            if error is None:
+                results.append(result)
+            else:
+                errors[futures[future]] = error
+    return results, errors
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .manifest import Manifest
+from .profiler import Profiler
+
+_STOP = object()
+
+# a line with this marker ends a queue file
+QUEUE_END = "#end"
+
+
+def watch_dir(root: Path, pattern: str, done: threading.Event, poll_interval: float = 1.0,
+              committed: Optional[Callable[[], set]] = None):
+    """Yield files under root matching pattern as they land.
+
+    A file is yielded once its size is unchanged between two polls. With
+    `committed`, a callable returning the paths (as str) the producer has
+    finished, only those are yielded and files still being written or
+    renamed are left alone. After `done` is set (the producer exited) a
+    final scan yields everything left.
+    """
+    root = Path(root)
+    seen = set()
+    pending = {}
+    while True:
+        finished = done.is_set()
+        files = sorted(root.rglob(pattern)) if root.exists() else []
+        ready = committed() if committed is not None else None
+        for p in files:
+            if p in seen:
+                continue
+            if ready is not None:
+                if str(p) in ready:
+                    seen.add(p)
+                    yield p
+                continue
+            size = p.stat().st_size
+            if finished or pending.get(p) == size:
+                seen.add(p)
+                pending.pop(p, None)
+                yield p
+            else:
+                pending[p] = size
+        if finished:
+            return
+        done.wait(poll_interval)
+
+
+def tail_queue_file(path: Path, done: threading.Event, poll_interval: float = 1.0):
+    """Yield clip paths appended (one per line) to a queue file.
+
+    Stops at a QUEUE_END line, or once `done` is set and the file is drained.
+    """
+    path = Path(path)
+    while not path.exists() and not done.is_set():
+        done.wait(poll_interval)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        while True:
+            line = f.readline()
+            if line:
+                buf += line
+                if buf.endswith("\n"):
+                    entry = buf.strip()
+                    buf = ""
+                    if entry == QUEUE_END:
+                        return
+                    if entry:
+                        yield Path(entry)
+                continue
+            if done.is_set():
+                if buf.strip():
+                    yield Path(buf.strip())
+                return
+            done.wait(poll_interval)
+
+
+class StreamingPipeline:
+    """Push each generated clip through conversion and retargeting as it lands.
+
+    convert_fn(input, output) runs in a worker process and returns
+    (error or None, timing stats). Stages are connected by bounded queues, so a slow retarget stage blocks
+    conversion instead of piling converted clips up in memory. Retargeting is
+    done in micro-batches: up to `retarget_batch` clips are linked into a
+    scratch folder and handed to `retarget_fn(src_dir, tgt_dir)` together,
+    which amortizes the retargeter's start-up cost. Clips for which
+    `retarget_pending(converted clip)` is false are not retargeted again.
+    """
+
+    def __init__(
+        self,
+        input_root: Path,
+        cvt_dir: Path,
+        gmr_dir: Path,
+        convert_fn: Callable[[Path, Path], tuple],
+        retarget_fn: Callable[[Path, Path], None],
+        convert_workers: int = 2,
+        retarget_workers: int = 1,
+        retarget_batch: int = 8,
+        batch_timeout: float = 5.0,
+        queue_size: int = 32,
+        manifest_name: str = "convert_manifest.jsonl",
+        convert_fingerprint: Optional[str] = None,
+        profiler: Optional[Profiler] = None,
+        retarget_pending: Optional[Callable[[Path], bool]] = None,
+    ):
+        self.input_root = Path(input_root)
+        self.cvt_dir = Path(cvt_dir)
+        self.gmr_dir = Path(gmr_dir)
+        self.convert_fn = convert_fn
+        self.retarget_fn = retarget_fn
+        self.convert_workers = max(1, convert_workers)
+        self.retarget_workers = max(1, retarget_workers)
+        self.retarget_batch = max(1, retarget_batch)
+        self.batch_timeout = batch_timeout
+
+        self.cvt_queue = queue.Queue(maxsize=queue_size)
+        self.ret_queue = queue.Queue(maxsize=queue_size)
+
+        self.manifest = Manifest(self.cvt_dir / manifest_name)
+        self.convert_fingerprint = convert_fingerprint
+        self.profiler = profiler
+        self.retarget_pending = retarget_pending
+        self._lock = threading.Lock()
+        self._convert_left = self.convert_workers
+
+        self.errors = {}
+        self.num_converted = 0
+        self.num_retargeted = 0
+        self.num_up_to_date = 0
+        self.first_converted = None
+
+    def _feed(self, source: Iterable[Path]):
+        try:
+            for p in source:
+                self.cvt_queue.put(Path(p))
+        finally:
+            for _ in range(self.convert_workers):
+                self.cvt_queue.put(_STOP)
+
+    def _convert_loop(self, pool: ProcessPoolExecutor):
+        while True:
+            item = self.cvt_queue.get()
+            if item is _STOP:
+                break
+            try:
+                rel_path = item.relative_to(self.input_root)
+            except ValueError:
+                rel_path = Path(item.name)
+            output_file = self.cvt_dir / rel_path
+            with self._lock:
+                done = self.manifest.is_done(item, self.convert_fingerprint)
+            if not done:
+                try:
+                    error, stats = pool.submit(self.convert_fn, item, output_file).result()
+                except Exception as e:
+                    error, stats = f"{type(e).__name__}: {e}", None
+                with self._lock:
+                    if self.profiler is not None and stats is not None:
+                        self.profiler.add_clip("convert", item, error=error, **stats)
+                    if error is None:
+                        self.manifest.mark_done(item, output_file, fingerprint=self.convert_fingerprint)
+                        self.num_converted += 1
+                        if self.first_converted is None:
+                            self.first_converted = time.time()
+                    else:
+                        self.manifest.mark_failed(item, error)
+                        self.errors[item] = error
+                if error is not None:
+                    continue
+            if self.retarget_pending is not None and not self.retarget_pending(output_file):
+                with self._lock:
+                    self.num_up_to_date += 1
+                continue
+            # blocks while the retarget stage is saturated
+            self.ret_queue.put(output_file)
+
+        with self._lock:
+            self._convert_left -= 1
+            last = self._convert_left == 0
+        if last:
+            for _ in range(self.retarget_workers):
+                self.ret_queue.put(_STOP)
+
+    def _next_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.retarget_batch:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.ret_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_timeout
+        return batch, False
+
+    def _retarget_loop(self):
+        scratch_root = self.gmr_dir / ".stream"
+        scratch_root.mkdir(parents=True, exist_ok=True)
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                scratch = Path(tempfile.mkdtemp(dir=scratch_root))
+                try:
+                    for f in batch:
+                        link = scratch / f.relative_to(self.cvt_dir)
+                        link.parent.mkdir(parents=True, exist_ok=True)
+                        link.symlink_to(f.resolve())
+                    self.retarget_fn(scratch, self.gmr_dir)
+                    with self._lock:
+                        self.num_retargeted += len(batch)
+                except Exception as e:
+                    with self._lock:
+                        for f in batch:
+                            self.errors[f] = f"{type(e).__name__}: {e}"
+                finally:
+                    shutil.rmtree(scratch, ignore_errors=True)
+            if stop:
+                break
+
+    def run(self, source: Iterable[Path]):
+        with ProcessPoolExecutor(max_workers=self.convert_workers) as pool:
+            threads = [threading.Thread(target=self._feed, args=(source,), daemon=True)]
+            threads += [
+                threading.Thread(target=self._convert_loop, args=(pool,), daemon=True)
+                for _ in range(self.convert_workers)
+            ]
+            threads += [
+                threading.Thread(target=self._retarget_loop, daemon=True)
+                for _ in range(self.retarget_workers)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.manifest.compact()
+        shutil.rmtree(self.gmr_dir / ".stream", ignore_errors=True)
+
+        print(f"\n[Stream] converted {self.num_converted}, retargeted {self.num_retargeted}, "
+              f"up to date {self.num_up_to_date}, failed {len(self.errors)}")
+        for f, error in self.errors.items():
+            print(f"[Error] {f}: {error}")
+        return self.errors
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def normalize_prompt(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _link_or_copy(src: Path, dst: Path):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class GenerationCache:
+    """On-disk cache of generated motions, addressed by prompt and settings.
+
+    Layout: <root>/<key[:2]>/<key>/{meta.json, 000.npz, 001.npz, ...}, with
+    the generator's file names (minus the prompt id) kept in meta.json. The
+    mtime of meta.json is bumped on every hit and drives LRU eviction once
+    the cache grows past max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(text: str, model: str, params: Optional[dict] = None) -> str:
+        payload = json.dumps(
+            {"text": normalize_prompt(text), "model": model, "params": params or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str, output_dir: Path, stem: str):
+        """Materialize a cached entry under the generator's file names for prompt `stem`, or return None.
+
+        The prompt's previous outputs in output_dir are removed first, so
+        only the cached set is left.
+        """
+        entry = self._entry_dir(key)
+        meta = entry / "meta.json"
+        if not meta.exists():
+            self.misses += 1
+            return None
+
+        with open(meta, "r", encoding="utf-8") as f:
+            names = json.load(f).get("files")
+        cached = sorted(entry.glob("*.npz"))
+        if names is None:
+            # entries written before the names were kept
+            names = [f"_{f.stem}.npz" for f in cached]
+        for f in Path(output_dir).glob(f"{stem}_*.npz"):
+            f.unlink()
+
+        outputs = []
+        for f, name in zip(cached, names):
+            dst = Path(output_dir) / f"{stem}{name}"
+            _link_or_copy(f, dst)
+            outputs.append(dst)
+        os.utime(meta)
+        self.hits += 1
+        return outputs
+
+    def put(self, key: str, files, stem: str, meta: Optional[dict] = None):
+        """Store the outputs of prompt `stem`, remembering their names after the stem."""
+        files = sorted(Path(f) for f in files)
+        if not files:
+            return
+        entry = self._entry_dir(key)
+        tmp = entry.with_name(entry.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        names = []
+        for k, f in enumerate(files):
+            _link_or_copy(f, tmp / f"{k:03d}.npz")
+            names.append(f.name[len(stem):] if f.name.startswith(f"{stem}_") else f"_{f.name}")
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({**(meta or {}), "files": names, "created": time.time()}, f, ensure_ascii=False)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+
+    def _entries(self):
+        for meta in self.root.glob("*/*/meta.json"):
+            entry = meta.parent
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            yield meta.stat().st_mtime, size, entry
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            if not any(entry.parent.iterdir()):
+                entry.parent.rmdir()
+            total -= size
+            self.evicted += 1
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        print(f"[Cache] hits {self.hits}, misses {self.misses} ({rate:.1f}% hit rate), evicted {self.evicted}")
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import os
+import sys
+import tempfile
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+
+from .config import HYM_DIR, HYM_CHECKPOINT_DIR, PROMPT_FOLDER
+
+DEFAULT_ADDRESS = str(Path(tempfile.gettempdir()) / f"g2h_t2m_worker_{os.getuid()}.sock")
+DEFAULT_DURATION = 4.0
+FRAME_RATE = 30.0
+KEY_ENV = "G2H_WORKER_KEY"
+
+# Generator options of local_infer.py. The worker generates each prompt as
+# written, for its given (or the default) duration, so it only serves runs
+# that turn both steps off.
+OPTIONS = ("disable_duration_est", "disable_rewrite")
+
+
+def parse_address(address: str) -> str:
+    """The worker only listens on a unix socket; requests are pickled, so it must not be reachable over the network."""
+    host, sep, port = str(address).rpartition(":")
+    if sep and port.isdigit() and "/" not in str(address):
+        raise ValueError(f"{address} looks like host:port; the text to motion worker only takes a unix socket path")
+    return str(address)
+
+
+def worker_key() -> bytes:
+    """Shared secret of worker and clients, from the G2H_WORKER_KEY environment variable."""
+    key = os.environ.get(KEY_ENV)
+    if not key:
+        raise RuntimeError(f"{KEY_ENV} is not set; export the key printed by scripts/t2m_worker.py")
+    return key.encode()
+
+
+def unsupported_options(options: dict) -> list:
+    return [k for k in OPTIONS if not options.get(k)]
+
+
+class StubBackend:
+    """CPU-only stand-in for HY-Motion, writing random clips in its npz layout."""
+
+    model_id = "stub"
+
+    def load(self):
+        pass
+
+    def generate(self, prompt: dict, output_dir: Path, num_samples: int = 1):
+        duration = float(prompt.get("duration") or DEFAULT_DURATION)
+        T = max(1, int(round(duration * FRAME_RATE)))
+        seed = int(hashlib.sha1(prompt["text"].encode("utf-8")).hexdigest()[:8], 16)
+        rng = np.random.default_rng(seed)
+
+        outputs = []
+        for k in range(num_samples):
+            path = output_dir / f"{prompt['id']}_{k:03d}.npz"
+            np.savez(
+                path,
+                poses=rng.normal(scale=0.1, size=(T, 156)).astype(np.float32),
+                trans=np.cumsum(rng.normal(scale=0.01, size=(T, 3)), axis=0).astype(np.float32),
+                betas=np.zeros((1, 10), dtype=np.float32),
+                gender=np.array(["neutral"]),
+            )
+            outputs.append(path)
+        return outputs
+
+
+class HYMotionBackend:
+    """Keeps a HY-Motion model resident between requests.
+
+    This is the only place that touches HY-Motion internals. The runtime
+    class is taken from local_infer.py's own namespace, so the worker runs
+    the same code as the script, and loading fails loudly when the script
+    does not expose it.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_path = HYM_CHECKPOINT_DIR / model_name
+        self.model_id = None
+        self.runtime = None
+
+    def load(self):
+        sys.path.insert(0, str(HYM_DIR))
+        os.chdir(HYM_DIR)
+        import local_infer
+
+        runtime_cls = getattr(local_infer, "T2MRuntime", None)
+        if runtime_cls is None:
+            raise RuntimeError(f"{HYM_DIR / 'local_infer.py'} does not expose T2MRuntime; run the pipeline without --t2m_worker")
+        ckpt = self.model_path / "latest.ckpt"
+        self.runtime = runtime_cls(
+            config_path=str(self.model_path / "config.yml"),
+            ckpt_name=str(ckpt),
+        )
+        # reported to clients, which key their generation cache on it
+        st = ckpt.stat()
+        self.model_id = f"{ckpt.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+        missing = {"text", "seeds_csv", "duration", "output_format", "output_dir", "output_filename"} - set(
+            inspect.signature(self.runtime.generate_motion).parameters)
+        if missing:
+            raise RuntimeError(f"T2MRuntime.generate_motion takes no {sorted(missing)}; this HY-Motion version is not supported by the worker")
+
+    def generate(self, prompt: dict, output_dir: Path, num_samples: int = 1):
+        seeds = ",".join(str(k) for k in range(num_samples))
+        self.runtime.generate_motion(
+            text=prompt["text"],
+            seeds_csv=seeds,
+            duration=float(prompt.get("duration") or DEFAULT_DURATION),
+            output_format="npz",
+            output_dir=str(output_dir),
+            output_filename=str(prompt["id"]),
+        )
+        return sorted(output_dir.glob(f"{prompt['id']}_*.npz"))
+
+
+def serve(backend, address: str = DEFAULT_ADDRESS):
+    """Load the model once, then answer requests until told to shut down.
+
+    Requests are dicts: {"cmd": "generate", "prompts": [...], "output_dir": str,
+    "num_samples": int, "options": {...}}, {"cmd": "ping"} (answered with the
+    loaded model's id) or {"cmd": "shutdown"}.
+    Requests are handled one at a time so a single model instance is never
+    shared. Clients must present the G2H_WORKER_KEY secret, and the socket
+    is only accessible to its owner.
+    """
+    addr = parse_address(address)
+    key = worker_key()
+
+    t0 = time.time()
+    backend.load()
+    print(f"[Worker] model loaded in {time.time() - t0:.1f}s")
+
+    if os.path.exists(addr):
+        os.unlink(addr)
+
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(addr, family="AF_UNIX", authkey=key)
+    finally:
+        os.umask(umask)
+    with listener:
+        print(f"[Worker] listening on {address}")
+        running = True
+        while running:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError) as e:
+                print(f"[Worker] rejected a connection: {e}")
+                continue
+            with conn:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    continue
+
+                cmd = request.get("cmd")
+                if cmd == "ping":
+                    conn.send({"ok": True, "model": getattr(backend, "model_id", None)})
+                elif cmd == "shutdown":
+                    conn.send({"ok": True})
+                    running = False
+                elif cmd == "generate":
+                    conn.send(_handle_generate(backend, request))
+                else:
+                    conn.send({"ok": False, "error": f"unknown cmd: {cmd}"})
+
+    if os.path.exists(addr):
+        os.unlink(addr)
+
+
+def _handle_generate(backend, request):
+    t0 = time.time()
+    output_dir = Path(request["output_dir"]) / PROMPT_FOLDER
+    output_dir.mkdir(parents=True, exist_ok=True)
+    num_samples = int(request.get("num_samples", 1))
+    unsupported = unsupported_options(request.get("options", {}))
+    if unsupported:
+        return {"ok": False, "error": f"the worker cannot run without {unsupported}", "outputs": [], "errors": {},
+                "elapsed": 0.0}
+
+    outputs, errors = [], {}
+    for prompt in request["prompts"]:
+        try:
+            outputs += [str(p) for p in backend.generate(prompt, output_dir, num_samples)]
+        except Exception:
+            errors[prompt["id"]] = traceback.format_exc(limit=3)
+    return {"ok": not errors, "outputs": outputs, "errors": errors, "elapsed": time.time() - t0}
+
+
+class T2MWorkerClient:
+    def __init__(self, address: str = DEFAULT_ADDRESS):
+        self.address = parse_address(address)
+
+    def _call(self, request):
+        with Client(self.address, family="AF_UNIX", authkey=worker_key()) as conn:
+            conn.send(request)
+            return conn.recv()
+
+    def ping(self) -> bool:
+        return self.info() is not None
+
+    def info(self):
+        """The worker's ping reply, {"ok", "model"}, or None when nothing listens."""
+        try:
+            return self._call({"cmd": "ping"})
+        except (ConnectionRefusedError, FileNotFoundError):
+            return None
+
+    def generate(self, prompts: list[dict], output_dir: Path, num_samples: int = 1, options: dict = None):
+        return self._call({
+            "cmd": "generate",
+            "prompts": prompts,
+            # the worker may run from another cwd
+            "output_dir": str(Path(output_dir).resolve()),
+            "num_samples": num_samples,
+            "options": options or {},
+        })
+
+    def shutdown(self):
+        return self._call({"cmd": "shutdown"})
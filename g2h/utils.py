@@ -1,24 +1,202 @@
+import asyncio
+import os
+import signal
 import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Optional
 
 def run_subprocess(cmd: list[str], cwd : Path, raise_on_error: bool = True):
-    
+    """Run cmd and wait for it.
+
+    The returned CompletedProcess also carries `wall_time` and, on POSIX,
+    `rusage` of the child (and the grandchildren it waited for).
+    """
     print(cmd)
+    t0 = time.perf_counter()
+    rusage = None
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             cmd,
             cwd=cwd,
             # capture_output=True,
             text=True,
             encoding="utf-8",
         )
+        try:
+            if hasattr(os, "wait4"):
+                _, status, rusage = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                proc.wait()
+        except KeyboardInterrupt:
+            proc.kill()
+            proc.wait()
+            raise
     except KeyboardInterrupt:
         if raise_on_error:
             raise RuntimeError("Interrupted by user.") from None
         print("\n[Info] Interrupted.")
         return None
 
+    result = subprocess.CompletedProcess(cmd, proc.returncode)
+    result.wall_time = time.perf_counter() - t0
+    result.rusage = rusage
+
     if result.returncode != 0 and raise_on_error:
         raise RuntimeError(f"Command failed: {cmd}")
 
     return result
+
+
+@dataclass
+class Job:
+    """One command for run_subprocesses; name also names its log file."""
+    name: str
+    cmd: list[str]
+    cwd: Optional[Path] = None
+    env: Optional[dict] = None
+    timeout: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    name: str
+    cmd: list[str]
+    returncode: Optional[int]
+    wall_time: float
+    log_path: Optional[Path]
+    timed_out: bool = False
+    cancelled: bool = False
+    tail: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+def _kill_tree(proc, sig):
+    # jobs start in their own session, so the group holds every grandchild too
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, sig)
+        else:
+            proc.send_signal(sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(proc, grace: float):
+    _kill_tree(proc, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        _kill_tree(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+        await proc.wait()
+
+
+async def _pump(stream, log, tail: deque, prefix: Optional[str]):
+    # read in chunks rather than lines: progress bars can emit very long lines
+    def emit(line: bytes):
+        text = line.decode("utf-8", errors="replace").rstrip()
+        tail.append(text)
+        if prefix is not None:
+            print(f"{prefix}{text}", flush=True)
+
+    pending = b""
+    while chunk := await stream.read(1 << 16):
+        log.write(chunk)
+        log.flush()
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            emit(line)
+    if pending:
+        emit(pending)
+
+
+async def run_job(job: Job, log_dir: Optional[Path] = None, timeout: Optional[float] = None,
+                  echo: bool = False, grace: float = 10.0, tail_lines: int = 20) -> JobResult:
+    """Run one job, streaming its stdout and stderr into <log_dir>/<name>.log as they arrive.
+
+    On timeout or cancellation the whole process tree gets SIGTERM, then
+    SIGKILL after `grace` seconds.
+    """
+    timeout = job.timeout if job.timeout is not None else timeout
+    log_path = Path(log_dir) / f"{job.name}.log" if log_dir is not None else None
+    if log_path is not None:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+    tail = deque(maxlen=tail_lines)
+    timed_out = cancelled = False
+
+    t0 = time.perf_counter()
+    with open(log_path if log_path is not None else os.devnull, "wb") as log:
+        proc = await asyncio.create_subprocess_exec(
+            *job.cmd,
+            cwd=job.cwd,
+            env={**os.environ, **job.env} if job.env else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(_pump(proc.stdout, log, tail, f"[{job.name}] " if echo else None), proc.wait()),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            await _terminate(proc, grace)
+        except asyncio.CancelledError:
+            cancelled = True
+            await asyncio.shield(_terminate(proc, grace))
+            raise
+        finally:
+            if timed_out or cancelled:
+                log.write(f"\n[{'timeout' if timed_out else 'cancelled'} after {time.perf_counter() - t0:.1f}s]\n".encode())
+
+    return JobResult(job.name, job.cmd, proc.returncode, time.perf_counter() - t0, log_path, timed_out, cancelled, list(tail))
+
+
+async def run_jobs(jobs: list[Job], max_concurrent: int = 1, on_done: Optional[Callable[[JobResult], None]] = None,
+                   **kwargs) -> list[JobResult]:
+    """Run jobs with at most max_concurrent alive at a time; results keep the order of jobs.
+
+    on_done(result) is called as each job finishes.
+    """
+    sem = asyncio.Semaphore(max(1, max_concurrent))
+
+    async def limited(job):
+        async with sem:
+            result = await run_job(job, **kwargs)
+        status = "ok" if result.ok else ("timeout" if result.timed_out else f"exit {result.returncode}")
+        print(f"[Job] {job.name}: {status} in {result.wall_time:.1f}s")
+        if on_done is not None:
+            on_done(result)
+        return result
+
+    return await asyncio.gather(*(limited(job) for job in jobs))
+
+
+def run_subprocesses(jobs: list[Job], max_concurrent: int = 1, log_dir: Optional[Path] = None,
+                     timeout: Optional[float] = None, echo: bool = False, raise_on_error: bool = True,
+                     on_done: Optional[Callable[[JobResult], None]] = None) -> list[JobResult]:
+    """Blocking front end of run_jobs for synchronous callers.
+
+    Ctrl-C cancels every job and kills its process tree before returning.
+    """
+    for job in jobs:
+        print(job.cmd)
+    try:
+        results = asyncio.run(run_jobs(jobs, max_concurrent, on_done, log_dir=log_dir, timeout=timeout, echo=echo))
+    except KeyboardInterrupt:
+        if raise_on_error:
+            raise RuntimeError("Interrupted by user.") from None
+        print("\n[Info] Interrupted.")
+        return None
+    failed = [r for r in results if not r.ok]
+    if failed and raise_on_error:
+        lines = [f"{r.name} ({'timeout' if r.timed_out else r.returncode}): {r.log_path or ''}" for r in failed]
+        raise RuntimeError(f"{len(failed)}/{len(results)} jobs failed:\n  " + "\n  ".join(lines))
+    return results
@@ -1,3 +1,4 @@
 from .robot_viser import MJCFViserPlayer
 from .smplx_viser import SMPLXViserPlayer
-from .motion_player import play
\ No newline at end of file
+from .motion_player import play
+from .gallery import play_gallery
\ No newline at end of file
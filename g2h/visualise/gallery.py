@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import torch
+import viser
+
+from ..motion_store import SUFFIX, MotionStore
+from .playback import PlaybackScheduler
+from .robot_viser import MJCFViserPlayer
+from .smplx_viser import SMPLXViserPlayer
+
+
+def state_nbytes(state: dict) -> int:
+    """Resident size of a player's anim_state; memory-mapped arrays are not counted."""
+    total = 0
+    for v in state.values():
+        if isinstance(v, np.memmap):
+            continue
+        if isinstance(v, np.ndarray):
+            total += v.nbytes
+        elif isinstance(v, torch.Tensor):
+            total += v.element_size() * v.nelement()
+    return total
+
+
+class ClipCache:
+    """LRU of decoded clips bounded by a byte budget; the newest entry is always kept."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+
+    def get(self, key):
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def put(self, key, value, nbytes: int):
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.nbytes -= size
+
+
+def list_clips(gmr_dir: Optional[Path] = None, cvt_dir: Optional[Path] = None):
+    """{clip name: {"robot": pkl or store#clip, "smplx": npz or store#clip}}, paired by relative path."""
+    clips = {}
+    if gmr_dir is not None and Path(gmr_dir).is_dir():
+        for f in sorted(Path(gmr_dir).rglob("*.pkl")):
+            clips.setdefault(f.relative_to(gmr_dir).with_suffix("").as_posix(), {})["robot"] = f
+        for f in sorted(Path(gmr_dir).rglob(f"*{SUFFIX}")):
+            names = MotionStore(f).names()
+            if len(names) == 1:
+                clips.setdefault(f.relative_to(gmr_dir).with_suffix("").as_posix(), {})["robot"] = f
+            else:
+                for name in names:
+                    clips.setdefault(name, {})["robot"] = f"{f}#{name}"
+    if cvt_dir is not None and Path(cvt_dir).is_dir():
+        for f in sorted(Path(cvt_dir).rglob("*.npz")):
+            clips.setdefault(f.relative_to(cvt_dir).with_suffix("").as_posix(), {})["smplx"] = f
+        for f in sorted(Path(cvt_dir).rglob(f"*{SUFFIX}")):
+            for name in MotionStore(f).names():
+                clips.setdefault(name, {})["smplx"] = f"{f}#{name}"
+    return dict(sorted(clips.items()))
+
+
+class Gallery:
+    """Browse many clips in one viser session.
+
+    Players (and so the SMPL-X body model and robot geometry) are built once.
+    A clip is decoded (FK, vertex cache) only when selected, and decoded
+    clips are kept in a ClipCache.
+    """
+
+    def __init__(self, server, clips: dict, smplx_player=None, robot_player=None, fps=None,
+                 smplx_precompute: bool = False, smplx_cache_dir: Optional[Path] = None,
+                 max_bytes: int = 2 * 1024 ** 3):
+        self.server = server
+        self.clips = clips
+        self.players = {"smplx": smplx_player, "robot": robot_player}
+        self.fps = fps
+        self.smplx_precompute = smplx_precompute
+        self.smplx_cache_dir = smplx_cache_dir
+        self.cache = ClipCache(max_bytes)
+
+        self.names = list(clips)
+        self.requested = self.names[0]
+        self.scheduler = None
+
+        self.dropdown = server.gui.add_dropdown("Clip", options=tuple(self.names), initial_value=self.names[0])
+        prev_button = server.gui.add_button("Previous")
+        next_button = server.gui.add_button("Next")
+        self.status = server.gui.add_text("Playback", initial_value="", disabled=True)
+        self.cache_status = server.gui.add_text("Cache", initial_value="", disabled=True)
+
+        @self.dropdown.on_update
+        def _(_):
+            self.select(self.dropdown.value)
+
+        @prev_button.on_click
+        def _(_):
+            name = self.names[(self.names.index(self.dropdown.value) - 1) % len(self.names)]
+            self.dropdown.value = name
+            self.select(name)
+
+        @next_button.on_click
+        def _(_):
+            name = self.names[(self.names.index(self.dropdown.value) + 1) % len(self.names)]
+            self.dropdown.value = name
+            self.select(name)
+
+    def select(self, name: str):
+        """Called from GUI callbacks: the main loop loads the clip once playback stops."""
+        self.requested = name
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def _load(self, kind: str, player, source):
+        state = self.cache.get((kind, source))
+        if state is not None:
+            player.set_anim_state(state)
+            return
+        if kind == "smplx":
+            player.load_anim(source, precompute=self.smplx_precompute, cache_dir=self.smplx_cache_dir)
+        else:
+            player.load_anim(source)
+        state = player.anim_state()
+        self.cache.put((kind, source), state, state_nbytes(state))
+
+    def load(self, name: str):
+        active = []
+        for kind, player in self.players.items():
+            if player is None:
+                continue
+            source = self.clips[name].get(kind)
+            player.root.visible = source is not None
+            if source is not None:
+                self._load(kind, player, source)
+                active.append(player)
+        self.cache_status.value = f"{len(self.cache.entries)} clips, {self.cache.nbytes / 1024 ** 2:.0f} MB"
+        return active
+
+    def run(self):
+        while True:
+            if self.requested is None:
+                time.sleep(0.05)
+                continue
+            name, self.requested = self.requested, None
+            active = self.load(name)
+            if not active:
+                continue
+            self.scheduler = PlaybackScheduler(active, fps=self.fps, loop=True, status=self.status)
+            if self.requested is None:
+                self.scheduler.run()
+
+
+def play_gallery(fps, gmr_dir=None, cvt_dir=None, smplx_path=None, robot_path=None, smplx_precompute=False,
+                 cache_dir=None, target_faces=None, max_mb=2048):
+    clips = list_clips(gmr_dir if robot_path else None, cvt_dir if smplx_path else None)
+    if not clips:
+        raise FileNotFoundError(f"no clips found in {gmr_dir} / {cvt_dir}")
+    print(f"[Gallery] {len(clips)} clips")
+
+    server = viser.ViserServer()
+    server.scene.set_up_direction("+y")
+    server.scene.add_grid("/grid", plane="xz")
+
+    smplx_player = None
+    if smplx_path:
+        smplx_player = SMPLXViserPlayer(smplx_model_path=Path(smplx_path), server=server)
+        smplx_player.set_position([0,0,0])
+
+    robot_player = None
+    if robot_path:
+        robot_player = MJCFViserPlayer(
+            xml_path=robot_path,
+            server=server,
+            geom_cache_dir=Path(cache_dir) / "geoms" if cache_dir else None,
+            target_faces=target_faces,
+        )
+        robot_player.set_position([1,0.7,0])
+
+    gallery = Gallery(
+        server, clips, smplx_player, robot_player, fps=fps,
+        smplx_precompute=smplx_precompute,
+        smplx_cache_dir=Path(cache_dir) / "smplx_verts" if cache_dir else None,
+        max_bytes=int(max_mb * 1024 ** 2),
+    )
+    gallery.run()
@@ -1,9 +1,9 @@
 import argparse
 import viser
-import time
 
 from .robot_viser import MJCFViserPlayer
 from .smplx_viser import SMPLXViserPlayer
+from .playback import PlaybackScheduler
 
 from pathlib import Path
 
@@ -26,20 +26,29 @@ def parse_args():
 
     return ap.parse_args()
 
-def play(fps, smplx_path = None, smplx_motion  = None, robot_path  = None, robot_motion  = None):
+def play(fps, smplx_path = None, smplx_motion  = None, robot_path  = None, robot_motion  = None, smplx_precompute = False, cache_dir = None, target_faces = None):
     cmp = viser.ViserServer()
     cmp.scene.set_up_direction("+y")
     cmp.scene.add_grid("/grid", plane="xz")
     
     if smplx_path and smplx_motion:
         smplx_player = SMPLXViserPlayer(smplx_model_path=smplx_path, server=cmp)
-        smplx_player.load_anim(smplx_motion)
+        smplx_player.load_anim(
+            smplx_motion,
+            precompute=smplx_precompute,
+            cache_dir=Path(cache_dir) / "smplx_verts" if cache_dir else None,
+        )
         smplx_player.set_position([0,0,0])
     else:
         smplx_player = None
 
     if robot_path and robot_motion:
-        robot_player = MJCFViserPlayer(xml_path=robot_path, server=cmp)
+        robot_player = MJCFViserPlayer(
+            xml_path=robot_path,
+            server=cmp,
+            geom_cache_dir=Path(cache_dir) / "geoms" if cache_dir else None,
+            target_faces=target_faces,
+        )
         robot_player.load_anim(robot_motion)
         robot_player.set_position([1,0.7,0])
     else:
@@ -51,35 +60,9 @@ def play(fps, smplx_path = None, smplx_motion  = None, robot_path  = None, robot
     if robot_player:
         robot_player.server = cmp
 
-    dt = 1.0 / fps
-    loop = True
-
-    while True:
-        t0 = time.time()
-
-        if robot_player:
-            robot_player.get_frame(robot_player.cur_frame)
-            robot_player.cur_frame += 1
-
-            if robot_player.cur_frame >= robot_player.T:
-                if loop:
-                    robot_player.cur_frame = 0
-                else:
-                    break
-        
-        if smplx_player:
-            smplx_player.get_frame(smplx_player.cur_frame)
-            smplx_player.cur_frame += 1
-
-            if smplx_player.cur_frame >= smplx_player.T:
-                if loop:
-                    smplx_player.cur_frame = 0
-                else:
-                    break
-
-        sleep = dt - (time.time() - t0)
-        if sleep > 0:
-            time.sleep(sleep)
+    # one clock for both players: frames are picked by elapsed time, late frames are dropped
+    scheduler = PlaybackScheduler([smplx_player, robot_player], fps=fps, loop=True, server=cmp)
+    scheduler.run()
 
 def main():
     args = parse_args()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PlaybackScheduler:
+    """Drives several players from one monotonic clock.
+
+    Tick k is due at start + k / fps. The motion time of a tick is mapped
+    to a fractional frame index per player (using that player's own fps),
+    so players stay in sync and playback does not drift when a frame is
+    slow. Ticks that are already late are dropped instead of queued. The
+    next frame is prepared on a background thread while the current one
+    is sent to the scene.
+
+    Players implement prepare_frame(frame: float) -> payload, called off
+    the main thread, and apply_frame(payload), which updates the scene.
+    """
+
+    def __init__(self, players, fps=None, loop: bool = True, server=None, status=None):
+        self.players = [p for p in players if p is not None]
+        self.fps = float(fps) if fps else max(float(p.fps) for p in self.players)
+        self.loop = loop
+        # the longest clip sets the loop length; shorter ones hold their last frame
+        self.duration = max(p.T / float(p.fps) for p in self.players)
+
+        self.shown = 0
+        self.dropped = 0
+        self.achieved_fps = 0.0
+        # cleared by stop(), which may come before run() starts
+        self.running = True
+
+        # a status text field to reuse, else one is added when a server is given
+        self.status = status
+        if status is None and server is not None:
+            self.status = server.gui.add_text("Playback", initial_value="", disabled=True)
+
+    def motion_time(self, tick: int):
+        """Motion time in seconds of a tick, or None once a non-looping clip has ended."""
+        t = tick / self.fps
+        if t >= self.duration:
+            if not self.loop:
+                return None
+            t %= self.duration
+        return t
+
+    def _prepare(self, t: float):
+        payloads = []
+        for p in self.players:
+            frame = min(t * float(p.fps), p.T - 1)
+            p.cur_frame = int(frame)
+            payloads.append(p.prepare_frame(frame))
+        return payloads
+
+    def _report(self):
+        if self.status is not None:
+            self.status.value = (f"{self.achieved_fps:.1f} / {self.fps:.1f} fps, "
+                                 f"{self.dropped} dropped")
+
+    def stop(self):
+        """Make run() return after the current tick; safe to call from a GUI callback."""
+        self.running = False
+
+    def run(self):
+        dt = 1.0 / self.fps
+        start = time.monotonic()
+        window_start, window_shown = start, 0
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            tick = 0
+            pending = pool.submit(self._prepare, self.motion_time(tick))
+            while pending is not None and self.running:
+                payloads = pending.result()
+
+                # wait until this tick is due
+                delay = start + tick * dt - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                # pick the next tick now so its frame is prepared while this one is sent
+                now = time.monotonic()
+                next_tick = max(tick + 1, int((now - start) / dt) + 1)
+                self.dropped += next_tick - tick - 1
+                t = self.motion_time(next_tick)
+                pending = pool.submit(self._prepare, t) if t is not None else None
+
+                for p, payload in zip(self.players, payloads):
+                    p.apply_frame(payload)
+                self.shown += 1
+                window_shown += 1
+                tick = next_tick
+
+                now = time.monotonic()
+                if now - window_start >= 1.0:
+                    self.achieved_fps = window_shown / (now - window_start)
+                    window_start, window_shown = now, 0
+                    self._report()
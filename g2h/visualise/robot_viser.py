@@ -1,24 +1,15 @@
 from __future__ import annotations
 import time
-import pickle
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
-import trimesh
 import viser
-import xml.etree.ElementTree as ET
 from scipy.spatial.transform import Rotation as R
 
-def quat_wxyz_to_xyzw(q):
-    return np.array([q[1], q[2], q[3], q[0]], dtype=np.float32)
-
-def parse_floats(s, n, default):
-    if s is None:
-        return np.asarray(default, dtype=np.float32)
-    arr = np.fromstring(s, sep=" ", dtype=np.float32)
-    assert arr.size == n
-    return arr
+from ..kinematics import KinematicsModelLite
+from ..geometry import load_robot_visual_geoms, load_visual_geoms_cached
+from ..motion_store import load_robot_motion
 
 T_ZUP_TO_YUP = np.array(
     [[1, 0, 0],
@@ -27,144 +18,13 @@ T_ZUP_TO_YUP = np.array(
     dtype=np.float32
 )
 
-def load_robot_visual_geoms(xml_path: Path):
-    tree = ET.parse(str(xml_path))
-    root = tree.getroot()
-
-    compiler = root.find("compiler")
-    meshdir = compiler.attrib.get("meshdir", "") if compiler is not None else ""
-    mesh_base = (xml_path.parent / meshdir).resolve()
-
-    asset_mesh = {}
-    asset = root.find("asset")
-    for m in asset.findall("mesh"):
-        name = m.attrib["name"]
-        file = m.attrib["file"]
-        scale = parse_floats(m.attrib.get("scale"), 3, (1,1,1))
-        asset_mesh[name] = (mesh_base / file, scale)
-
-    body_geoms = {}
-
-    def visit(body):
-        name = body.attrib.get("name", "")
-        geoms = []
-
-        for g in body.findall("geom"):
-            if g.attrib.get("type") != "mesh":
-                continue
-
-            mesh_name = g.attrib["mesh"]
-            path, scale = asset_mesh[mesh_name]
-            mesh = trimesh.load(path, force="mesh")
-            mesh.vertices *= scale
-            mesh.fix_normals()
-
-            pos = parse_floats(g.attrib.get("pos"), 3, (0,0,0))
-            quat = quat_wxyz_to_xyzw(
-                parse_floats(g.attrib.get("quat"), 4, (1,0,0,0))
-            )
-
-            T = np.eye(4)
-            T[:3,:3] = R.from_quat(quat).as_matrix()
-            T[:3, 3] = pos
-            mesh.apply_transform(T)
-
-            rgba = parse_floats(g.attrib.get("rgba"), 4, (0.7,0.7,0.7,1))
-            color = tuple((rgba[:3] * 255).astype(int))
-            mesh.visual = trimesh.visual.ColorVisuals(mesh, face_colors=[*color,255])
-
-            geoms.append(mesh)
-
-        if geoms:
-            body_geoms[name] = geoms
-
-        for c in body.findall("body"):
-            visit(c)
-
-    worldbody = root.find("worldbody")
-    visit(worldbody.find("body"))
-    return body_geoms
-
-class KinematicsModelLite:
-    def __init__(self, xml_path):
-        self.body_names = []
-        self.parents = []
-        self.local_pos = []
-        self.local_quat = []
-        self.joint_axes = []
-        self.joint_dofs = []
-
-        self._parse(xml_path)
-        self.num_dof = sum(self.joint_dofs)
-
-    def _parse(self, xml_path):
-        tree = ET.parse(str(xml_path))
-        root = tree.getroot()
-        world = root.find("worldbody")
-        body0 = world.find("body")
-
-        def dfs(body, parent):
-            idx = len(self.body_names)
-            self.body_names.append(body.attrib.get("name", f"body_{idx}"))
-            self.parents.append(parent)
-
-            self.local_pos.append(parse_floats(body.attrib.get("pos"), 3, (0,0,0)))
-            self.local_quat.append(
-                quat_wxyz_to_xyzw(
-                    parse_floats(body.attrib.get("quat"), 4, (1,0,0,0))
-                )
-            )
-
-            joints = body.findall("joint")
-            if len(joints) == 1:
-                axis = parse_floats(joints[0].attrib.get("axis"), 3, (0,0,1))
-                self.joint_axes.append(axis)
-                self.joint_dofs.append(1)
-            else:
-                self.joint_axes.append(None)
-                self.joint_dofs.append(0)
-
-            for c in body.findall("body"):
-                dfs(c, idx)
-
-        dfs(body0, -1)
-
-    def forward(self, root_pos, root_rot, dof):
-        N = root_pos.shape[0]
-        B = len(self.body_names)
-
-        pos = np.zeros((N,B,3))
-        rot = np.zeros((N,B,4))
-        pos[:,0] = root_pos
-        rot[:,0] = root_rot
-
-        di = 0
-        for i in range(1,B):
-            p = self.parents[i]
-            lp = self.local_pos[i]
-            lq = self.local_quat[i]
-
-            if self.joint_dofs[i] == 1:
-                axis = self.joint_axes[i]
-                ang = dof[:,di]
-                di += 1
-                dq = R.from_rotvec(axis * ang[:,None]).as_quat()
-            else:
-                dq = np.tile([0,0,0,1], (N,1))
-
-            rot[:,i] = (
-                R.from_quat(rot[:,p]) *
-                R.from_quat(lq) *
-                R.from_quat(dq)
-            ).as_quat()
-
-            pos[:,i] = pos[:,p] + R.from_quat(rot[:,p]).apply(lp)
-
-        return pos, rot
-
 class MJCFViserPlayer:
-    def __init__(self, xml_path, server = None):
+    def __init__(self, xml_path, server = None, geom_cache_dir = None, target_faces = None, update_eps = 1e-4):
         self.xml_path = xml_path
+        # bodies that moved less than this (position in m, quaternion component) are not re-sent
+        self.update_eps = update_eps
+        self.geom_cache_dir = geom_cache_dir
+        self.target_faces = target_faces
 
         self.server = server
     
@@ -175,14 +35,22 @@ class MJCFViserPlayer:
 
         self.pos = None
         self.rot = None
+        self.wxyz = None
         self.T = 0
         self.fps = 30
         self.cur_frame = 0
 
         self._load_visuals()
 
+        # kinematic body index of each frame handle, and the pose last sent for it
+        names = [n for n in self.kin.body_names if n in self.frames]
+        self.body_idx = np.array([self.kin.body_names.index(n) for n in names], dtype=np.int64)
+        self.handles = [self.frames[n] for n in names]
+        self.sent_pos = None
+        self.sent_wxyz = None
+
     def _load_visuals(self):
-        geoms = load_robot_visual_geoms(self.xml_path)
+        geoms = load_visual_geoms_cached(self.xml_path, self.geom_cache_dir, self.target_faces)
 
         for name in geoms:
             f = self.server.scene.add_frame(f"/robot_root/{name}",show_axes=False)
@@ -194,8 +62,8 @@ class MJCFViserPlayer:
                 )
 
     def load_anim(self, motion_pkl: Path):
-        with open(motion_pkl, "rb") as f:
-            motion = pickle.load(f)
+        """Load a GMR .pkl, a robot .g2hm or 'shard.g2hm#clip'."""
+        motion = load_robot_motion(motion_pkl)
 
         root_pos = motion["root_pos"]
         root_rot = motion["root_rot"]
@@ -211,17 +79,69 @@ class MJCFViserPlayer:
 
         self.pos = pos
         self.rot = rot
+        # viser wants wxyz; convert once instead of per frame
+        self.wxyz = np.roll(rot, 1, axis=-1)
         self.T = pos.shape[0]
         self.cur_frame = 0
+        self.sent_pos = None
+        self.sent_wxyz = None
+
+    def anim_state(self) -> dict:
+        """The decoded animation, to keep around and restore with set_anim_state."""
+        return {"pos": self.pos, "rot": self.rot, "wxyz": self.wxyz, "T": self.T, "fps": self.fps}
+
+    def set_anim_state(self, state: dict):
+        self.pos = state["pos"]
+        self.rot = state["rot"]
+        self.wxyz = state["wxyz"]
+        self.T = state["T"]
+        self.fps = state["fps"]
+        self.cur_frame = 0
+        self.sent_pos = None
+        self.sent_wxyz = None
+
+    def prepare_frame(self, frame: float):
+        """Positions and wxyz rotations of the shown bodies at a possibly fractional frame."""
+        i = int(frame)
+        a = frame - i
+        idx = self.body_idx
+        if a <= 0 or i + 1 >= self.T:
+            return self.pos[i, idx], self.wxyz[i, idx]
+
+        pos = (1 - a) * self.pos[i, idx] + a * self.pos[i + 1, idx]
+        q0, q1 = self.wxyz[i, idx], self.wxyz[i + 1, idx]
+        q1 = np.where(np.sum(q0 * q1, -1, keepdims=True) < 0, -q1, q1)
+        wxyz = (1 - a) * q0 + a * q1
+        wxyz /= np.linalg.norm(wxyz, axis=-1, keepdims=True)
+        return pos, wxyz
+
+    def apply_frame(self, payload):
+        """Send the bodies that moved since the last update, as one atomic batch."""
+        pos, wxyz = payload
+        if self.sent_pos is None:
+            moved = np.ones(len(self.handles), dtype=bool)
+        else:
+            moved = (np.abs(pos - self.sent_pos).max(-1) > self.update_eps) | \
+                    (np.abs(wxyz - self.sent_wxyz).max(-1) > self.update_eps)
+
+        idx = np.flatnonzero(moved)
+        if len(idx) == 0:
+            return
+        with self.server.atomic():
+            for k in idx:
+                self.handles[k].position = pos[k]
+                self.handles[k].wxyz = wxyz[k]
+
+        if self.sent_pos is None:
+            self.sent_pos, self.sent_wxyz = pos.copy(), wxyz.copy()
+        else:
+            self.sent_pos[idx] = pos[idx]
+            self.sent_wxyz[idx] = wxyz[idx]
 
     def get_frame(self, frame: Optional[int] = None):
         if frame is None:
             frame = self.cur_frame
-
-        for i, name in enumerate(self.kin.body_names):
-            if name in self.frames:
-                self.frames[name].position = self.pos[frame, i]
-                self.frames[name].wxyz = np.roll(self.rot[frame, i], 1)
+        self.apply_frame(self.prepare_frame(frame))
 
     def get_frame_count(self):
         return self.T
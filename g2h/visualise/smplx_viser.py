@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import time
 from pathlib import Path
 from typing import Optional
@@ -9,23 +10,30 @@ import torch
 import viser
 import smplx
 
+from ..motion_store import motion_digest, open_motion
+
 
 class SMPLXViserPlayer:
     def __init__(
         self,
         smplx_model_path: Path,
         server = None,
-        device: torch.device = torch.device("cpu")
+        device: torch.device = torch.device("cpu"),
+        model = None
     ):
         self.device = device
 
-        self.model = smplx.create(
-            model_path=str(smplx_model_path.parent),
-            model_type="smplx",
-            gender="neutral",
-            use_pca=False,
-            batch_size=1,
-        ).to(device)
+        # an already built body model (e.g. a stub in benchmarks) skips smplx.create
+        if model is None:
+            model = smplx.create(
+                model_path=str(smplx_model_path.parent),
+                model_type="smplx",
+                gender="neutral",
+                use_pca=False,
+                batch_size=1,
+            )
+        self.model = model.to(device)
+        self._model_digest = None
 
         self.server = server
     
@@ -49,25 +57,41 @@ class SMPLXViserPlayer:
         self.pose_eye = None
         self.trans = None
 
-    def load_anim(self, motion_npz: Path):
-        """Load AMASS / SMPL-X motion"""
-        data = np.load(motion_npz, allow_pickle=True)
+        # precomputed (T, V, 3) vertices, possibly memory-mapped
+        self.vertices = None
+
+    def load_anim(
+        self,
+        motion_npz: Path,
+        precompute: bool = False,
+        cache_dir: Optional[Path] = None,
+        dtype=np.float16,
+        batch_size: int = 256,
+    ):
+        """Load AMASS / SMPL-X motion
+
+        With precompute=True all frames are skinned up front in batches and
+        get_frame only slices the result. With a cache_dir the vertices are
+        kept in a memory-mapped sidecar file keyed by the motion file hash.
+        """
+        data = open_motion(motion_npz)
 
         self.fps = int(data["mocap_frame_rate"])
         self.T = data["root_orient"].shape[0]
         self.cur_frame = 0
 
+        # np.array copies out of read-only memory maps before handing over to torch
         self.betas = torch.tensor(
-            data["betas"],
+            np.array(data["betas"]),
             device=self.device,
         ).float()
 
-        self.root_orient = torch.tensor(data["root_orient"], device=self.device).float()
-        self.pose_body = torch.tensor(data["pose_body"], device=self.device).float()
-        self.pose_hand = torch.tensor(data["pose_hand"], device=self.device).float()
-        self.pose_jaw = torch.tensor(data["pose_jaw"], device=self.device).float()
-        self.pose_eye = torch.tensor(data["pose_eye"], device=self.device).float()
-        self.trans = torch.tensor(data["trans"], device=self.device).float()
+        self.root_orient = torch.tensor(np.array(data["root_orient"]), device=self.device).float()
+        self.pose_body = torch.tensor(np.array(data["pose_body"]), device=self.device).float()
+        self.pose_hand = torch.tensor(np.array(data["pose_hand"]), device=self.device).float()
+        self.pose_jaw = torch.tensor(np.array(data["pose_jaw"]), device=self.device).float()
+        self.pose_eye = torch.tensor(np.array(data["pose_eye"]), device=self.device).float()
+        self.trans = torch.tensor(np.array(data["trans"]), device=self.device).float()
 
         gender = str(data["gender"])
         self.model.gender = gender
@@ -91,25 +115,123 @@ class SMPLXViserPlayer:
         else:
             self.mesh.vertices = out.vertices[0].cpu().numpy()
 
-    def get_frame(self, frame: Optional[int] = None):
-        """Update mesh to a specific frame (or current frame)"""
-        if frame is None:
-            frame = self.cur_frame
-
+        self.vertices = None
+        if precompute:
+            self._precompute(motion_npz, cache_dir, dtype, batch_size)
+
+    def model_digest(self) -> str:
+        """SHA1 of the body model's parameters, so another model file never reuses cached vertices."""
+        if self._model_digest is None:
+            h = hashlib.sha1()
+            for name, t in sorted(self.model.state_dict().items()):
+                h.update(name.encode())
+                h.update(t.detach().cpu().numpy().tobytes())
+            h.update(f"{self.model.num_betas}|{self.model.num_expression_coeffs}".encode())
+            self._model_digest = h.hexdigest()
+        return self._model_digest
+
+    def _cache_path(self, motion_npz: Path, cache_dir: Path, dtype) -> Path:
+        # a container clip hashes only its own bytes, not the whole shard
+        h = hashlib.sha1(motion_digest(motion_npz).encode())
+        h.update(f"{self.model_digest()}|{self.model.gender}|{np.dtype(dtype).name}".encode())
+        return Path(cache_dir) / f"{h.hexdigest()}.verts.npy"
+
+    def _skin(self, start: int, end: int) -> np.ndarray:
+        B = end - start
         with torch.no_grad():
             out = self.model(
-                betas=self.betas.unsqueeze(0),
-                global_orient=self.root_orient[frame].unsqueeze(0),
-                body_pose=self.pose_body[frame].unsqueeze(0),
-                left_hand_pose=self.pose_hand[frame, :45].unsqueeze(0),
-                right_hand_pose=self.pose_hand[frame, 45:].unsqueeze(0),
-                jaw_pose=self.pose_jaw[frame].unsqueeze(0),
-                leye_pose=self.pose_eye[frame, :3].unsqueeze(0),
-                reye_pose=self.pose_eye[frame, 3:].unsqueeze(0),
-                transl=self.trans[frame].unsqueeze(0),
+                betas=self.betas.unsqueeze(0).expand(B, -1),
+                global_orient=self.root_orient[start:end],
+                body_pose=self.pose_body[start:end],
+                left_hand_pose=self.pose_hand[start:end, :45],
+                right_hand_pose=self.pose_hand[start:end, 45:],
+                jaw_pose=self.pose_jaw[start:end],
+                leye_pose=self.pose_eye[start:end, :3],
+                reye_pose=self.pose_eye[start:end, 3:],
+                expression=torch.zeros(B, self.model.num_expression_coeffs, device=self.device),
+                transl=self.trans[start:end],
             )
+        return out.vertices.cpu().numpy()
 
-        self.mesh.vertices = out.vertices[0].cpu().numpy()
+    def _precompute(self, motion_npz: Path, cache_dir: Optional[Path], dtype, batch_size: int):
+        t0 = time.time()
+        shape = (self.T, self.model.get_num_verts(), 3)
+
+        path = self._cache_path(motion_npz, cache_dir, dtype) if cache_dir is not None else None
+        if path is not None and path.exists():
+            self.vertices = np.load(path, mmap_mode="r")
+            source = "cache"
+        else:
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                verts = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+            else:
+                verts = np.empty(shape, dtype=dtype)
+
+            for start in range(0, self.T, batch_size):
+                end = min(start + batch_size, self.T)
+                verts[start:end] = self._skin(start, end)
+
+            if path is not None:
+                verts.flush()
+                del verts
+                tmp.replace(path)
+                self.vertices = np.load(path, mmap_mode="r")
+            else:
+                self.vertices = verts
+            source = "skinned"
+
+        print(f"[SMPL-X] {source} {self.T} frames in {time.time() - t0:.2f}s, "
+              f"{self.vertices.nbytes / 1024 ** 2:.1f} MB ({np.dtype(dtype).name})")
+
+    def anim_state(self) -> dict:
+        """The decoded animation, to keep around and restore with set_anim_state."""
+        return {
+            "fps": self.fps, "T": self.T, "gender": self.model.gender,
+            "betas": self.betas, "root_orient": self.root_orient, "pose_body": self.pose_body,
+            "pose_hand": self.pose_hand, "pose_jaw": self.pose_jaw, "pose_eye": self.pose_eye,
+            "trans": self.trans, "vertices": self.vertices,
+        }
+
+    def set_anim_state(self, state: dict):
+        self.fps = state["fps"]
+        self.T = state["T"]
+        self.model.gender = state["gender"]
+        self.betas = state["betas"]
+        self.root_orient = state["root_orient"]
+        self.pose_body = state["pose_body"]
+        self.pose_hand = state["pose_hand"]
+        self.pose_jaw = state["pose_jaw"]
+        self.pose_eye = state["pose_eye"]
+        self.trans = state["trans"]
+        self.vertices = state["vertices"]
+        self.cur_frame = 0
+
+    def prepare_frame(self, frame: float) -> np.ndarray:
+        """Vertices at a possibly fractional frame.
+
+        Precomputed vertices are interpolated; otherwise the nearest frame is skinned.
+        """
+        if self.vertices is None:
+            i = min(int(round(frame)), self.T - 1)
+            return self._skin(i, i + 1)[0]
+
+        i = int(frame)
+        a = frame - i
+        v = np.asarray(self.vertices[i], dtype=np.float32)
+        if a > 0 and i + 1 < self.T:
+            v = (1 - a) * v + a * np.asarray(self.vertices[i + 1], dtype=np.float32)
+        return v
+
+    def apply_frame(self, vertices: np.ndarray):
+        self.mesh.vertices = vertices
+
+    def get_frame(self, frame: Optional[int] = None):
+        """Update mesh to a specific frame (or current frame)"""
+        if frame is None:
+            frame = self.cur_frame
+        self.apply_frame(self.prepare_frame(frame))
 
     def get_frame_count(self) -> int:
         return self.T
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Index pipeline outputs and query them.
+
+    # scan (incrementally) and index the outputs of a run
+    python scripts/catalog.py --update --output_dir outputs/t2m --cvt_dir outputs/cvt --gmr_dir outputs/gmr
+
+    # all G1 clips longer than 5 s whose prompt mentions "jump"
+    python scripts/catalog.py --robot unitree_g1 --min_duration 5 --prompt jump
+
+    # clips with little foot slip, as a path list for other tools
+    python scripts/catalog.py --kind robot --where "q.foot_slip_p95 < 0.1" --format paths
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.catalog import Catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Motion Catalog",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--db", default="outputs/catalog.sqlite", help="catalog database.")
+
+    env_group = parser.add_argument_group("Update Setting")
+    env_group.add_argument("--update", action="store_true", help="index new and changed files before querying.")
+    env_group.add_argument("--output_dir", default=None, help="text to motion output directory (clips in <output_dir>/prompts_subset).")
+    env_group.add_argument("--cvt_dir", default=None, help="directory of converted smplx files.")
+    env_group.add_argument("--gmr_dir", default=None, help="directory of retargeted robot files.")
+    env_group.add_argument("--input_text_dir", default=None, help="prompt json, for prompts missing from the generate manifest.")
+    env_group.add_argument("--robot_type", default=None, help="robot of a single-robot gmr_dir whose files do not record it.")
+    env_group.add_argument("--no_checksums", action="store_true", help="skip hashing new files.")
+
+    env_group = parser.add_argument_group("Query Setting")
+    env_group.add_argument("--kind", default=None, choices=["t2m", "smplx", "robot"], help="stage of the clips.")
+    env_group.add_argument("--robot", default=None, help="robot type (implies --kind robot).")
+    env_group.add_argument("--prompt", default=None, help="case-insensitive substring of the prompt.")
+    env_group.add_argument("--model", default=None, help="text to motion model variant.")
+    env_group.add_argument("--min_duration", type=float, default=None, help="minimum clip length in seconds.")
+    env_group.add_argument("--max_duration", type=float, default=None, help="maximum clip length in seconds.")
+    env_group.add_argument("--where", default=None, help="extra SQL condition on clips (c.*) and qa (q.*) columns.")
+    env_group.add_argument("--order_by", default="c.name", help="SQL order, e.g. 'q.foot_slip_p95 DESC'.")
+    env_group.add_argument("--limit", type=int, default=None, help="return at most this many clips.")
+    env_group.add_argument("--format", default="table", choices=["table", "paths", "json"], help="output format.")
+
+    args = parser.parse_args()
+
+    with Catalog(args.db) as catalog:
+        if args.update:
+            catalog.update(
+                output_dir=args.output_dir,
+                cvt_dir=args.cvt_dir,
+                gmr_dir=args.gmr_dir,
+                input_text_dir=args.input_text_dir,
+                robot=args.robot_type,
+                checksums=not args.no_checksums,
+            )
+
+        t0 = time.perf_counter()
+        rows = catalog.query(
+            kind="robot" if args.robot and not args.kind else args.kind,
+            robot=args.robot,
+            prompt=args.prompt,
+            model=args.model,
+            min_duration=args.min_duration,
+            max_duration=args.max_duration,
+            where=args.where,
+            order_by=args.order_by,
+            limit=args.limit,
+        )
+        elapsed = time.perf_counter() - t0
+
+        if args.format == "paths":
+            for r in rows:
+                print(r["path"])
+            return
+        if args.format == "json":
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+            return
+
+        for r in rows:
+            duration = f"{r['duration']:.1f}s" if r["duration"] is not None else "-"
+            print(f"{r['kind']:<6}{r['robot'] or '-':<24}{r['frames'] or 0:>7}{duration:>9}  {r['path']}  {r['prompt'] or ''}")
+        print(f"\n{len(rows)} clips in {elapsed * 1000:.1f} ms")
+        for (kind, robot), (clips, seconds) in sorted(catalog.counts().items(), key=str):
+            print(f"  {kind:<6}{robot or '-':<24}{clips:>7} clips {seconds / 60:>8.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Pack converted SMPL-X .npz files into memory-mappable .g2hm containers.
+
+By default every clip becomes its own .g2hm next to its relative path in
+--tgt_folder. With --shard_size N, clips are grouped into shard_XXXXX.g2hm
+files of N clips each, readable as <shard>.g2hm#<clip>.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.motion_store import SUFFIX, smplx_npz_to_clip, write_store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack SMPL-X Motions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--src_folder", default="outputs/cvt", help="the directory of converted smplx npz files.")
+    parser.add_argument("--tgt_folder", default="outputs/cvt_packed", help="output directory of .g2hm files.")
+    parser.add_argument("--shard_size", type=int, default=0, help="clips per shard file, 0 writes one file per clip.")
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"], help="storage dtype of poses and trans.")
+
+    args = parser.parse_args()
+
+    src = Path(args.src_folder)
+    tgt = Path(args.tgt_folder)
+    dtype = np.dtype(args.dtype)
+    npz_files = sorted(src.rglob("*.npz"))
+
+    in_bytes = sum(f.stat().st_size for f in npz_files)
+    out_bytes = 0
+    if args.shard_size > 0:
+        for i in range(0, len(npz_files), args.shard_size):
+            chunk = npz_files[i:i + args.shard_size]
+            # clip names keep the relative path so shards stay unambiguous
+            clips = [
+                smplx_npz_to_clip(f, name=f.relative_to(src).with_suffix("").as_posix(), dtype=dtype)
+                for f in chunk
+            ]
+            out = write_store(tgt / f"shard_{i // args.shard_size:05d}{SUFFIX}", clips)
+            out_bytes += out.stat().st_size
+    else:
+        for f in npz_files:
+            out = write_store(tgt / f.relative_to(src).with_suffix(SUFFIX), [smplx_npz_to_clip(f, dtype=dtype)])
+            out_bytes += out.stat().st_size
+
+    print(f"Packed {len(npz_files)} clips: {in_bytes / 1024 ** 2:.1f} MB -> {out_bytes / 1024 ** 2:.1f} MB")
+    print(f"输出目录: {tgt}")
+
+
+if __name__ == "__main__":
+    main()
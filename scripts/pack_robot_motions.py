@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""
+Pack retargeted robot motions (.pkl from GMR) into .g2hm containers.
+
+Clips keep root_pos / root_rot as float32 and dof_pos in --dof_encoding;
+fps, frame count and robot type live in the header. By default every clip
+becomes its own .g2hm next to its relative path in --tgt_folder. With
+--shard_size N, clips are grouped into shard_XXXXX.g2hm files of N clips
+each, readable as <shard>.g2hm#<clip>.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.motion_store import DOF_ENCODINGS, SUFFIX, load_robot_motion, robot_motion_to_clip, write_store
+
+
+def pack(out_path, files, names, dof_encoding):
+    clips = [robot_motion_to_clip(load_robot_motion(f), n, dof_encoding) for f, n in zip(files, names)]
+    return write_store(out_path, clips).stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack Robot Motions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--src_folder", default="outputs/gmr", help="the directory of retargeted .pkl files.")
+    parser.add_argument("--tgt_folder", default="outputs/gmr_packed", help="output directory of .g2hm files.")
+    parser.add_argument("--shard_size", type=int, default=0, help="clips per shard file, 0 writes one file per clip.")
+    parser.add_argument("--dof_encoding", default="float32", choices=DOF_ENCODINGS, help="storage of dof_pos; q16 quantizes each dof's range to int16.")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of packing processes.")
+
+    args = parser.parse_args()
+
+    src = Path(args.src_folder)
+    tgt = Path(args.tgt_folder)
+    pkl_files = sorted(src.rglob("*.pkl"))
+
+    jobs = []
+    if args.shard_size > 0:
+        for i in range(0, len(pkl_files), args.shard_size):
+            chunk = pkl_files[i:i + args.shard_size]
+            # clip names keep the relative path so shards stay unambiguous
+            names = [f.relative_to(src).with_suffix("").as_posix() for f in chunk]
+            jobs.append((tgt / f"shard_{i // args.shard_size:05d}{SUFFIX}", chunk, names))
+    else:
+        jobs = [(tgt / f.relative_to(src).with_suffix(SUFFIX), [f], [f.stem]) for f in pkl_files]
+
+    in_bytes = sum(f.stat().st_size for f in pkl_files)
+    with ProcessPoolExecutor(max_workers=max(1, args.num_workers)) as pool:
+        futures = [pool.submit(pack, out, files, names, args.dof_encoding) for out, files, names in jobs]
+        out_bytes = sum(f.result() for f in futures)
+
+    print(f"Packed {len(pkl_files)} clips: {in_bytes / 1024 ** 2:.1f} MB -> {out_bytes / 1024 ** 2:.1f} MB")
+    print(f"输出目录: {tgt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,81 +11,818 @@ Step3. Retarget to humanoid
 """
 
 import argparse
+import os
 import sys
 import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import lru_cache, partial
 from pathlib import Path
 
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from g2h.config import PROJECT_ROOT,HYM_DIR, GMR_DIR, HYM_CHECKPOINT_DIR, PROMPT_FOLDER
-from g2h.utils import run_subprocess 
-from g2h.convert_smpl import convert_to_smplx
+from g2h.config import HYM_DIR, HYM_CHECKPOINT_DIR, PROMPT_FOLDER, ROBOT_XML_DICT
+from g2h.utils import Job, run_subprocesses
+from g2h.catalog import GENERATE_MANIFEST, update_catalog
+from g2h.convert_smpl import CONVERTER_VERSION, hym_to_smplx, load_hym_npz, save_smplx
+from g2h.manifest import Manifest, file_digest, fingerprint
+from g2h.stream import StreamingPipeline, watch_dir, tail_queue_file
+from g2h.prompts import load_prompts, subset_prompt_file
+from g2h.t2m_cache import GenerationCache
+from g2h.scheduler import schedule_prompts
+from g2h.retarget import check_robots, run_gmr
+from g2h.t2m_worker import T2MWorkerClient, unsupported_options
+from g2h.profiler import Profiler, count_frames, peak_rss_mb
+from g2h.motion_store import SUFFIX, list_motions
+from g2h.qa import METRICS, qa_clips, write_report
+from g2h.resample import resample_batch, resample_smplx
+from g2h.shards import LeaseKeeper, ShardQueue, default_worker_id, make_shards
+
+CONVERT_MANIFEST = "convert_manifest.jsonl"
+CONVERT_FPS = 30.0
+# how often finished generator outputs are looked for in the staging folder
+STAGING_POLL = 0.5
+
+def convert_fingerprint(resample=None) -> str:
+    # without resampling, keep the fingerprint older manifests were written with
+    if not resample:
+        return fingerprint(converter=CONVERTER_VERSION, frame_rate=CONVERT_FPS)
+    return fingerprint(converter=CONVERTER_VERSION, frame_rate=CONVERT_FPS, resample=resample)
+
+def convert_resample(args) -> dict:
+    """Resampling / trimming applied to converted clips; empty keeps them as converted."""
+    return {k: v for k, v in (("fps", args.smplx_fps), ("trim", args.trim_static)) if v is not None}
 
 def run_t2m(
     model_path : str,
     input_text_dir: Path,
     output_dir: Path,
     disable_duration_est : bool = False,
-    disable_rewrite : bool = False
+    disable_rewrite : bool = False,
+    num_procs : int = 1,
+    timeout : float = None,
+    batch_frames : int = 0,
+    log_dir : Path = None,
+    on_done = None
 ):  
-    
+    """Run local_infer.py over the prompts; on_done(ids) is called with the prompt ids of each process that exits cleanly."""
+
     script_path = HYM_DIR / "local_infer.py"
     model_path = HYM_CHECKPOINT_DIR / model_path
-    argv = [
-        "python",
-        str(script_path),
-        "--model_path",
-        str(model_path),
-        "--input_text_dir",
-        str(input_text_dir),
-        "--output_dir",
-        str(output_dir)
+
+    def argv(prompt_file):
+        cmd = [
+            "python",
+            str(script_path),
+            "--model_path",
+            str(model_path),
+            "--input_text_dir",
+            str(prompt_file),
+            "--output_dir",
+            str(output_dir)
+        ]
+        if disable_duration_est:
+            cmd.append("--disable_duration_est")
+        if disable_rewrite:
+            cmd.append("--disable_rewrite")
+        return cmd
+
+    prompts = load_prompts(input_text_dir)
+    log_dir = log_dir or Path(output_dir) / "logs"
+    if len(prompts) <= 1 or (num_procs <= 1 and not batch_frames):
+        return _run_t2m_jobs([Job("t2m", argv(input_text_dir), HYM_DIR)], {"t2m": [p["id"] for p in prompts]},
+                             num_procs, log_dir, timeout, on_done)
+
+    if batch_frames:
+        # only the prompt order changes: similar lengths run back to back, so the generator's own batches pad little
+        lanes, stats = schedule_prompts(prompts, num_procs, batch_frames)
+        print(f"[Schedule] {stats['prompts']} prompts ordered by estimated duration over {len(lanes)} processes")
+        lanes = [[pid for batch in lane for pid in batch["ids"]] for lane in lanes]
+    else:
+        lanes = list(make_shards(prompts, -(-len(prompts) // num_procs)).values())
+
+    # one local_infer.py per lane, each loading its own model
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs, lane_ids = [], {}
+        for k, ids in enumerate(lanes):
+            # same file name, the generator may derive its output folder from it
+            prompt_file = Path(tmp) / f"lane_{k:03d}" / Path(input_text_dir).name
+            subset_prompt_file(input_text_dir, ids, prompt_file)
+            jobs.append(Job(f"t2m_lane_{k:03d}", argv(prompt_file), HYM_DIR))
+            lane_ids[jobs[-1].name] = ids
+        return _run_t2m_jobs(jobs, lane_ids, num_procs, log_dir, timeout, on_done)
+
+def _run_t2m_jobs(jobs, job_ids, num_procs, log_dir, timeout, on_done):
+    """Every generator launch gets the same timeout, process group kill and log; a lone job also echoes its output."""
+    def done(result):
+        if on_done is not None and result.ok:
+            on_done(job_ids[result.name])
+
+    return run_subprocesses(jobs, num_procs, log_dir=log_dir, timeout=timeout, echo=len(jobs) == 1, on_done=done)
+
+def run_t2m_worker(
+    address: str,
+    input_text_dir: Path,
+    output_dir: Path,
+    disable_duration_est : bool = False,
+    disable_rewrite : bool = False,
+    on_done = None
+):
+    """Submit the prompt set to a running scripts/t2m_worker.py instead of spawning local_infer.py."""
+    options = {"disable_duration_est": disable_duration_est, "disable_rewrite": disable_rewrite}
+    unsupported = unsupported_options(options)
+    if unsupported:
+        # the worker generates prompts as written, so its outputs would not match local_infer.py's
+        raise RuntimeError(f"--t2m_worker cannot estimate durations or rewrite prompts, add --{' --'.join(unsupported)}")
+    client = T2MWorkerClient(address)
+    if not client.ping():
+        raise RuntimeError(f"No text to motion worker listening on {address}")
+
+    prompts = load_prompts(input_text_dir)
+    result = client.generate(prompts, output_dir, options=options)
+    if "error" in result:
+        raise RuntimeError(f"Text to motion worker: {result['error']}")
+    print(f"[Worker] generated {len(result['outputs'])} clips in {result['elapsed']:.1f}s")
+    for pid, error in result["errors"].items():
+        print(f"[Error] prompt {pid}: {error}")
+    if on_done is not None:
+        on_done([p["id"] for p in prompts if p["id"] not in result["errors"]])
+    return result
+
+def _generate(args, input_text_dir, output_dir, on_done=None):
+    if args.t2m_worker:
+        return run_t2m_worker(address=args.t2m_worker, input_text_dir=input_text_dir, output_dir=output_dir,
+                              disable_duration_est=args.disable_duration_est, disable_rewrite=args.disable_rewrite,
+                              on_done=on_done)
+    return run_t2m(model_path=args.t2m_model, input_text_dir=input_text_dir, output_dir=output_dir,
+                   disable_duration_est=args.disable_duration_est, disable_rewrite=args.disable_rewrite,
+                   num_procs=args.t2m_procs, timeout=args.job_timeout, batch_frames=args.t2m_batch_frames,
+                   log_dir=Path(args.output_dir) / "logs", on_done=on_done)
+
+@lru_cache(maxsize=None)
+def _worker_model(address: str):
+    info = T2MWorkerClient(address).info()
+    if info is None:
+        raise RuntimeError(f"No text to motion worker listening on {address}")
+    return info.get("model")
+
+def t2m_model_id(args):
+    """The model outputs come from: --t2m_model, or the checkpoint a --t2m_worker reports (None if it does not)."""
+    if args.t2m_worker:
+        return _worker_model(args.t2m_worker)
+    return args.t2m_model
+
+def _prompt_params(args, prompt: dict) -> dict:
+    # per-prompt settings such as duration or seed, plus generator flags that change the output;
+    # unset flags are left out so existing cache keys and fingerprints stay valid
+    params = {k: v for k, v in prompt.items() if k not in ("id", "text")}
+    for flag in ("disable_duration_est", "disable_rewrite"):
+        if getattr(args, flag, False):
+            params[flag] = True
+    return params
+
+def _generate_subset(args, ids, out_dir: Path, commit=None):
+    """Generate the prompts in `ids` in a private staging folder, moving each output into out_dir as it completes.
+
+    The generator never writes into out_dir, where files belong to other
+    prompts or are hard links into the generation cache. An output lands
+    once it is a complete npz whose size and mtime held for a poll, while
+    the generator keeps running, so stream mode can convert it right away.
+    commit(id, files) is called with the prompt's landed files each time one
+    lands, and with no files when its generator process ended without any;
+    clips that landed before their process failed are kept.
+    Returns (generator result, {id: output files}).
+    """
+    ids = list(ids)
+    staging = Path(tempfile.mkdtemp(dir=out_dir.parent, prefix=".t2m_")).resolve()
+    outputs = {}
+    landed = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def owner(f):
+        # longest match, so prompt "a" does not claim "a_b_000.npz"
+        match = [pid for pid in ids if f.name.startswith(f"{pid}_")]
+        return max(match, key=len) if match else None
+
+    def land_file(pid, f):
+        files = landed.setdefault(pid, [])
+        if not files:
+            # replace the prompt's previous outputs as a whole; unlinking never touches the cache copy
+            for old in out_dir.glob(f"{pid}_*.npz"):
+                old.unlink()
+        os.replace(f, out_dir / f.name)
+        files.append(out_dir / f.name)
+        if commit is not None:
+            commit(pid, list(files))
+
+    def poll():
+        stats = {}
+        while not stop.wait(STAGING_POLL):
+            for f in sorted((staging / PROMPT_FOLDER).glob("*.npz")):
+                try:
+                    st = f.stat()
+                except FileNotFoundError:
+                    continue
+                if stats.get(f) != (st.st_size, st.st_mtime_ns):
+                    stats[f] = (st.st_size, st.st_mtime_ns)
+                    continue
+                pid = owner(f)
+                # a half-written npz has no zip directory at its end yet
+                if pid is None or not zipfile.is_zipfile(f):
+                    continue
+                with lock:
+                    if f.exists():
+                        land_file(pid, f)
+
+    def land(done_ids):
+        done_ids = set(done_ids)
+        with lock:
+            for f in sorted((staging / PROMPT_FOLDER).glob("*.npz")):
+                if owner(f) in done_ids:
+                    land_file(owner(f), f)
+            for pid in done_ids:
+                outputs[pid] = landed.get(pid, [])
+                if not outputs[pid] and commit is not None:
+                    commit(pid, [])
+
+    poller = threading.Thread(target=poll, daemon=True)
+    poller.start()
+    try:
+        if ids == [p["id"] for p in load_prompts(args.input_text_dir)]:
+            prompt_file = args.input_text_dir
+        else:
+            # keep the file name, the generator may derive its output folder from it
+            prompt_file = staging / "prompts" / Path(args.input_text_dir).name
+            subset_prompt_file(args.input_text_dir, ids, prompt_file)
+        result = _generate(args, prompt_file, staging, land)
+    finally:
+        stop.set()
+        poller.join()
+        for pid in ids:
+            if pid not in outputs:
+                outputs[pid] = landed.get(pid, [])
+                if not outputs[pid] and commit is not None:
+                    commit(pid, [])
+        shutil.rmtree(staging, ignore_errors=True)
+    return result, outputs
+
+def run_t2m_cached(args, cache: GenerationCache, prompts, commit=None):
+    """Serve prompts from the generation cache and only generate the misses."""
+    out_dir = Path(args.output_dir) / PROMPT_FOLDER
+    model = t2m_model_id(args)
+    if model is None:
+        raise RuntimeError("--t2m_cache needs to know the generating model, but the --t2m_worker does not report it")
+
+    misses = {}
+    for prompt in prompts:
+        key = cache.key(prompt["text"], model, _prompt_params(args, prompt))
+        files = cache.get(key, out_dir, prompt["id"])
+        if files is None:
+            misses[prompt["id"]] = key
+        elif commit is not None:
+            commit(prompt["id"], files)
+
+    def land(pid, files):
+        cache.put(misses[pid], files, pid, {"id": pid, "model": model})
+        if commit is not None:
+            commit(pid, files)
+
+    result = None
+    if misses:
+        result, _ = _generate_subset(args, misses, out_dir, land)
+
+    cache.evict()
+    cache.report()
+    return result
+
+def run_generate(args, prompts=None, commit=None):
+    """Generate every prompt, or only `prompts` (prompt dicts) when given.
+
+    commit(id, files) is called as each prompt's outputs land in the output folder.
+    """
+    out_dir = Path(args.output_dir) / PROMPT_FOLDER
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if prompts is None:
+        prompts = load_prompts(args.input_text_dir)
+    if args.t2m_cache:
+        max_bytes = int(args.t2m_cache_max_gb * 1024 ** 3) if args.t2m_cache_max_gb else None
+        return run_t2m_cached(args, GenerationCache(args.t2m_cache, max_bytes=max_bytes), prompts, commit)
+    return _generate_subset(args, [p["id"] for p in prompts], out_dir, commit)[0]
+
+def generate_fingerprint(args, prompt: dict) -> str:
+    return fingerprint(text=prompt["text"], params=_prompt_params(args, prompt), model=t2m_model_id(args))
+
+def stale_prompts(args, manifest: Manifest):
+    """Prompts whose text, settings or model changed since their outputs were generated."""
+    if args.force:
+        return load_prompts(args.input_text_dir)
+    return [
+        p for p in load_prompts(args.input_text_dir)
+        if not manifest.is_done(f"prompt:{p['id']}", generate_fingerprint(args, p))
     ]
 
-    run_subprocess(argv, HYM_DIR)
+def run_generate_incremental(args):
+    """Only (re)generate stale prompts and record what each output was built from.
+
+    Returns (generator result, output files that landed in this run).
+    """
+    out_dir = Path(args.output_dir) / PROMPT_FOLDER
+    manifest = Manifest(out_dir / GENERATE_MANIFEST)
+    stale = stale_prompts(args, manifest)
+    total = len(load_prompts(args.input_text_dir))
+    print(f"[Generate] {len(stale)} of {total} prompts are stale")
+    if not stale:
+        return None, []
+
+    by_id = {p["id"]: p for p in stale}
+    landed = []
+
+    def commit(pid, files):
+        # recorded as each prompt lands, so stream mode can pick its outputs up
+        landed.extend(files)
+        if files:
+            p = by_id[pid]
+            manifest.mark_done(f"prompt:{pid}", files[0], fingerprint=generate_fingerprint(args, p),
+                               text=p["text"], model=t2m_model_id(args),
+                               files=[str(f) for f in files])
+        else:
+            manifest.mark_failed(f"prompt:{pid}", "no output")
+
+    try:
+        return run_generate(args, stale, commit), landed
+    finally:
+        manifest.compact()
+
+def _convert_one(input_file: Path, output_file: Path, resample=None):
+    """Convert (and resample) one clip in a worker; returns (error or None, timing stats)."""
+    w0, c0 = time.perf_counter(), time.process_time()
+    error, frames = None, 0
+    try:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        data = hym_to_smplx(load_hym_npz(input_file), frame_rate=CONVERT_FPS)
+        if resample:
+            data = resample_smplx(data, resample.get("fps"), resample.get("trim"))
+        save_smplx(output_file, data)
+        frames = data["poses"].shape[0]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    stats = {
+        "wall_s": time.perf_counter() - w0,
+        "cpu_s": time.process_time() - c0,
+        "frames": frames,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return error, stats
+
+def stale_converts(input_dir: Path, output_dir: Path, manifest: Manifest, force: bool = False, also=(), resample=None):
+    """(input, output) pairs that are new, modified, converted with other settings, or in `also`."""
+    input_path = Path(input_dir) / PROMPT_FOLDER
+    also = set(also)
+    fp = convert_fingerprint(resample)
+    jobs = []
+    for input_file in sorted(input_path.rglob("*.npz")):
+        if not force and input_file not in also and manifest.is_done(input_file, fp):
+            continue
+        jobs.append((input_file, Path(output_dir) / input_file.relative_to(input_path)))
+    return jobs
 
 def run_convert(
     input_dir: Path,
-    output_dir: Path
+    output_dir: Path,
+    num_workers: int = 1,
+    profiler: Profiler = None,
+    force: bool = False,
+    resample: dict = None
 ):
     Path(output_dir).mkdir(parents=True, exist_ok=True)
-    input_path = Path(input_dir) / PROMPT_FOLDER
-    npz_files = list(input_path.rglob("*.npz"))
+    npz_files = sorted((Path(input_dir) / PROMPT_FOLDER).rglob("*.npz"))
 
-    success_count = 0
-    for input_file in npz_files:
-        rel_path = input_file.relative_to(input_path)
-        output_file = Path(output_dir) / rel_path
+    manifest = Manifest(Path(output_dir) / CONVERT_MANIFEST)
+    jobs = stale_converts(input_dir, output_dir, manifest, force, resample=resample)
+    fp = convert_fingerprint(resample)
 
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        convert_to_smplx(input_file,output_file)
-        success_count += 1
+    skipped = len(npz_files) - len(jobs)
+    errors = {}
+    success_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, num_workers)) as pool:
+        futures = {pool.submit(_convert_one, i, o, resample): (i, o) for i, o in jobs}
+        for future in as_completed(futures):
+            input_file, output_file = futures[future]
+            try:
+                error, stats = future.result()
+            except Exception as e:
+                # worker process died
+                error, stats = f"{type(e).__name__}: {e}", None
+            if profiler is not None and stats is not None:
+                profiler.add_clip("convert", input_file, error=error, **stats)
+            if error is None:
+                manifest.mark_done(input_file, output_file, fingerprint=fp)
+                success_count += 1
+            else:
+                manifest.mark_failed(input_file, error)
+                errors[input_file] = error
+    manifest.compact()
 
-    print(f"\n处理完成！成功处理 {success_count}/{len(npz_files)} 个文件")
+    print(f"\n处理完成！成功处理 {success_count}/{len(jobs)} 个文件, 跳过已转换 {skipped} 个")
+    for input_file, error in errors.items():
+        print(f"[Error] {input_file}: {error}")
     print(f"输出目录: {output_dir}")
+    return errors
 
 def run_retarget(
     robot_type : str, 
     input_dir : Path,
-    output_dir : Path
+    output_dir : Path,
+    num_procs : int = 1,
+    timeout : float = None,
+    on_done = None
 ):
-   
-    script_path = GMR_DIR / "scripts" / "smplx_to_robot_dataset.py"
-
-    argv = [
-        "python",
-        str(script_path),
-        "--src_folder",
-        str(input_dir),
-        "--robot",
-        str(robot_type),
-        "--tgt_folder",
-        str(output_dir)
+    """Retarget input_dir to one robot, split over num_procs GMR processes."""
+    return run_gmr([robot_type], input_dir, output_dir, num_procs, timeout, nested=False, on_done=on_done)
+
+def run_retarget_stage(args, input_dir: Path, output_dir: Path, robots=None, num_procs=None, on_done=None):
+    """Run GMR's dataset script for every robot, with at most num_procs (default --retarget_workers) processes.
+
+    robots restricts a multi-robot run to some of args.robot_type; several
+    robots write to output_dir/<robot>/. on_done(robot, clips, ok) is
+    called as each GMR process exits.
+    """
+    num_procs = num_procs or args.retarget_workers
+    if len(args.robot_type) == 1:
+        return run_retarget(robot_type=args.robot_type[0], input_dir=input_dir, output_dir=output_dir,
+                            num_procs=num_procs, timeout=args.job_timeout, on_done=on_done)
+    return run_gmr(robots or args.robot_type, input_dir, output_dir, num_procs, timeout=args.job_timeout,
+                   on_done=on_done)
+
+def retarget_fingerprint(robot: str) -> str:
+    return fingerprint(robot=robot, xml=file_digest(ROBOT_XML_DICT[robot]))
+
+def retarget_output(args, robot: str, rel_path: Path) -> Path:
+    tgt = Path(args.tgt_folder)
+    if len(args.robot_type) > 1:
+        tgt = tgt / robot
+    return tgt / rel_path.with_suffix(".pkl")
+
+def stale_retargets(args, also=()):
+    """{robot: converted clips} whose clip changed, whose robot XML changed, or that are in `also`."""
+    src = Path(args.src_folder)
+    files = sorted(src.rglob("*.npz"))
+    also = set(also)
+    stale = {}
+    for robot in args.robot_type:
+        manifest = Manifest(Path(args.tgt_folder) / f"retarget_{robot}.jsonl")
+        fp = retarget_fingerprint(robot)
+        stale[robot] = [
+            f for f in files
+            if args.force or f in also or not manifest.is_done(f, fp)
+        ]
+    return stale
+
+def retarget_recorder(args, input_dir: Path, manifests: dict, lock=None):
+    """on_done callback for run_retarget_stage that records each GMR process's clips in the retarget manifests.
+
+    input_dir is the folder handed to GMR: src_folder itself or a folder of
+    links mirroring it. A clip counts as done only when its process exited
+    cleanly and left the output. lock guards manifests shared by threads.
+    """
+    src = Path(args.src_folder)
+
+    def on_done(robot, clips, ok):
+        manifest = manifests[robot]
+        fp = retarget_fingerprint(robot)
+        with lock or nullcontext():
+            for f in clips:
+                rel_path = Path(f).relative_to(input_dir)
+                out = retarget_output(args, robot, rel_path)
+                if ok and out.exists():
+                    manifest.mark_done(src / rel_path, out, fingerprint=fp)
+                else:
+                    manifest.mark_failed(src / rel_path, "retarget failed" if not ok else "no output")
+    return on_done
+
+def run_retarget_incremental(args):
+    """Retarget only stale (clip, robot) pairs; unchanged outputs are left alone.
+
+    Returns (retarget result, retargeted clips).
+    """
+    src, tgt = Path(args.src_folder), Path(args.tgt_folder)
+    stale = stale_retargets(args)
+    robots = [r for r in args.robot_type if stale[r]]
+    files = sorted(set(f for r in robots for f in stale[r]))
+    total = len(list(src.rglob("*.npz")))
+    print(f"[Retarget] {len(files)} of {total} clips are stale for {robots or 'no robot'}")
+    if not files:
+        return None, files
+
+    manifests = {r: Manifest(tgt / f"retarget_{r}.jsonl") for r in robots}
+    scratch = None
+    try:
+        if len(files) == total and robots == args.robot_type:
+            return run_retarget_stage(args, src, tgt, on_done=retarget_recorder(args, src, manifests)), files
+        # hand the stale clips to the retargeter through a folder of links
+        (tgt / ".incremental").mkdir(parents=True, exist_ok=True)
+        scratch = Path(tempfile.mkdtemp(dir=tgt / ".incremental"))
+        for f in files:
+            link = scratch / f.relative_to(src)
+            link.parent.mkdir(parents=True, exist_ok=True)
+            link.symlink_to(f.resolve())
+        return run_retarget_stage(args, scratch, tgt, robots, on_done=retarget_recorder(args, scratch, manifests)), files
+    finally:
+        if scratch is not None:
+            shutil.rmtree(tgt / ".incremental", ignore_errors=True)
+        for manifest in manifests.values():
+            manifest.compact()
+
+def dry_run(args):
+    """Print what an incremental run would rebuild, following stale outputs downstream."""
+    out_dir = Path(args.output_dir) / PROMPT_FOLDER
+    prompts = stale_prompts(args, Manifest(out_dir / GENERATE_MANIFEST))
+    regenerated = [f for p in prompts for f in sorted(out_dir.glob(f"{p['id']}_*.npz"))]
+
+    jobs = stale_converts(args.output_dir, args.src_folder, Manifest(Path(args.src_folder) / CONVERT_MANIFEST),
+                          args.force, also=regenerated, resample=convert_resample(args))
+    retargets = stale_retargets(args, also=[o for _, o in jobs])
+
+    print(f"[Dry run] generate: {len(prompts)} prompts")
+    for p in prompts:
+        print(f"  {p['id']}: {p['text']}")
+    print(f"[Dry run] convert: {len(jobs)} clips (plus the outputs of new prompts)")
+    for i, _ in jobs:
+        print(f"  {i}")
+    for robot, files in retargets.items():
+        print(f"[Dry run] retarget {robot}: {len(files)} clips (plus newly converted ones)")
+        for f in files:
+            print(f"  {f}")
+
+def run_stream(args, profiler: Profiler = None):
+    """Generate, convert and retarget concurrently, clip by clip."""
+    input_root = Path(args.output_dir) / PROMPT_FOLDER
+    done = threading.Event()
+
+    if args.stream_queue:
+        producer = None
+        source = tail_queue_file(args.stream_queue, done)
+    else:
+        generated = []
+
+        def generate():
+            try:
+                run_generate_incremental(args)
+            finally:
+                generated.append(time.time())
+                done.set()
+
+        # outputs land under their final names before the manifest lists them; entries of
+        # prompts about to be regenerated do not match the current fingerprint (or, with --force, predate the run)
+        current = {f"prompt:{p['id']}": generate_fingerprint(args, p) for p in load_prompts(args.input_text_dir)}
+        t_start = time.time()
+
+        def committed():
+            entries = Manifest(input_root / GENERATE_MANIFEST).entries.values()
+            return {
+                f for e in entries
+                if e["status"] == "ok" and current.get(e["input"]) == e.get("fingerprint")
+                and (not args.force or e["time"] >= t_start)
+                for f in e.get("files", [])
+            }
+
+        producer = threading.Thread(target=generate, daemon=True)
+        producer.start()
+        source = watch_dir(input_root, "*.npz", done, committed=committed)
+
+    # the same manifests as the batch retarget stage, shared by the retarget threads
+    manifests = {r: Manifest(Path(args.tgt_folder) / f"retarget_{r}.jsonl") for r in args.robot_type}
+    fps = {r: retarget_fingerprint(r) for r in args.robot_type}
+    lock = threading.Lock()
+
+    def retarget_pending(clip):
+        with lock:
+            return args.force or not all(manifests[r].is_done(clip, fps[r]) for r in args.robot_type)
+
+    def retarget(src, tgt):
+        # one GMR process per retarget thread, so --retarget_workers bounds all of them
+        return run_retarget_stage(args, src, tgt, num_procs=1, on_done=retarget_recorder(args, src, manifests, lock))
+
+    pipeline = StreamingPipeline(
+        input_root=input_root,
+        cvt_dir=Path(args.src_folder),
+        gmr_dir=Path(args.tgt_folder),
+        convert_fn=partial(_convert_one, resample=convert_resample(args)),
+        retarget_fn=retarget,
+        convert_workers=args.num_workers,
+        retarget_workers=args.retarget_workers,
+        retarget_batch=args.retarget_batch,
+        queue_size=args.queue_size,
+        manifest_name=CONVERT_MANIFEST,
+        convert_fingerprint=convert_fingerprint(convert_resample(args)),
+        profiler=profiler,
+        retarget_pending=retarget_pending,
+    )
+    errors = pipeline.run(source)
+    for manifest in manifests.values():
+        manifest.compact()
+
+    if producer is not None:
+        producer.join()
+        # clips should be converted while the generator still runs; a clip lands two staging
+        # polls after it is written and the watcher looks once a second, so shorter runs cannot overlap
+        if pipeline.first_converted is not None:
+            lead = generated[0] - pipeline.first_converted
+            if lead > 0:
+                print(f"[Stream] first clip converted {lead:.1f}s before generation finished")
+            elif pipeline.num_converted > 1 and generated[0] - t_start > 2 * STAGING_POLL + 1.0:
+                print("[Warning] no clip was converted before generation finished, the stages did not overlap")
+    return errors
+
+def run_batch(args, profiler: Profiler):
+    # step1: run text to motion inference model 
+    with profiler.stage("generate") as rec:
+        result, files = run_generate_incremental(args)
+        profiler.add_subprocess(rec, result)
+        rec["clips"], rec["frames"] = len(files), count_frames(files)
+
+    # step2: run convert output file to smplx file
+    with profiler.stage("convert") as rec:
+        run_convert(input_dir=args.output_dir, output_dir=args.src_folder, num_workers=args.num_workers, profiler=profiler, force=args.force,
+                    resample=convert_resample(args))
+        converted = [c for c in profiler.clips if c["stage"] == "convert" and c["error"] is None]
+        rec["clips"] = len(converted)
+        rec["frames"] = sum(c["frames"] for c in converted)
+
+    # step3 run gmr
+    with profiler.stage("retarget") as rec:
+        result, files = run_retarget_incremental(args)
+        profiler.add_subprocess(rec, result)
+        rec["clips"], rec["frames"] = len(files), count_frames(files)
+
+def run_qa(args):
+    """Write tgt_folder/qa_<robot>.csv with per-clip quality metrics of every retargeted motion."""
+    checked, frames = 0, 0
+    for robot in args.robot_type:
+        out_dir = retarget_output(args, robot, Path("x")).parent
+        paths = [f for f in list_motions(out_dir) if ".incremental" not in Path(str(f)).parts]
+        rows, errors = qa_clips(ROBOT_XML_DICT[robot], paths, num_workers=args.num_workers)
+        report = Path(args.tgt_folder) / f"qa_{robot}.csv"
+        rows = write_report(rows, report, args.qa_sort_by)
+        for f, error in errors.items():
+            print(f"[Error] qa {f}: {error}")
+        print(f"[QA] {robot}: {len(rows)} clips -> {report}")
+        checked += len(rows)
+        frames += sum(r["frames"] for r in rows)
+    return checked, frames
+
+def robot_resample_dir(args) -> Path:
+    return Path(args.robot_fps_dir or f"{Path(args.tgt_folder)}_{args.robot_fps:g}hz")
+
+def run_resample_robots(args):
+    """Resample retargeted clips to --robot_fps into robot_resample_dir; up to date outputs are skipped."""
+    src, tgt = Path(args.tgt_folder), robot_resample_dir(args)
+    jobs = []
+    for f in sorted(src.rglob("*.pkl")) + sorted(src.rglob(f"*{SUFFIX}")):
+        if any(p.startswith(".") for p in f.relative_to(src).parts):
+            continue
+        out = tgt / f.relative_to(src)
+        if not args.force and out.exists() and out.stat().st_mtime >= f.stat().st_mtime:
+            continue
+        jobs.append((f, out))
+    # no trimming here: --trim_static already trimmed the SMPL-X clips these came from
+    results, errors = resample_batch(jobs, args.robot_fps, num_workers=args.num_workers)
+    print(f"[Resample] {len(results)}/{len(jobs)} robot clips -> {args.robot_fps:g} Hz in {tgt}")
+    for f, error in errors.items():
+        print(f"[Error] resample {f}: {error}")
+    return len(results), sum(r["frames_out"] for r in results)
+
+def run_catalog(args):
+    """Index the new and changed outputs of all stages in the --catalog database."""
+    return update_catalog(
+        args.catalog,
+        output_dir=args.output_dir,
+        cvt_dir=args.src_folder,
+        gmr_dir=args.tgt_folder,
+        input_text_dir=args.input_text_dir,
+        robot=args.robot_type[0] if len(args.robot_type) == 1 else None,
+    )
+
+def run_post_stages(args, profiler: Profiler):
+    """Resample, QA and catalog the final outputs, as enabled."""
+    if args.robot_fps:
+        with profiler.stage("resample") as rec:
+            rec["clips"], rec["frames"] = run_resample_robots(args)
+
+    if args.qa:
+        with profiler.stage("qa") as rec:
+            rec["clips"], rec["frames"] = run_qa(args)
+
+    if args.catalog:
+        with profiler.stage("catalog"):
+            run_catalog(args)
+
+def profile_dir(args) -> Path:
+    return Path(args.profile_dir or args.tgt_folder)
+
+def _shard_stage_dirs(args, shard_dir: Path):
+    """(shard folder, final folder) of every stage output."""
+    return [
+        (shard_dir / "t2m", Path(args.output_dir)),
+        (shard_dir / "cvt", Path(args.src_folder)),
+        (shard_dir / "gmr", Path(args.tgt_folder)),
     ]
 
-    print(argv)
-    run_subprocess(argv, GMR_DIR)
+def run_shard(args, shard_dir: Path, prompt_ids):
+    """Run all stages for one shard inside shard_dir; incremental, so a re-leased shard resumes."""
+    prompt_file = shard_dir / "prompts" / Path(args.input_text_dir).name
+    subset_prompt_file(args.input_text_dir, prompt_ids, prompt_file)
+
+    stages = _shard_stage_dirs(args, shard_dir)
+    shard_args = argparse.Namespace(**vars(args))
+    # the generator runs from its own folder
+    shard_args.input_text_dir = str(prompt_file.resolve())
+    shard_args.output_dir, shard_args.src_folder, shard_args.tgt_folder = (str(d) for d, _ in stages)
+
+    profiler = Profiler()
+    run_batch(shard_args, profiler)
+    # the shard folder is removed once merged, so the profile goes to the final profile dir
+    profiler.write(profile_dir(args) / shard_dir.name)
+    profiler.summary()
+
+def merge_shards(args, shard_ids):
+    """Move finished shard outputs into the final folders and merge their manifests."""
+    for sid in shard_ids:
+        shard_dir = Path(args.shard_root) / sid
+        moves = _shard_stage_dirs(args, shard_dir)
+        for src, dst in moves:
+            if not src.exists():
+                continue
+            manifests = []
+            for f in sorted(src.rglob("*")):
+                if f.is_dir() or ".incremental" in f.parts:
+                    continue
+                if f.suffix == ".jsonl":
+                    manifests.append(f)
+                    continue
+                target = dst / f.relative_to(src)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                # a rename keeps size and mtime, so the manifests stay valid
+                os.replace(f, target)
+            for f in manifests:
+                Manifest(dst / f.relative_to(src)).merge(Manifest(f), moves)
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    print(f"[Shard] merged {len(shard_ids)} shards into {args.output_dir}, {args.src_folder}, {args.tgt_folder}")
+
+def run_sharded(args):
+    """Claim shards of the prompt set from a shared queue until none is left.
+
+    Any number of nodes can run this against the same --shard_db and
+    --shard_root. Shards of crashed workers are re-leased once their lease
+    expires; the worker that finds the queue drained merges the results.
+    """
+    worker = args.worker_id or default_worker_id()
+    queue = ShardQueue(args.shard_db, lease_s=args.lease_s, max_attempts=args.max_attempts)
+    queue.add(make_shards(load_prompts(args.input_text_dir), args.shard_size))
+
+    processed = 0
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            break
+        sid, prompt_ids = claimed
+        print(f"[Shard] {worker} took {sid} ({len(prompt_ids)} prompts)")
+        try:
+            with LeaseKeeper(queue, sid, worker) as lease:
+                run_shard(args, Path(args.shard_root) / sid, prompt_ids)
+        except Exception as e:
+            print(f"[Error] {sid}: {type(e).__name__}: {e}")
+            queue.fail(sid, worker, f"{type(e).__name__}: {e}")
+            continue
+        if lease.lost:
+            print(f"[Shard] lease on {sid} expired and it was taken over, leaving it to the new owner")
+            continue
+        queue.complete(sid, worker)
+        processed += 1
+
+    counts = queue.counts()
+    print(f"[Shard] {worker} processed {processed} shards; queue: {counts}")
+    for sid, error in queue.failed().items():
+        print(f"[Error] {sid}: {error}")
+
+    to_merge = queue.claim_merge()
+    if to_merge:
+        profiler = Profiler()
+        with profiler.stage("merge") as rec:
+            merge_shards(args, to_merge)
+            rec["clips"] = len(to_merge)
+        run_post_stages(args, profiler)
+        report = profiler.write(profile_dir(args), prefix="profile_merge")
+        profiler.summary()
+        print(f"profile: {report}")
+    elif counts["leased"]:
+        print("[Shard] other workers still hold shards, the last one to finish merges")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -97,22 +834,83 @@ def main():
     env_group.add_argument("--input_text_dir", default="data/t2m/example_subset.json", help="the directory of json files which records prompts.")
     env_group.add_argument("--output_dir", default="", help="text to motion output directory.")
     env_group.add_argument("--t2m_model", choices=["HY-Motion-1.0","HY-Motion-1.0-Lite"], help="currently supports HY-Motion-1.0 and HY-Motion-1.0-Lite.")
+    env_group.add_argument("--t2m_worker", default=None, help="unix socket of a running scripts/t2m_worker.py; submit prompts to it instead of spawning local_infer.py (needs G2H_WORKER_KEY, --disable_duration_est and --disable_rewrite).")
+    env_group.add_argument("--t2m_cache", default=None, help="generation cache directory; unchanged prompts are served from it.")
+    env_group.add_argument("--t2m_procs", type=int, default=1, help="split prompts over this many local_infer.py processes, each loading its own model.")
+    env_group.add_argument("--t2m_batch_frames", type=int, default=0, help="reorder prompts by estimated duration, in groups of at most this many padded frames balanced over --t2m_procs; the generator still batches them itself and no speedup has been measured. 0 keeps file order.")
+    env_group.add_argument("--disable_duration_est", action="store_true", help="skip HY-Motion's duration estimation.")
+    env_group.add_argument("--disable_rewrite", action="store_true", help="skip HY-Motion's prompt rewriting.")
+    env_group.add_argument("--t2m_cache_max_gb", type=float, default=None, help="evict least recently used cache entries beyond this size.")
+
+    env_group = parser.add_argument_group("Convert Setting")
+    env_group.add_argument("--num_workers", type=int, default=1, help="number of processes for smplx conversion.")
 
     env_group = parser.add_argument_group("Motion Retarget Setting")
     env_group.add_argument("--src_folder", default="outputs/cvt", help="the directory of converted smplx files from text to motion results.")
     env_group.add_argument("--tgt_folder", default="outputs/gmr", help="the directory of retargeted files from gmr results.")
-    env_group.add_argument("--robot_type", default="unitree_g1", help="robot type, for checking support robots please refer to gmr.")
+    env_group.add_argument("--robot_type", nargs="+", default=["unitree_g1"], help="robot type(s), for checking support robots please refer to gmr. several robots are written to tgt_folder/<robot>; GMR loads each clip once per robot.")
+    env_group.add_argument("--retarget_workers", type=int, default=1, help="number of concurrent retarget processes.")
+    env_group.add_argument("--job_timeout", type=float, default=None, help="kill a t2m / gmr process (and its children) after this many seconds.")
+    env_group.add_argument("--qa", action="store_true", help="write tgt_folder/qa_<robot>.csv quality metrics after retargeting.")
+    env_group.add_argument("--qa_sort_by", default="foot_slip_p95", choices=METRICS, help="report column to rank clips by, worst first.")
+
+    env_group = parser.add_argument_group("Streaming Setting")
+    env_group.add_argument("--stream", action="store_true", help="convert and retarget each clip as soon as it is generated.")
+    env_group.add_argument("--stream_queue", default=None, help="read completed clip paths from this file instead of running generation (implies --stream).")
+    env_group.add_argument("--retarget_batch", type=int, default=8, help="max clips per retarget call in stream mode.")
+    env_group.add_argument("--queue_size", type=int, default=32, help="bounded queue size between stream stages.")
+
+    env_group = parser.add_argument_group("Incremental Setting")
+    env_group.add_argument("--force", action="store_true", help="rebuild every output instead of only stale ones.")
+    env_group.add_argument("--dry_run", action="store_true", help="list what would be rebuilt and exit.")
+
+    env_group = parser.add_argument_group("Sharding Setting")
+    env_group.add_argument("--shard_db", default=None, help="sqlite shard queue on shared storage; enables sharded runs across nodes.")
+    env_group.add_argument("--shard_root", default="outputs/shards", help="shared folder for in-progress shard outputs.")
+    env_group.add_argument("--shard_size", type=int, default=64, help="prompts per shard.")
+    env_group.add_argument("--lease_s", type=float, default=1800, help="seconds before a silent worker's shard is handed to another worker.")
+    env_group.add_argument("--max_attempts", type=int, default=3, help="attempts before a failing shard is parked.")
+    env_group.add_argument("--worker_id", default=None, help="name of this worker, defaults to host-pid.")
+
+    env_group = parser.add_argument_group("Resample Setting")
+    env_group.add_argument("--smplx_fps", type=float, default=None, help="resample converted smplx clips to this rate before retargeting.")
+    env_group.add_argument("--robot_fps", type=float, default=None, help="also write retargeted clips resampled to this rate, e.g. 50 or 200.")
+    env_group.add_argument("--robot_fps_dir", default=None, help="output of --robot_fps, defaults to <tgt_folder>_<fps>hz.")
+    env_group.add_argument("--trim_static", type=float, default=None, help="drop leading / trailing frames moving slower than this (rad/s or m/s), when converting.")
+
+    env_group = parser.add_argument_group("Catalog Setting")
+    env_group.add_argument("--catalog", default=None, help="sqlite index of all outputs, updated after the run (see scripts/catalog.py).")
+
+    env_group = parser.add_argument_group("Profiling Setting")
+    env_group.add_argument("--profile_dir", default=None, help="where to write the timing report, defaults to tgt_folder.")
 
     args = parser.parse_args()
-    
-    # step1: run text to motion inference model 
-    run_t2m(model_path=args.t2m_model, input_text_dir=args.input_text_dir, output_dir=args.output_dir)
+    check_robots(args.robot_type)
 
-    # step2: run convert output file to smplx file
-    run_convert(input_dir=args.output_dir, output_dir=args.src_folder)
+    if args.dry_run:
+        dry_run(args)
+        return
 
-    # step3 run gmr
-    run_retarget(input_dir=args.src_folder, output_dir=args.tgt_folder, robot_type=args.robot_type)
+    if args.shard_db:
+        run_sharded(args)
+        return
+
+    profiler = Profiler()
+
+    if args.stream or args.stream_queue:
+        with profiler.stage("stream") as rec:
+            run_stream(args, profiler)
+            converted = [c for c in profiler.clips if c["error"] is None]
+            rec["clips"] = len(converted)
+            rec["frames"] = sum(c["frames"] for c in converted)
+    else:
+        run_batch(args, profiler)
+
+    run_post_stages(args, profiler)
+
+    report = profiler.write(profile_dir(args))
+    profiler.summary()
+    print(f"profile: {report}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""
+Quality metrics for retargeted robot motions.
+
+Runs forward kinematics over every robot motion (.pkl or .g2hm) under
+--src_folder and writes a CSV with one row per clip (foot slip, min foot
+height, dof velocity / jerk percentiles, joint limit violations), worst
+clips first by --sort_by.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.config import ROBOT_XML_DICT
+from g2h.motion_store import list_motions
+from g2h.qa import METRICS, qa_clips, write_report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Retarget QA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--robot", default="unitree_g1", help="robot type of the motions.")
+    parser.add_argument("--src_folder", default="outputs/gmr", help="folder of .pkl / .g2hm robot motions.")
+    parser.add_argument("--report", default=None, help="output csv, defaults to <src_folder>/qa_<robot>.csv.")
+    parser.add_argument("--sort_by", default="foot_slip_p95", choices=METRICS, help="report column to rank clips by.")
+    parser.add_argument("--ascending", action="store_true", help="smallest first, e.g. for min_foot_height.")
+    parser.add_argument("--contact_height", type=float, default=0.03, help="foot height above its lowest point still counted as contact (m).")
+    parser.add_argument("--foot_bodies", nargs="+", default=None, help="foot body names, detected from the MJCF if omitted.")
+    parser.add_argument("--chunk_size", type=int, default=32, help="clips per FK batch.")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of worker processes.")
+    parser.add_argument("--top", type=int, default=10, help="print the n worst clips.")
+
+    args = parser.parse_args()
+
+    src = Path(args.src_folder)
+    if (src / args.robot).is_dir():
+        src = src / args.robot
+    report = Path(args.report) if args.report else src / f"qa_{args.robot}.csv"
+    paths = list_motions(src)
+
+    t0 = time.time()
+    rows, errors = qa_clips(
+        ROBOT_XML_DICT[args.robot], paths,
+        num_workers=args.num_workers,
+        chunk_size=args.chunk_size,
+        contact_height=args.contact_height,
+        foot_bodies=args.foot_bodies,
+    )
+    rows = write_report(rows, report, args.sort_by, descending=not args.ascending)
+    elapsed = time.time() - t0
+
+    frames = sum(r["frames"] for r in rows)
+    print(f"\nChecked {len(rows)}/{len(paths)} clips, {frames} frames in {elapsed:.1f}s")
+    for r in rows[:args.top]:
+        print(f"  {r[args.sort_by]:10.4g}  {r['clip']}")
+    for f, error in errors.items():
+        print(f"[Error] {f}: {error}")
+    print(f"报告: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+Render retargeted robot motions (or SMPL-X motions) offline, without viser.
+
+Every clip under --src_folder becomes a video (--format mp4/gif, needs
+imageio) or a PNG contact sheet (--format sheet) under --tgt_folder.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.config import CACHE_DIR, GMR_BODY_MODELS_DIR, ROBOT_XML_DICT
+from g2h.motion_store import list_motions, split_clip_spec
+from g2h.render import Camera, render_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless Motion Renderer",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--robot", default=None, help="robot type of the motions; omit to render smplx motions.")
+    parser.add_argument("--src_folder", default="outputs/gmr", help="folder of .pkl / .g2hm robot motions or .npz / .g2hm smplx motions.")
+    parser.add_argument("--tgt_folder", default="outputs/render", help="output folder.")
+    parser.add_argument("--format", default="sheet", choices=["sheet", "mp4", "gif"], help="contact sheet png or video.")
+    parser.add_argument("--width", type=int, default=320, help="frame width in pixels.")
+    parser.add_argument("--height", type=int, default=240, help="frame height in pixels.")
+    parser.add_argument("--stride", type=int, default=1, help="render every n-th frame of videos.")
+    parser.add_argument("--sheet_cols", type=int, default=4, help="contact sheet columns.")
+    parser.add_argument("--sheet_frames", type=int, default=16, help="frames per contact sheet.")
+    parser.add_argument("--target_faces", type=int, default=200, help="decimate robot body meshes to about this many faces.")
+    parser.add_argument("--up", default=None, choices=["y", "z"], help="world up axis, defaults to z for robots and y for smplx.")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of render processes.")
+
+    args = parser.parse_args()
+
+    src, tgt = Path(args.src_folder), Path(args.tgt_folder)
+    if args.robot:
+        kind, model_path, motions = "robot", ROBOT_XML_DICT[args.robot], list_motions(src)
+    else:
+        kind, model_path, motions = "smplx", GMR_BODY_MODELS_DIR, list_motions(src, "*.npz")
+
+    suffix = ".png" if args.format == "sheet" else f".{args.format}"
+    jobs = []
+    for m in motions:
+        # clips of a shard (shard.g2hm#name) render to shard/name
+        path, name = split_clip_spec(m)
+        rel = path.relative_to(src).with_suffix("")
+        jobs.append((m, tgt / f"{rel / name if name else rel}{suffix}"))
+
+    up = args.up or ("z" if kind == "robot" else "y")
+    camera = Camera(args.width, args.height, up_axis=up)
+
+    t0 = time.time()
+    results, errors = render_batch(
+        kind, model_path, jobs, camera,
+        num_workers=args.num_workers,
+        stride=args.stride,
+        sheet_cols=args.sheet_cols if args.format == "sheet" else 0,
+        sheet_frames=args.sheet_frames,
+        cache_dir=CACHE_DIR / ("geoms" if kind == "robot" else "smplx_verts"),
+        target_faces=args.target_faces,
+    )
+    elapsed = time.time() - t0
+
+    frames = sum(r["frames"] for r in results)
+    print(f"\nRendered {len(results)}/{len(jobs)} clips, {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.1f} fps)")
+    if results:
+        speedup = sum(r["speedup"] for r in results) / len(results)
+        print(f"mean per-clip speed: {speedup:.2f}x realtime per worker")
+    for f, error in errors.items():
+        print(f"[Error] {f}: {error}")
+    print(f"输出目录: {tgt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+"""
+Resample and trim motions to another frame rate.
+
+Every SMPL-X .npz and robot .pkl / .g2hm under --src_folder is written to
+the same relative path in --tgt_folder, in the same format, at --fps.
+Rotations are slerped and translations / joint angles interpolated
+linearly over whole clips.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.motion_store import SUFFIX
+from g2h.resample import resample_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Motion Resampler",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--src_folder", default="outputs/gmr", help="folder of .npz smplx or .pkl / .g2hm robot motions.")
+    parser.add_argument("--tgt_folder", default=None, help="output folder, defaults to <src_folder>_<fps>hz.")
+    parser.add_argument("--fps", type=float, default=None, help="target frame rate; omit to only trim.")
+    parser.add_argument("--trim_static", type=float, default=None, help="drop leading / trailing frames moving slower than this (rad/s or m/s).")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of worker processes.")
+
+    args = parser.parse_args()
+    if args.fps is None and args.trim_static is None:
+        parser.error("nothing to do, give --fps and/or --trim_static")
+
+    src = Path(args.src_folder)
+    default = f"{src}_{args.fps:g}hz" if args.fps else f"{src}_trimmed"
+    tgt = Path(args.tgt_folder or default)
+    files = [
+        f for pattern in ("*.npz", "*.pkl", f"*{SUFFIX}") for f in sorted(src.rglob(pattern))
+        if not any(p.startswith(".") for p in f.relative_to(src).parts)
+    ]
+
+    t0 = time.time()
+    results, errors = resample_batch([(f, tgt / f.relative_to(src)) for f in files], args.fps, args.trim_static,
+                                     num_workers=args.num_workers)
+    elapsed = time.time() - t0
+
+    frames_in = sum(r["frames_in"] for r in results)
+    frames_out = sum(r["frames_out"] for r in results)
+    print(f"\nResampled {len(results)}/{len(files)} clips, {frames_in} -> {frames_out} frames in {elapsed:.1f}s")
+    for f, error in errors.items():
+        print(f"[Error] {f}: {error}")
+    print(f"输出目录: {tgt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+Extract SMPL-X joint positions (and optionally vertices) for every converted clip.
+
+Each clip under --src_folder (.npz, or every clip of a .g2hm store) becomes
+<rel_path>.npz in --tgt_folder holding `joints` (T, 55, 3) float32, `fps`
+and, with --vertices, `vertices` (T, V, 3) in --dtype.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.config import GMR_BODY_MODELS_DIR
+from g2h.motion_store import SUFFIX, MotionStore
+from g2h.skinning import skin_clips
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk SMPL-X Skinning",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--src_folder", default="outputs/cvt", help="converted smplx motions (.npz or .g2hm).")
+    parser.add_argument("--tgt_folder", default="outputs/joints", help="output directory.")
+    parser.add_argument("--vertices", action="store_true", help="also store skinned vertices, not only joints.")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"], help="storage dtype of vertices.")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of parallel clips.")
+    parser.add_argument("--processes", action="store_true", help="use processes (one body model each) instead of threads.")
+    parser.add_argument("--max_mem_mb", type=float, default=512, help="memory cap of the batched skinning buffers.")
+
+    args = parser.parse_args()
+
+    src, tgt = Path(args.src_folder), Path(args.tgt_folder)
+    jobs = [(f, tgt / f.relative_to(src)) for f in sorted(src.rglob("*.npz"))]
+    for store in sorted(src.rglob(f"*{SUFFIX}")):
+        jobs += [(f"{store}#{name}", tgt / f"{name}.npz") for name in MotionStore(store).names()]
+
+    t0 = time.time()
+    results, errors = skin_clips(
+        GMR_BODY_MODELS_DIR, jobs,
+        joints_only=not args.vertices,
+        num_workers=args.num_workers,
+        processes=args.processes,
+        max_mem_mb=args.max_mem_mb,
+        dtype=np.dtype(args.dtype),
+    )
+    elapsed = time.time() - t0
+
+    frames = sum(r["frames"] for r in results)
+    size = sum(r["bytes"] for r in results)
+    print(f"\nSkinned {len(results)}/{len(jobs)} clips, {frames} frames in {elapsed:.1f}s "
+          f"({frames / max(elapsed, 1e-9):.0f} frames/s), {size / 1024 ** 2:.1f} MB")
+    for f, error in errors.items():
+        print(f"[Error] {f}: {error}")
+    print(f"输出目录: {tgt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+"""
+Run a long-lived HY-Motion worker that keeps the model loaded.
+
+Submit prompts with `scripts/pipeline.py --t2m_worker <address>`, with the
+same G2H_WORKER_KEY exported. Without one, the worker makes up a key and
+prints it.
+"""
+
+import argparse
+import os
+import secrets
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from g2h.t2m_worker import DEFAULT_ADDRESS, KEY_ENV, HYMotionBackend, StubBackend, serve
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Persistent Text to Motion Worker",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--t2m_model", default="HY-Motion-1.0", choices=["HY-Motion-1.0","HY-Motion-1.0-Lite"], help="model kept resident by the worker.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="unix socket path to listen on.")
+    parser.add_argument("--stub", action="store_true", help="use a random CPU stub model instead of HY-Motion.")
+
+    args = parser.parse_args()
+
+    if not os.environ.get(KEY_ENV):
+        os.environ[KEY_ENV] = secrets.token_hex(32)
+        print(f"[Worker] clients need: export {KEY_ENV}={os.environ[KEY_ENV]}")
+
+    backend = StubBackend() if args.stub else HYMotionBackend(args.t2m_model)
+    serve(backend, args.address)
+
+
+if __name__ == "__main__":
+    main()
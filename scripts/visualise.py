@@ -6,8 +6,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from g2h.visualise import play
-from g2h.config import GMR_BODY_MODELS_DIR, ROBOT_XML_DICT
+from g2h.visualise import play, play_gallery
+from g2h.config import CACHE_DIR, GMR_BODY_MODELS_DIR, ROBOT_XML_DICT
 
 
 def main():
@@ -17,11 +17,20 @@ def main():
     )
 
     env_group = parser.add_argument_group("Text to Motion Setting")
-    env_group.add_argument("--fps", default=30, help="fps")
+    env_group.add_argument("--fps", type=float, default=None, help="display fps, defaults to the motion fps")
     env_group.add_argument("--robot", default=None, help="robot type")
     env_group.add_argument("--show_smplx", default=None, help="show smplx")
     env_group.add_argument("--robot_motion", default=None, help="robot motion path")
     env_group.add_argument("--smplx_motion", default=None, help="smplx motion path")
+    env_group.add_argument("--precompute_smplx", action="store_true", help="skin all smplx frames before playback")
+    env_group.add_argument("--no_cache", action="store_true", help="do not keep precomputed smplx vertices and robot meshes on disk")
+    env_group.add_argument("--target_faces", type=int, default=None, help="decimate each robot body mesh to about this many faces")
+
+    gallery_group = parser.add_argument_group("Gallery Setting")
+    gallery_group.add_argument("--gallery", action="store_true", help="browse all clips of the output folders instead of one motion")
+    gallery_group.add_argument("--gmr_dir", default="outputs/gmr", help="retargeted robot motions; uses gmr_dir/<robot> when it exists")
+    gallery_group.add_argument("--cvt_dir", default="outputs/cvt", help="converted smplx motions (.npz or .g2hm)")
+    gallery_group.add_argument("--gallery_mb", type=float, default=2048, help="memory budget of decoded clips kept for reselection")
 
     args = parser.parse_args()
 
@@ -33,6 +42,22 @@ def main():
             "At least one of --robot or --show_smplx must be specified."
         )
 
+    robot_path = None
+    if args.robot:
+        robot_path = ROBOT_XML_DICT[args.robot]
+
+    cache_dir = None if args.no_cache else CACHE_DIR
+
+    if args.gallery:
+        gmr_dir = Path(args.gmr_dir)
+        if use_robot and (gmr_dir / args.robot).is_dir():
+            gmr_dir = gmr_dir / args.robot
+        play_gallery(args.fps, gmr_dir=gmr_dir, cvt_dir=Path(args.cvt_dir),
+                     smplx_path=GMR_BODY_MODELS_DIR if use_smplx else None, robot_path=robot_path,
+                     smplx_precompute=args.precompute_smplx, cache_dir=cache_dir,
+                     target_faces=args.target_faces, max_mb=args.gallery_mb)
+        return
+
     if use_robot and args.robot_motion is None:
         parser.error(
             "--robot is specified but --robot_motion is missing."
@@ -43,11 +68,8 @@ def main():
             "--show_smplx is specified but --smplx_motion is missing."
         )
 
-    robot_path = None
-    if args.robot:
-        robot_path = ROBOT_XML_DICT[args.robot]
-    
-    play(args.fps, smplx_path=GMR_BODY_MODELS_DIR, smplx_motion=args.smplx_motion, robot_path=robot_path, robot_motion=args.robot_motion)
+    play(args.fps, smplx_path=GMR_BODY_MODELS_DIR, smplx_motion=args.smplx_motion, robot_path=robot_path, robot_motion=args.robot_motion,
+         smplx_precompute=args.precompute_smplx, cache_dir=cache_dir, target_faces=args.target_faces)
 
 
 